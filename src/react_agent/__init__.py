@@ -3,8 +3,23 @@
 
 This module defines a custom reasoning and action agent graph.
 It invokes tools in a simple loop.
+
+`react_agent.graph` is resolved on first access (PEP 562), so importing the
+package (or any submodule, e.g. for the CLI) does not build the graph or load
+the model and search clients. Until the `react_agent.graph` submodule is
+imported it resolves to the compiled graph; afterwards the name is the
+submodule, whose `graph` attribute is the compiled graph (the langgraph.json
+entry point).
 """
 
-from react_agent.graph import graph
+import importlib
+from typing import Any
 
 __all__ = ["graph"]
+
+
+def __getattr__(name: str) -> Any:
+    """Resolve `graph` to the compiled graph without importing it at package import."""
+    if name == "graph":
+        return importlib.import_module("react_agent.graph").graph
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,238 @@
+# SPDX-License-Identifier: MIT
+"""Batch runner: drive many conversations through the graph for evaluations.
+
+Input is JSONL, one conversation per line; `turns` holds the user messages in
+order and `context` optional Context overrides for that conversation:
+
+    {"id": "eu-ai-act", "turns": ["Hi!", "What's new on the EU AI act?"], "context": {"prompt_layout": "stable_prefix"}}
+
+Every conversation runs on its own thread against an in-memory checkpointer,
+at most `concurrency` at a time per event loop. With `processes > 1` the input
+is split into chunks that run on a process pool (one loop per worker), and the
+RATE_LIMITS budget is divided between the workers. One JSONL line per
+conversation is written as soon as it finishes, in completion order (workers
+pass each result back through a queue as it finishes):
+
+    {"id": ..., "answers": [...], "error": null,
+     "metrics": {"wall_ms": ..., "turn_ms": [...], "llm_calls": ..., "usage": {...}}}
+
+A failing conversation is reported with its `error` and does not stop the
+batch; so is an input line that is not a JSON object (its id is the line
+number and `answers` is empty).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import cache
+from pathlib import Path
+from typing import IO, Any, Callable, Iterable, Iterator
+from uuid import uuid4
+
+from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph.state import CompiledStateGraph
+
+from react_agent.context import Context
+from react_agent.metrics import disable_exporter
+from react_agent.ratelimit import RATE_LIMITS, parse_limits
+from react_agent.utils import get_message_text
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Conversation:
+    """One input line: the user turns to replay and per-conversation Context overrides."""
+
+    id: str
+    turns: tuple[str, ...]
+    context: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None  # set when the input line could not be parsed
+
+
+def read_conversations(lines: Iterable[str]) -> Iterator[Conversation]:
+    """Parse JSONL conversations; blank lines are skipped, a missing id becomes the line number.
+
+    `turns` may also be given as chat `messages`, of which the user messages are replayed.
+    A malformed line yields a conversation with no turns and its `error` set.
+    """
+    for n, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError(f"expected a JSON object, got {type(row).__name__}")
+            turns = row.get("turns")
+            if turns is None:
+                turns = [m["content"] for m in row.get("messages") or () if m.get("role") in ("user", "human")]
+            conv_id = row.get("id")
+            yield Conversation(str(n if conv_id in (None, "") else conv_id), tuple(str(t) for t in turns), dict(row.get("context") or {}))
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            error = f"line {n}: {type(e).__name__}: {e}"
+            logger.warning("Skipping malformed input %s", error)
+            yield Conversation(str(n), (), error=error)
+
+
+@cache
+def _app() -> tuple[CompiledStateGraph[Any, Any, Any, Any], InMemorySaver]:
+    """Return the graph compiled with an in-memory checkpointer, and that checkpointer (one per process)."""
+    from react_agent.graph import GRAPH_NAME, builder
+
+    saver = InMemorySaver()
+    return builder.compile(checkpointer=saver, name=GRAPH_NAME), saver
+
+
+async def run_conversation(conv: Conversation, overrides: dict[str, Any] | None = None) -> dict[str, Any]:
+    """Play every turn of `conv` on a fresh thread and return its result line."""
+    if conv.error is not None:
+        metrics = {"wall_ms": 0.0, "turns": 0, "turn_ms": [], "llm_calls": 0, "usage": {}}
+        return {"id": conv.id, "answers": [], "error": conv.error, "metrics": metrics}
+    app, saver = _app()
+    config: Any = {"configurable": {"thread_id": f"batch-{conv.id}-{uuid4().hex[:8]}"}}
+    answers: list[str] = []
+    turn_ms: list[float | None] = []
+    llm_calls = 0
+    usage: dict[str, int] = {}
+    error = None
+    started = time.perf_counter()
+    try:
+        ctx = Context(**{**(overrides or {}), **conv.context})
+        for text in conv.turns:
+            out = await app.ainvoke({"messages": [("user", text)]}, config, context=ctx)
+            messages: list[BaseMessage] = out["messages"]
+            answers.append(get_message_text(messages[-1]) if messages else "")
+            turn_ms.append(out.get("turn_ms"))
+            llm_calls += int(out.get("llm_calls") or 0)
+            usage = dict(out.get("usage") or {})
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        logger.warning("Conversation %s failed: %s", conv.id, error)
+    finally:
+        saver.delete_thread(config["configurable"]["thread_id"])
+    return {
+        "id": conv.id,
+        "answers": answers,
+        "error": error,
+        "metrics": {
+            "wall_ms": round((time.perf_counter() - started) * 1000, 1),
+            "turns": len(answers),
+            "turn_ms": turn_ms,
+            "llm_calls": llm_calls,
+            "usage": usage,
+        },
+    }
+
+
+async def run_batch(
+    conversations: Iterable[Conversation],
+    *,
+    concurrency: int = 8,
+    overrides: dict[str, Any] | None = None,
+    on_result: Callable[[dict[str, Any]], None] | None = None,
+) -> list[dict[str, Any]]:
+    """Run conversations on this event loop, at most `concurrency` at a time.
+
+    Results are passed to `on_result` as they finish and returned in completion order.
+    """
+    gate = asyncio.Semaphore(max(1, concurrency))
+    results: list[dict[str, Any]] = []
+
+    async def one(conv: Conversation) -> None:
+        async with gate:
+            result = await run_conversation(conv, overrides)
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    await asyncio.gather(*(one(c) for c in conversations))
+    return results
+
+
+def _init_worker(rate_limits: str, share: float) -> None:
+    """Give a pool worker its share of the account-wide rate limits; the parent serves the metrics port."""
+    disable_exporter()
+    RATE_LIMITS.limits = parse_limits(rate_limits)
+    RATE_LIMITS.scale(share)
+
+
+def _run_chunk(chunk: list[Conversation], concurrency: int, overrides: dict[str, Any], done: queue.Queue[dict[str, Any]]) -> None:
+    """Run one chunk in a pool worker, handing each result to the parent as it finishes."""
+    asyncio.run(run_batch(chunk, concurrency=concurrency, overrides=overrides, on_result=done.put))
+
+
+def run_file(
+    source: IO[str],
+    sink: IO[str],
+    *,
+    concurrency: int = 8,
+    processes: int = 1,
+    overrides: dict[str, Any] | None = None,
+    rate_limits: str | None = None,
+) -> dict[str, Any]:
+    """Run a JSONL batch from `source` into `sink` and return a summary.
+
+    `rate_limits` (a RATE_LIMITS spec) replaces the limits from the environment.
+    """
+    conversations = list(read_conversations(source))
+    overrides = dict(overrides or {})
+    spec = rate_limits if rate_limits is not None else os.environ.get("RATE_LIMITS", "")
+    if rate_limits is not None:
+        RATE_LIMITS.limits = parse_limits(rate_limits)
+    results: list[dict[str, Any]] = []
+
+    def write(result: dict[str, Any]) -> None:
+        results.append(result)
+        sink.write(json.dumps(result, ensure_ascii=False) + "\n")
+        sink.flush()
+
+    started = time.perf_counter()
+    if processes <= 1:
+        asyncio.run(run_batch(conversations, concurrency=concurrency, overrides=overrides, on_result=write))
+    else:
+        size = max(1, concurrency * 2)
+        chunks = [conversations[i : i + size] for i in range(0, len(conversations), size)]
+        with (
+            multiprocessing.Manager() as manager,
+            ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(spec, 1 / processes)) as pool,
+        ):
+            done: queue.Queue[dict[str, Any]] = manager.Queue()
+            pending = {pool.submit(_run_chunk, chunk, concurrency, overrides, done) for chunk in chunks}
+            while pending or not done.empty():
+                try:
+                    write(done.get(timeout=0.1))
+                    continue
+                except queue.Empty:
+                    pass
+                finished = {f for f in pending if f.done()}
+                for future in finished:
+                    future.result()  # a worker that died takes the batch down, as before
+                pending -= finished
+    wall_s = time.perf_counter() - started
+    usage = [r["metrics"]["usage"] for r in results]
+    return {
+        "conversations": len(results),
+        "errors": sum(1 for r in results if r["error"]),
+        "wall_s": round(wall_s, 2),
+        "conversations_per_s": round(len(results) / wall_s, 2) if wall_s else 0.0,
+        "llm_calls": sum(r["metrics"]["llm_calls"] for r in results),
+        "input_tokens": sum(u.get("input_tokens", 0) for u in usage),
+        "output_tokens": sum(u.get("output_tokens", 0) for u in usage),
+        "rate_limit_wait_s": RATE_LIMITS.stats() if processes <= 1 else {},
+    }
+
+
+def run_path(source: Path, out: Path, **kwargs: Any) -> dict[str, Any]:
+    """Run `source` (JSONL) and write the results to `out` (JSONL); see `run_file`."""
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with source.open(encoding="utf-8") as src, out.open("w", encoding="utf-8") as dst:
+        return run_file(src, dst, **kwargs)
@@ -0,0 +1,143 @@
+# SPDX-License-Identifier: MIT
+"""Per-turn latency budget: one deadline for the whole turn, and what to drop as it runs down.
+
+With `Context.turn_budget_s` set, the node that starts a human turn stamps
+`State.turn_deadline` (epoch seconds). Every later step reads it:
+
+- model calls get the time left as their timeout, and retries stop at the
+  deadline (`CallPolicy.deadline`); a call cut off by it raises
+  `DeadlineExceeded`;
+- tool calls get the time left (capped by `tool_timeout`);
+- Forge's work has to finish `answer_reserve_s` before the deadline; that
+  reserve is kept for Phase's final answer, which always gets at least that
+  long.
+
+The routers degrade by the share of Forge's time still left:
+
+- below `LEAN_SEARCH_AT`: searches ask for fewer results;
+- below `DIRECT_HANDOFF_AT`: Forge hands tool results to Phase without a
+  synthesis call (as `forge_handoff="direct"` does);
+- none left: Forge makes no more calls and Phase answers from what it has,
+  with its delegation tool unbound.
+
+Each degraded step counts in `turn_degraded_total{node,stage}`, and a turn that
+still ends late counts in `turn_budget_overruns_total`.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import time
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Iterator
+
+from react_agent.context import Context
+from react_agent.metrics import METRICS
+
+LEAN_SEARCH_AT = 0.5  # share of Forge's time left
+DIRECT_HANDOFF_AT = 0.25
+LEAN_SEARCH_RESULTS = 3
+MIN_TIMEOUT = 0.001  # seconds
+
+# Forge's deadline while its tool calls run (search has no access to graph state).
+_TOOL_DEADLINE: ContextVar[float] = ContextVar("tool_deadline", default=0.0)
+
+
+class DeadlineExceeded(TimeoutError):
+    """A call was cut off by the turn's deadline rather than by its own timeout."""
+
+
+class Stage(IntEnum):
+    """How far a turn has degraded; each stage includes the ones before."""
+
+    FULL = 0
+    LEAN_SEARCH = 1
+    DIRECT_HANDOFF = 2
+    ANSWER_NOW = 3
+
+
+def turn_deadline(ctx: Context, started: float) -> float:
+    """Return the deadline of a turn that started at `started` (0.0 when the budget is off)."""
+    budget = float(ctx.turn_budget_s)
+    return started + budget if budget > 0 else 0.0
+
+
+def forge_deadline(ctx: Context, deadline: float) -> float:
+    """Return the time by which Forge must be done (the answer reserve before `deadline`)."""
+    return deadline - float(ctx.answer_reserve_s) if deadline > 0 else 0.0
+
+
+def phase_deadline(ctx: Context, deadline: float, now: float | None = None) -> float:
+    """Return the deadline for a Phase call: the turn's, but never less than the reserve from now."""
+    if deadline <= 0:
+        return 0.0
+    now = time.time() if now is None else now
+    return max(deadline, now + float(ctx.answer_reserve_s))
+
+
+def stage(ctx: Context, deadline: float, now: float | None = None) -> Stage:
+    """Return how far the turn with `deadline` should degrade now."""
+    if deadline <= 0:
+        return Stage.FULL
+    share = _forge_share(ctx, forge_deadline(ctx, deadline), time.time() if now is None else now)
+    if share <= 0:
+        return Stage.ANSWER_NOW
+    if share < DIRECT_HANDOFF_AT:
+        return Stage.DIRECT_HANDOFF
+    if share < LEAN_SEARCH_AT:
+        return Stage.LEAN_SEARCH
+    return Stage.FULL
+
+
+def _forge_share(ctx: Context, forge_by: float, now: float) -> float:
+    """Share of Forge's working time (budget minus reserve) still left."""
+    work = float(ctx.turn_budget_s) - float(ctx.answer_reserve_s)
+    return (forge_by - now) / work if work > 0 else 0.0
+
+
+def time_left(deadline: float, now: float | None = None) -> float | None:
+    """Return seconds until `deadline` (None when there is none)."""
+    if deadline <= 0:
+        return None
+    return deadline - (time.time() if now is None else now)
+
+
+def capped(timeout: float, deadline: float) -> float:
+    """Return `timeout` (0 = none) shortened to the time left before `deadline`.
+
+    A deadline that has passed still yields a positive timeout (1 ms), so it
+    cannot read as "no timeout".
+    """
+    left = time_left(deadline)
+    if left is None:
+        return timeout
+    left = max(left, MIN_TIMEOUT)
+    return min(timeout, left) if timeout > 0 else left
+
+
+def degraded(node: str, at: Stage) -> None:
+    """Count one step that was cut short by the budget."""
+    METRICS.inc("turn_degraded_total", 1, node=node, stage=at.name.lower())
+
+
+@contextlib.contextmanager
+def tool_deadline(deadline: float) -> Iterator[None]:
+    """Expose Forge's deadline to the tools called inside the block."""
+    token = _TOOL_DEADLINE.set(deadline)
+    try:
+        yield
+    finally:
+        _TOOL_DEADLINE.reset(token)
+
+
+def search_results(ctx: Context) -> int:
+    """Return how many results a search should ask for at this point of the turn."""
+    wanted = int(ctx.max_search_results)
+    forge_by = _TOOL_DEADLINE.get()
+    if forge_by <= 0 or wanted <= LEAN_SEARCH_RESULTS:
+        return wanted
+    if _forge_share(ctx, forge_by, time.time()) < LEAN_SEARCH_AT:
+        degraded("search", Stage.LEAN_SEARCH)
+        return LEAN_SEARCH_RESULTS
+    return wanted
@@ -0,0 +1,444 @@
+# SPDX-License-Identifier: MIT
+"""Compiled LangSmith prompt bundles.
+
+A bundle is the ordered set of prompts behind one comma-separated handle list
+(e.g. `Context.phase_prompt_id`). Handles are fetched concurrently, rendered
+once with placeholder sentinels, header-stripped once, and kept as a single
+compiled object. A turn only substitutes the variable fields into it.
+Entries older than the TTL are served stale while a background refresh checks
+the commit hash and recompiles only when it changed.
+
+Compiled prompts can be persisted to a snapshot directory (one JSON file per
+handle and commit plus an index). Workers seed the store from it at startup,
+so a cold pod serves its first turn without any remote call, and
+`react-agent snapshot` writes it at deploy time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, Protocol, Sequence
+
+from langchain_core.messages import (
+    BaseMessage,
+    SystemMessage,
+    messages_from_dict,
+    messages_to_dict,
+)
+
+from react_agent.metrics import METRICS
+from react_agent.utils import file_lock, strip_messages
+
+if TYPE_CHECKING:
+    from langsmith import Client
+
+logger = logging.getLogger(__name__)
+
+# Variables substituted per turn; everything else is static.
+VARIABLES: tuple[str, ...] = ("system_time", "ai_name", "ai_language", "ai_role")
+
+# Retry delay after a failed fetch (seconds).
+RETRY_AFTER: float = 30.0
+
+_SENTINEL = "\x1f"
+_SENTINEL_RE = re.compile(f"{_SENTINEL}(\\w+){_SENTINEL}")
+
+
+def _sentinel(name: str) -> str:
+    return f"{_SENTINEL}{name}{_SENTINEL}"
+
+
+def split_handles(prompt_ids: str) -> tuple[str, ...]:
+    """Comma-separated handles → tuple of stripped, non-empty handles."""
+    return tuple(h.strip() for h in (prompt_ids or "").split(",") if h.strip())
+
+
+class PromptSource(Protocol):
+    """Where prompt templates come from."""
+
+    def fetch(self, handle: str) -> tuple[str, Any]:
+        """Return `(commit_hash, prompt_template)` for a handle."""
+        ...
+
+
+class LangSmithSource:
+    """Pull prompts from the LangSmith hub."""
+
+    def __init__(self, client: Client | None = None) -> None:
+        """Wrap an existing client or create a default one."""
+        if client is None:
+            # deferred: the client module is only needed for the first fetch
+            from langsmith import Client
+
+            client = Client()
+        self.client = client
+
+    def fetch(self, handle: str) -> tuple[str, Any]:
+        """Pull a prompt and read its commit hash from the hub metadata."""
+        prompt = self.client.pull_prompt(handle)
+        meta = getattr(prompt, "metadata", None) or {}
+        return str(meta.get("lc_hub_commit_hash") or ""), prompt
+
+
+def _fallback_messages() -> tuple[BaseMessage, ...]:
+    return (SystemMessage(content=f"System time: {_sentinel('system_time')}"),)
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    """One handle, rendered with sentinels and header-stripped."""
+
+    handle: str
+    commit: str
+    messages: tuple[BaseMessage, ...]
+    fetched_at: float
+    fallback: bool = False
+
+
+def compile_prompt(handle: str, commit: str, prompt: Any) -> CompiledPrompt:
+    """Render a prompt template with sentinels and strip headers once."""
+    names = set(VARIABLES) | set(getattr(prompt, "input_variables", None) or ())
+    value = prompt.invoke({n: _sentinel(n) for n in names})
+    messages = strip_messages(list(value.to_messages()))
+    return CompiledPrompt(handle=handle, commit=commit, messages=tuple(messages), fetched_at=time.monotonic())
+
+
+class SnapshotStore:
+    """Directory of serialized, pre-stripped prompts keyed by handle and commit.
+
+    Layout::
+
+        <dir>/index.json                    {"handles": {handle: commit}}
+        <dir>/prompts/<handle>@<commit>.json
+
+    `save` may run from several threads and processes at once: it holds a
+    thread lock plus a file lock (`<dir>/.lock`) around its index update.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str]) -> None:
+        """Point at a snapshot directory (created on first write)."""
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _slug(handle: str) -> str:
+        return re.sub(r"[^A-Za-z0-9._-]+", "_", handle)
+
+    def _path(self, handle: str, commit: str) -> Path:
+        return self.directory / "prompts" / f"{self._slug(handle)}@{self._slug(commit) or 'head'}.json"
+
+    def _write_json(self, path: Path, data: Any) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def index(self) -> dict[str, str]:
+        """Return the `handle -> commit` index (empty if there is none)."""
+        try:
+            data = json.loads((self.directory / "index.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return {str(k): str(v) for k, v in (data.get("handles") or {}).items()}
+
+    def save(self, prompts: Iterable[CompiledPrompt]) -> None:
+        """Persist prompts and point the index at their commits."""
+        prompts = [p for p in prompts if not p.fallback]
+        if not prompts:
+            return
+        for p in prompts:
+            self._write_json(
+                self._path(p.handle, p.commit),
+                {"handle": p.handle, "commit": p.commit, "messages": messages_to_dict(list(p.messages))},
+            )
+        with self._lock, file_lock(self.directory / ".lock"):
+            handles = self.index()
+            handles.update((p.handle, p.commit) for p in prompts)
+            self._write_json(self.directory / "index.json", {"handles": handles})
+
+    def load(self) -> list[CompiledPrompt]:
+        """Load every indexed prompt; unreadable entries are skipped."""
+        out: list[CompiledPrompt] = []
+        for handle, commit in self.index().items():
+            try:
+                data = json.loads(self._path(handle, commit).read_text(encoding="utf-8"))
+                messages = tuple(messages_from_dict(data["messages"]))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("Skipping prompt snapshot for %s@%s: %s", handle, commit, e)
+                continue
+            out.append(CompiledPrompt(handle, commit, messages, fetched_at=0.0))
+        return out
+
+
+def _substitute(text: str, values: dict[str, str]) -> str:
+    return _SENTINEL_RE.sub(lambda m: values.get(m.group(1), ""), text)
+
+
+def _render_content(content: Any, values: dict[str, str]) -> Any:
+    if isinstance(content, str):
+        return _substitute(content, values) if _SENTINEL in content else content
+    if isinstance(content, list):
+        out: list[Any] = []
+        for part in content:
+            if isinstance(part, str):
+                out.append(_substitute(part, values))
+            elif isinstance(part, dict) and isinstance(part.get("text"), str):
+                out.append({**part, "text": _substitute(part["text"], values)})
+            else:
+                out.append(part)
+        return out
+    return content
+
+
+@dataclass(frozen=True)
+class PromptBundle:
+    """Pre-merged, pre-stripped system messages for a list of handles."""
+
+    prompts: tuple[CompiledPrompt, ...]
+    messages: tuple[BaseMessage, ...] = field(init=False)
+    version: str = field(init=False)
+    _rendered: dict[tuple[tuple[str, str], ...], tuple[BaseMessage, ...]] = field(
+        init=False, repr=False, compare=False, default_factory=dict
+    )
+
+    def __post_init__(self) -> None:
+        """Merge the per-handle messages and derive a content version."""
+        msgs = tuple(m for p in self.prompts for m in p.messages) or _fallback_messages()
+        digest = hashlib.sha1(
+            "|".join(f"{p.handle}@{p.commit}" for p in self.prompts).encode()
+        ).hexdigest()[:12]
+        object.__setattr__(self, "messages", msgs)
+        object.__setattr__(self, "version", digest)
+
+    @property
+    def degraded(self) -> bool:
+        """True if any handle is served from the local fallback."""
+        return any(p.fallback for p in self.prompts)
+
+    def render(self, **values: Any) -> list[BaseMessage]:
+        """Substitute the variable fields into the compiled messages."""
+        vals = {k: "" if v is None else str(v) for k, v in values.items()}
+        out: list[BaseMessage] = []
+        for m in self.messages:
+            content = _render_content(m.content, vals)
+            out.append(m if content is m.content else m.model_copy(update={"content": content}))
+        return out
+
+    def render_stable(self, **values: Any) -> list[BaseMessage]:
+        """`render`, memoized per value set.
+
+        Repeated calls return the very same, byte-identical message objects.
+        Only pass values that do not change per request.
+        """
+        key = tuple(sorted((k, "" if v is None else str(v)) for k, v in values.items()))
+        cached = self._rendered.get(key)
+        if cached is None:
+            if len(self._rendered) >= 256:
+                self._rendered.clear()
+            cached = self._rendered[key] = tuple(self.render(**values))
+        return list(cached)
+
+
+class BundleStore:
+    """Process-wide cache of compiled prompts and bundles with background refresh."""
+
+    def __init__(
+        self,
+        source: PromptSource | None = None,
+        *,
+        ttl: float = 300.0,
+        max_workers: int = 8,
+        snapshot: SnapshotStore | None = None,
+        offline: bool = False,
+    ) -> None:
+        """Create a store reading from `source` (LangSmith by default).
+
+        With `offline=True` the source is never contacted; only prompts from
+        the snapshot (or the fallback) are served.
+        """
+        self._source = source
+        self.ttl = ttl
+        self.snapshot = snapshot
+        self.offline = offline
+        self._prompts: dict[str, CompiledPrompt] = {}
+        self._bundles: dict[str, PromptBundle] = {}
+        self._refreshing: set[str] = set()
+        self._lock = threading.RLock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prompt-bundle")
+
+    @property
+    def source(self) -> PromptSource:
+        """The configured prompt source."""
+        if self._source is None:
+            self._source = LangSmithSource()
+        return self._source
+
+    # --- fetching ---
+    def _fetch(self, handle: str) -> CompiledPrompt:
+        compiled, fresh = self._compile(handle)
+        if fresh:
+            self._save([compiled])
+        return compiled
+
+    def _save(self, compiled: Sequence[CompiledPrompt]) -> None:
+        if self.snapshot is None or not compiled:
+            return
+        try:
+            self.snapshot.save(compiled)
+        except OSError as e:
+            logger.warning("Could not write prompt snapshot for %s: %s", ", ".join(p.handle for p in compiled), e)
+
+    def _compile(self, handle: str) -> tuple[CompiledPrompt, bool]:
+        """Fetch and compile `handle`; the flag is True for a newly compiled commit (to be snapshotted)."""
+        prev = self._prompts.get(handle)
+        fresh = False
+        try:
+            if self.offline:
+                raise RuntimeError("prompt store is offline")
+            with METRICS.span("prompt_fetch", handle=handle):
+                commit, prompt = self.source.fetch(handle)
+            if prev is not None and not prev.fallback and commit and commit == prev.commit:
+                compiled = CompiledPrompt(prev.handle, prev.commit, prev.messages, time.monotonic())
+            else:
+                compiled = compile_prompt(handle, commit, prompt)
+                fresh = True
+        except Exception as e:
+            if prev is not None and not prev.fallback:
+                logger.warning("Prompt refresh failed for %s; keeping commit %s: %s", handle, prev.commit, e)
+                compiled = CompiledPrompt(
+                    prev.handle, prev.commit, prev.messages, time.monotonic() - self.ttl + RETRY_AFTER
+                )
+            else:
+                logger.warning("Prompt %s unavailable; using fallback: %s", handle, e)
+                compiled = CompiledPrompt(
+                    handle, "", _fallback_messages(), time.monotonic() - self.ttl + RETRY_AFTER, fallback=True
+                )
+        with self._lock:
+            self._prompts[handle] = compiled
+        return compiled, fresh
+
+    def _fetch_many(self, handles: Sequence[str]) -> None:
+        if len(handles) == 1:
+            self._fetch(handles[0])
+        elif handles:
+            # one snapshot write for the whole batch
+            self._save([p for p, fresh in self._pool.map(self._compile, handles) if fresh])
+
+    def _refresh(self, handle: str) -> None:
+        try:
+            self._fetch(handle)
+        finally:
+            with self._lock:
+                self._refreshing.discard(handle)
+
+    def _schedule_refresh(self, handles: tuple[str, ...]) -> None:
+        with self._lock:
+            todo = [h for h in handles if h not in self._refreshing]
+            self._refreshing.update(todo)
+        for h in todo:
+            self._pool.submit(self._refresh, h)
+
+    # --- lookup ---
+    def _assemble(self, prompt_ids: str, handles: tuple[str, ...]) -> PromptBundle:
+        with self._lock:
+            prompts = tuple(self._prompts[h] for h in handles)
+            cached = self._bundles.get(prompt_ids)
+            if cached is not None and all(a is b for a, b in zip(cached.prompts, prompts)):
+                return cached
+            bundle = PromptBundle(prompts)
+            self._bundles[prompt_ids] = bundle
+            return bundle
+
+    def _stale(self, handles: tuple[str, ...], ttl: float) -> tuple[str, ...]:
+        now = time.monotonic()
+        with self._lock:
+            return tuple(h for h in handles if now - self._prompts[h].fetched_at >= ttl)
+
+    def _missing(self, handles: tuple[str, ...]) -> tuple[str, ...]:
+        with self._lock:
+            return tuple(h for h in handles if h not in self._prompts)
+
+    def get(self, prompt_ids: str, *, ttl: float | None = None) -> PromptBundle:
+        """Return the compiled bundle, fetching missing handles concurrently."""
+        handles = split_handles(prompt_ids)
+        self._fetch_many(self._missing(handles))
+        return self._finish(prompt_ids, handles, ttl)
+
+    async def aget(self, prompt_ids: str, *, ttl: float | None = None) -> PromptBundle:
+        """Async `get`; a cold fetch runs off the event loop."""
+        handles = split_handles(prompt_ids)
+        missing = self._missing(handles)
+        if missing:
+            await asyncio.to_thread(self._fetch_many, missing)
+        return self._finish(prompt_ids, handles, ttl)
+
+    def _finish(self, prompt_ids: str, handles: tuple[str, ...], ttl: float | None) -> PromptBundle:
+        stale = () if self.offline else self._stale(handles, self.ttl if ttl is None else ttl)
+        if stale:
+            self._schedule_refresh(stale)
+        return self._assemble(prompt_ids, handles)
+
+    def clear(self) -> None:
+        """Forget all compiled prompts and bundles."""
+        with self._lock:
+            self._prompts.clear()
+            self._bundles.clear()
+
+    # --- snapshots ---
+    def load_snapshot(self) -> int:
+        """Seed the store from the snapshot directory; returns the number of prompts loaded.
+
+        Loaded entries count as stale, so the first use schedules a background
+        refresh instead of blocking on the network.
+        """
+        if self.snapshot is None:
+            return 0
+        loaded = self.snapshot.load()
+        stale_at = time.monotonic() - self.ttl
+        with self._lock:
+            for p in loaded:
+                cur = self._prompts.get(p.handle)
+                if cur is None or cur.fallback:
+                    self._prompts[p.handle] = CompiledPrompt(p.handle, p.commit, p.messages, stale_at)
+        return len(loaded)
+
+    def write_snapshot(self, handles: Sequence[str]) -> list[CompiledPrompt]:
+        """Fetch `handles` from the source and persist them; raises on any failure."""
+        if self.snapshot is None:
+            raise ValueError("No snapshot directory configured")
+        handles = list(dict.fromkeys(handles))
+
+        def _compile(handle: str) -> CompiledPrompt:
+            commit, prompt = self.source.fetch(handle)
+            return compile_prompt(handle, commit, prompt)
+
+        compiled = list(self._pool.map(_compile, handles))
+        self.snapshot.save(compiled)
+        with self._lock:
+            for p in compiled:
+                self._prompts[p.handle] = p
+        return compiled
+
+
+def _default_store() -> BundleStore:
+    directory = os.environ.get("PROMPT_SNAPSHOT_DIR")
+    store = BundleStore(
+        snapshot=SnapshotStore(directory) if directory else None,
+        offline=os.environ.get("PROMPT_OFFLINE", "").strip().lower() in {"1", "true", "yes", "on"},
+    )
+    store.load_snapshot()
+    return store
+
+
+PROMPT_BUNDLES = _default_store()
@@ -0,0 +1,294 @@
+# SPDX-License-Identifier: MIT
+"""TTL/LRU result caches with single-flight deduplication.
+
+Used by the `search` tool: identical queries inside the TTL are served from
+the cache, and identical queries that arrive while one is already in flight
+wait for that call instead of starting their own. Two backends are provided:
+
+- `MemoryCache`: per process, bounded LRU (the default).
+- `SQLiteCache`: a local file shared by all workers of a pod.
+
+Calls into a backend that does I/O run in a worker thread (`off_loop`), so a
+slow disk or a locked SQLite file never stalls the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Protocol, TypeVar, cast
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CacheBackend(Protocol):
+    """Key/value store with per-entry expiry; values must be JSON-serializable."""
+
+    def get(self, key: str) -> Any | None:
+        """Return the live value for `key`, or None."""
+        ...
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store `value` for `ttl` seconds."""
+        ...
+
+    def delete(self, key: str) -> bool:
+        """Drop `key`; return whether it was stored."""
+        ...
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        ...
+
+    def __len__(self) -> int:
+        """Return the number of stored entries."""
+        ...
+
+
+class MemoryCache:
+    """In-process LRU with per-entry expiry."""
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        """Hold at most `maxsize` entries."""
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        """Return the live value for `key`, or None."""
+        with self._lock:
+            found = self._entries.get(key)
+            if found is None:
+                return None
+            expires, value = found
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store `value` for `ttl` seconds, evicting the least recently used."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        """Drop `key`; return whether it was stored."""
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """Return the number of entries (expired ones count until touched)."""
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """On-disk cache in one SQLite file, shared by the worker processes of a pod."""
+
+    def __init__(self, path: str, maxsize: int = 10_000) -> None:
+        """Open (or create) the cache file at `path`."""
+        self.path = path
+        self.maxsize = maxsize
+        self.evictions = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL, used REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Any | None:
+        """Return the live value for `key`, or None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE cache SET used = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store `value` for `ttl` seconds; trims to `maxsize` by last use."""
+        now = time.time()
+        data = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires, used) VALUES (?, ?, ?, ?)",
+                (key, data, now + ttl, now),
+            )
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+            if size > self.maxsize:
+                self._conn.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+                cur = self._conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY used ASC LIMIT MAX(0, (SELECT COUNT(*) FROM cache) - ?))",
+                    (self.maxsize,),
+                )
+                self.evictions += max(0, cur.rowcount)
+
+    def delete(self, key: str) -> bool:
+        """Drop `key`; return whether it was stored."""
+        with self._lock:
+            return self._conn.execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount > 0
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def __len__(self) -> int:
+        """Return the number of stored entries."""
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0])
+
+
+async def off_loop(backend: CacheBackend, fn: Callable[..., T], *args: Any) -> T:
+    """Run `fn(*args)`, a call into `backend`, in a worker thread unless the backend is in memory."""
+    if isinstance(backend, MemoryCache):
+        return fn(*args)
+    return await asyncio.to_thread(fn, *args)
+
+
+class ResultCache:
+    """Cache-aside wrapper with single-flight merging and hit/miss statistics.
+
+    Entries remember how long the original call took, so every hit adds that
+    time to `saved_ms`.
+    """
+
+    def __init__(self, backend: CacheBackend) -> None:
+        """Serve results from `backend`."""
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.saved_ms = 0.0
+        self._inflight: dict[tuple[int, str], asyncio.Future[Any]] = {}
+
+    async def get_or_call(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[Any]],
+        *,
+        ttl: float,
+        cacheable: Callable[[Any], bool] = lambda _: True,
+    ) -> Any:
+        """Return the cached value for `key`, or await `call()` once and cache it.
+
+        Concurrent callers on the same event loop share one in-flight call.
+        `ttl <= 0` bypasses the cache; results rejected by `cacheable` (e.g.
+        errors) are returned but not stored.
+        """
+        if ttl <= 0:
+            return await call()
+        slot = (id(asyncio.get_running_loop()), key)
+        if slot not in self._inflight:
+            entry = await self._lookup(key)
+            if entry is not None:
+                self.hits += 1
+                self.saved_ms += float(entry.get("cost_ms", 0.0))
+                return entry["value"]
+
+        pending = self._inflight.get(slot)
+        if pending is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if not pending.cancelled() or (task is not None and task.cancelling()):
+                    raise
+                # the leading call was cancelled, not us: run it ourselves
+                return await self.get_or_call(key, call, ttl=ttl, cacheable=cacheable)
+
+        self.misses += 1
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        self._inflight[slot] = future
+        started = time.perf_counter()
+        try:
+            value = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        else:
+            future.set_result(value)
+            if cacheable(value):
+                cost_ms = (time.perf_counter() - started) * 1000
+                await self._store(key, {"value": value, "cost_ms": round(cost_ms, 1)}, ttl)
+            return value
+        finally:
+            self._inflight.pop(slot, None)
+
+    async def _lookup(self, key: str) -> dict[str, Any] | None:
+        try:
+            return cast(dict[str, Any] | None, await off_loop(self.backend, self.backend.get, key))
+        except Exception as e:  # a broken cache must never break the tool
+            logger.warning("Cache read failed: %s", e)
+            return None
+
+    async def _store(self, key: str, entry: dict[str, Any], ttl: float) -> None:
+        try:
+            await off_loop(self.backend, self.backend.set, key, entry, ttl)
+        except Exception as e:
+            logger.warning("Cache write failed: %s", e)
+
+    def stats(self) -> dict[str, float]:
+        """Return hit/miss/coalesced counters, saved latency (ms) and backend size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "saved_ms": round(self.saved_ms, 1),
+            "evictions": getattr(self.backend, "evictions", 0),
+            "size": len(self.backend),
+        }
+
+    def clear(self) -> None:
+        """Drop cached entries and reset counters."""
+        self.backend.clear()
+        self.hits = self.misses = self.coalesced = 0
+        self.saved_ms = 0.0
+
+
+def backend_from_env(prefix: str, default_path: str, default_size: int, default_kind: str = "memory") -> CacheBackend:
+    """Build a backend from `<prefix>_BACKEND` (memory|sqlite), `<prefix>_PATH` and `<prefix>_SIZE`."""
+    size = int(os.environ.get(f"{prefix}_SIZE", str(default_size)))
+    if os.environ.get(f"{prefix}_BACKEND", default_kind).strip().lower() == "sqlite":
+        path = os.environ.get(f"{prefix}_PATH", default_path)
+        try:
+            return SQLiteCache(path, maxsize=size)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("%s store at %s unavailable, using memory: %s", prefix, path, e)
+    return MemoryCache(maxsize=size)
+
+
+SEARCH_CACHE = ResultCache(backend_from_env("SEARCH_CACHE", ".cache/search.sqlite3", 1024))
+
+# Full tool payloads kept out of graph state, addressed by the `ref` in the compacted result.
+PAYLOAD_TTL = float(os.environ.get("PAYLOAD_STORE_TTL", "86400"))
+PAYLOAD_STORE = backend_from_env("PAYLOAD_STORE", ".cache/payloads.sqlite3", 4096)
@@ -0,0 +1,133 @@
+# SPDX-License-Identifier: MIT
+"""Command-line entry points for deploy-time and operational tasks."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Sequence
+
+from react_agent.bundles import BundleStore, SnapshotStore, split_handles
+from react_agent.context import Context
+
+
+def _snapshot(args: argparse.Namespace) -> int:
+    """Write the prompt snapshot used for offline cold start."""
+    ctx = Context()
+    handles = [*split_handles(ctx.phase_prompt_id), *split_handles(ctx.forge_prompt_id)]
+    for extra in args.handles or ():
+        handles.extend(split_handles(extra))
+    store = BundleStore(snapshot=SnapshotStore(args.out))
+    try:
+        written = store.write_snapshot(handles)
+    except Exception as e:
+        sys.stderr.write(f"snapshot failed: {e}\n")
+        return 1
+    for p in written:
+        sys.stdout.write(f"{p.handle}@{p.commit or 'head'}\n")
+    sys.stdout.write(f"wrote {len(written)} prompts to {args.out}\n")
+    return 0
+
+
+def _batch(args: argparse.Namespace) -> int:
+    """Run a JSONL file of conversations through the graph."""
+    from react_agent.batch import run_path
+    from react_agent.metrics import start_exporter
+
+    try:
+        overrides = json.loads(args.context) if args.context else {}
+    except ValueError as e:
+        sys.stderr.write(f"--context is not valid JSON: {e}\n")
+        return 2
+    start_exporter()  # here, not in the pool workers
+    summary = run_path(
+        args.input,
+        args.out,
+        concurrency=args.concurrency,
+        processes=args.processes,
+        overrides=overrides,
+        rate_limits=args.rate_limits,
+    )
+    sys.stdout.write(json.dumps(summary) + "\n")
+    return 1 if summary["errors"] else 0
+
+
+def _warmup(args: argparse.Namespace) -> int:
+    """Warm this process up and print the time per step."""
+    from react_agent.warmup import warm_up
+
+    report = asyncio.run(warm_up(connect=not args.no_connect))
+    sys.stdout.write(json.dumps(report) + "\n")
+    return 1 if any(isinstance(v, str) for v in report.values()) else 0
+
+
+def _serve(args: argparse.Namespace) -> int:
+    """Run the streaming chat gateway until interrupted."""
+    from react_agent.gateway import serve
+
+    try:
+        asyncio.run(
+            serve(
+                args.host,
+                args.port,
+                warm=not args.no_warmup,
+                max_inflight=args.max_inflight,
+                queue_timeout=args.queue_timeout,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the `react-agent` argument parser."""
+    parser = argparse.ArgumentParser(prog="react-agent")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    snap = sub.add_parser("snapshot", help="Write pre-stripped prompt bundles to a directory.")
+    snap.add_argument("--out", required=True, help="Snapshot directory (PROMPT_SNAPSHOT_DIR for workers).")
+    snap.add_argument(
+        "--handles",
+        action="append",
+        help="Extra comma-separated handles (Phase/Forge handles from Context are always included).",
+    )
+    snap.set_defaults(func=_snapshot)
+
+    batch = sub.add_parser("batch", help="Run a JSONL file of conversations and write results and metrics as JSONL.")
+    batch.add_argument("input", type=Path, help="JSONL input, one {\"id\", \"turns\", \"context\"} object per line.")
+    batch.add_argument("--out", type=Path, required=True, help="JSONL output, one result per conversation.")
+    batch.add_argument("--concurrency", type=int, default=8, help="Conversations in flight per event loop.")
+    batch.add_argument("--processes", type=int, default=1, help="Worker processes (each runs its own event loop).")
+    batch.add_argument("--context", help="JSON object of Context overrides applied to every conversation.")
+    batch.add_argument(
+        "--rate-limits",
+        help='Provider limits, e.g. "openai:rpm=500,tpm=800000;tavily:rpm=100" (default: RATE_LIMITS).',
+    )
+    batch.set_defaults(func=_batch)
+
+    warm = sub.add_parser("warmup", help="Compile the graph, load prompts and models, open provider connections; print timings.")
+    warm.add_argument("--no-connect", action="store_true", help="Skip opening provider connections.")
+    warm.set_defaults(func=_warmup)
+
+    gw = sub.add_parser("serve", help="Serve the chat gateway (POST /chat, JSON or SSE).")
+    gw.add_argument("--host", default="127.0.0.1", help="Interface to bind.")
+    gw.add_argument("--port", type=int, default=8080, help="Port to bind.")
+    gw.add_argument("--max-inflight", type=int, default=32, help="Graph runs in flight before requests queue.")
+    gw.add_argument("--queue-timeout", type=float, default=10.0, help="Seconds a request may queue before a 503.")
+    gw.add_argument("--no-warmup", action="store_true", help="Start without warming the worker up.")
+    gw.set_defaults(func=_serve)
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run the CLI."""
+    args = build_parser().parse_args(argv)
+    return int(args.func(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,219 @@
+# SPDX-License-Identifier: MIT
+"""Deterministic compaction of tool results.
+
+- `compact_search` shrinks a raw Tavily payload before it becomes a ToolMessage
+  (deduped URLs, ranked by score, snippets cut to a token budget).
+- `compact_tool_results` condenses Forge's last tool batch into plain text for
+  the direct Forge → Phase handoff (`Context.forge_handoff == "direct"`).
+- `merge_branches` joins the results of Forge's parallel research branches
+  into one block within the same size limit.
+- `turn_internals` / `turn_digest` select and summarize a finished turn's
+  internal Phase↔Forge traffic for end-of-turn checkpoint slimming.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Sequence
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from react_agent.history import TOKENS, TokenCounter
+from react_agent.utils import get_message_text
+
+SNIPPET_CHARS = 400
+MAX_CHARS = 4000
+
+_TRACKING_PARAM = re.compile(r"^(utm_\w+|fbclid|gclid|ref|ref_src)$", re.I)
+
+
+def canonical_url(url: str) -> str:
+    """URL identity for deduplication: no scheme/www/fragment/tracking params/trailing slash."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not _TRACKING_PARAM.match(k)])
+    return urlunsplit(("", host, parts.path.rstrip("/"), query, ""))
+
+
+def _fit(text: str, tokens: int, counter: TokenCounter) -> str:
+    """Cut `text` to at most `tokens` tokens (on a character boundary, marked with …)."""
+    text = " ".join(text.split())
+    n = counter.text(text)
+    if n <= tokens:
+        return text
+    if tokens <= 0:
+        return ""
+    keep = int(len(text) * tokens / n)
+    while keep > 0 and counter.text(text[:keep]) + 1 > tokens:
+        keep = int(keep * 0.9)
+    return text[:keep].rstrip() + "…" if keep > 0 else ""
+
+
+def compact_search(
+    payload: dict[str, Any],
+    *,
+    budget_tokens: int,
+    counter: TokenCounter | None = None,
+) -> dict[str, Any]:
+    """Dedupe, rank and trim a Tavily payload to roughly `budget_tokens`.
+
+    Results sharing a canonical URL keep the best-scored copy. Snippets are
+    filled best-first; each gets an even share of the budget left at its
+    turn, so short snippets leave room for the next. `raw_content`, images and
+    other bulky fields are dropped; `omitted` counts results that did not fit.
+    """
+    counter = counter or TOKENS
+    best: dict[str, dict[str, Any]] = {}
+    for r in payload.get("results") or []:
+        if not isinstance(r, dict):
+            continue
+        key = canonical_url(str(r.get("url") or r.get("title") or ""))
+        if key not in best or float(r.get("score") or 0) > float(best[key].get("score") or 0):
+            best[key] = r
+    ranked = sorted(best.values(), key=lambda r: float(r.get("score") or 0), reverse=True)
+
+    out: dict[str, Any] = {"query": payload.get("query", "")}
+    used = counter.text(json.dumps(out, ensure_ascii=False))
+    if payload.get("answer"):
+        out["answer"] = _fit(str(payload["answer"]), max(0, budget_tokens // 4), counter)
+        used += counter.text(out["answer"])
+    results: list[dict[str, Any]] = []
+    for i, r in enumerate(ranked):
+        item: dict[str, Any] = {"title": _clip(str(r.get("title") or ""), 160), "url": str(r.get("url") or "")}
+        if r.get("score") is not None:
+            item["score"] = round(float(r["score"]), 3)
+        head = counter.text(json.dumps(item, ensure_ascii=False))
+        share = (budget_tokens - used) // (len(ranked) - i) - head
+        if results and share <= 0:
+            break
+        snippet = _fit(str(r.get("content") or ""), max(0, share), counter)
+        if snippet:
+            item["content"] = snippet
+        results.append(item)
+        used += head + counter.text(snippet)
+    out["results"] = results
+    if len(ranked) > len(results):
+        out["omitted"] = len(ranked) - len(results)
+    return out
+
+
+def turn_internals(messages: Sequence[BaseMessage]) -> list[BaseMessage]:
+    """Select the latest turn's internal Phase↔Forge traffic (all but user and visible Phase text).
+
+    Returns nothing unless the turn has ended with a visible Phase answer.
+    """
+    start = next((i for i in range(len(messages) - 1, -1, -1) if isinstance(messages[i], HumanMessage)), None)
+    last = messages[-1] if messages else None
+    if start is None or not isinstance(last, AIMessage) or last.tool_calls:
+        return []
+    return [
+        m
+        for m in messages[start + 1 :]
+        if isinstance(m, ToolMessage)
+        or (isinstance(m, AIMessage) and (m.tool_calls or (m.additional_kwargs or {}).get("invisible")))
+    ]
+
+
+def turn_digest(internal: Sequence[BaseMessage], *, note_chars: int = SNIPPET_CHARS) -> dict[str, Any]:
+    """Compact record of a turn's internal exchange: tool calls, their status and Forge's notes."""
+    tools: list[dict[str, Any]] = []
+    status = {m.tool_call_id: m.status for m in internal if isinstance(m, ToolMessage)}
+    notes: list[str] = []
+    for m in internal:
+        if not isinstance(m, AIMessage):
+            continue
+        for tc in m.tool_calls:
+            if tc["name"] in {"delegate_phase_to_forge", "handoff_to_phase"}:
+                continue
+            tools.append({"name": tc["name"], "args": tc.get("args") or {}, "status": status.get(str(tc.get("id")), "missing")})
+        text = get_message_text(m)
+        if text and m.name == "forge":
+            notes.append(text)
+    digest: dict[str, Any] = {"tools": tools, "removed": len(internal)}
+    if notes:
+        digest["forge_notes"] = _clip(notes[-1], note_chars)
+    return digest
+
+
+def last_tool_batch(messages: Sequence[BaseMessage]) -> list[ToolMessage]:
+    """ToolMessages answering the most recent AIMessage tool calls, in call order."""
+    batch: list[ToolMessage] = []
+    for m in reversed(messages):
+        if isinstance(m, ToolMessage):
+            batch.append(m)
+            continue
+        if isinstance(m, AIMessage) and m.tool_calls:
+            order = {str(tc.get("id")): i for i, tc in enumerate(m.tool_calls)}
+            return sorted(batch, key=lambda t: order.get(t.tool_call_id, len(order)))
+        break
+    return list(reversed(batch))
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+def _parse(content: str) -> Any:
+    try:
+        return json.loads(content)
+    except (TypeError, ValueError):
+        return content
+
+
+def _render_search(payload: dict[str, Any], snippet_chars: int) -> list[str]:
+    lines: list[str] = []
+    if payload.get("answer"):
+        lines.append(f"Answer: {_clip(str(payload['answer']), snippet_chars)}")
+    for i, r in enumerate(payload.get("results") or [], 1):
+        if not isinstance(r, dict):
+            continue
+        title = _clip(str(r.get("title") or r.get("url") or ""), 120)
+        lines.append(f"{i}. {title} <{r.get('url', '')}>")
+        snippet = r.get("content") or r.get("snippet") or ""
+        if snippet:
+            lines.append(f"   {_clip(str(snippet), snippet_chars)}")
+    return lines
+
+
+def compact_tool_result(msg: ToolMessage, *, snippet_chars: int = SNIPPET_CHARS) -> str:
+    """One tool result as a short, labelled text block."""
+    name = (msg.name or "tool").strip()
+    if name == "research_parallel":  # merged by `merge_branches`, already within budget
+        return get_message_text(msg)
+    payload = _parse(get_message_text(msg))
+    if isinstance(payload, dict) and payload.get("error"):
+        return f"[{name}] error: {_clip(str(payload['error']), snippet_chars)}"
+    if isinstance(payload, dict) and "results" in payload:
+        query = payload.get("query")
+        head = f"[{name}] {query}" if query else f"[{name}]"
+        lines = _render_search(payload, snippet_chars)
+        return "\n".join([head, *lines]) if lines else f"{head} no results"
+    if isinstance(payload, dict | list):
+        payload = json.dumps(payload, ensure_ascii=False)
+    return f"[{name}] {_clip(str(payload), snippet_chars * 2)}"
+
+
+def compact_tool_results(
+    messages: Sequence[ToolMessage],
+    *,
+    max_chars: int = MAX_CHARS,
+    snippet_chars: int = SNIPPET_CHARS,
+) -> str:
+    """Join the compacted results, cutting the total at `max_chars`."""
+    text = "\n\n".join(compact_tool_result(m, snippet_chars=snippet_chars) for m in messages)
+    return text if len(text) <= max_chars else text[: max_chars - 1].rstrip() + "…"
+
+
+def merge_branches(branches: Sequence[dict[str, Any]], *, max_chars: int = MAX_CHARS) -> str:
+    """Join research branch results (`query`, `text`) in order, each cut to an even share of `max_chars`."""
+    if not branches:
+        return "No sub-queries were researched."
+    share = max(1, max_chars // len(branches))
+    blocks: list[str] = []
+    for b in branches:
+        block = f"## {b.get('query', '')}\n{b.get('text') or 'no result'}"
+        blocks.append(block if len(block) <= share else block[: share - 1].rstrip() + "…")
+    return "\n\n".join(blocks)
@@ -41,6 +41,18 @@ class Context:
         default="blackbaddl13/ksodi_light_ethics:DXB, blackbaddl13/role_definition_forge:DXB, blackbaddl13/glyphs_ksodi_light:DXB, blackbaddl13/interaction_protocol_forge:DXB, blackbaddl13/resonance_saturation_ksodi_light:DXB, blackbaddl13/resonance_role_forge_ksodi_light:DXB, blackbaddl13/personalization_ksodi_light:DXB",
         metadata={"description": "LangSmith prompt handle for Forge."},
     )
+    prompt_ttl: float = field(
+        default=300.0,
+        metadata={"description": "Seconds before compiled prompt bundles are refreshed in the background."},
+    )
+
+    prompt_layout: str = field(
+        default="inline",
+        metadata={
+            "description": "'inline' renders system_time into the bundle; 'stable_prefix' keeps the bundle "
+            "byte-identical across turns (provider prompt caching) and sends the time (to the minute) in a system message right after it."
+        },
+    )
 
     # Global default model
     model: Annotated[str, {"__template_metadata__": {"kind": "llm"}}] = field(
@@ -58,11 +70,189 @@ class Context:
         metadata={"description": "Default model for the Forge node (overrides global if set)."},
     )
 
+    # Fast-path pre-router (skips the delegating Phase call for obvious tool turns)
+    prerouter: str = field(
+        default="off",
+        metadata={"description": "'off' always starts a turn in Phase; 'rules' sends clearly tool-bound turns straight to Forge."},
+    )
+    prerouter_threshold: float = field(
+        default=0.8,
+        metadata={"description": "Minimum classifier confidence (0..1) for the Forge fast path."},
+    )
+
+    forge_handoff: str = field(
+        default="synthesize",
+        metadata={
+            "description": "'synthesize' lets Forge summarize tool results with one more model call; 'direct' hands "
+            "deterministically compacted results straight to Phase (one model call and one hop fewer per tool batch)."
+        },
+    )
+    forge_fanout: int = field(
+        default=0,
+        metadata={
+            "description": "Maximum parallel research branches Forge may split a delegated task into with its "
+            "`research_parallel` tool; each branch runs its own Forge step and tool calls (0 disables the tool)."
+        },
+    )
+
+    # Model-call resilience (Phase and Forge)
+    phase_timeout: float = field(
+        default=60.0,
+        metadata={"description": "Seconds per Phase model attempt before it counts as a timeout (0 disables)."},
+    )
+    forge_timeout: float = field(
+        default=180.0,
+        metadata={"description": "Seconds per Forge model attempt before it counts as a timeout (0 disables)."},
+    )
+    model_retries: int = field(
+        default=2,
+        metadata={"description": "Extra attempts after a timeout, 429, 5xx or connection error (full-jitter backoff)."},
+    )
+    retry_backoff: float = field(
+        default=0.5,
+        metadata={"description": "Base backoff in seconds; attempt n waits a random 0..base*2^n (capped at 8 s)."},
+    )
+    hedge_percentile: float = field(
+        default=0.0,
+        metadata={
+            "description": "Send a second, identical request once a call runs longer than this latency percentile "
+            "of the model's recent calls (e.g. 95; 0 disables). The first reply wins. Streamed Phase calls are never hedged."
+        },
+    )
+    breaker_failures: int = field(
+        default=5,
+        metadata={
+            "description": "Consecutive retryable failures that open a model's circuit breaker; while open, a node "
+            "whose model differs from `model` is served by `model` instead (0 disables)."
+        },
+    )
+    breaker_cooldown: float = field(
+        default=30.0,
+        metadata={"description": "Seconds an open breaker waits before letting one probe call through to the primary model."},
+    )
+
+    # Per-turn latency budget (see react_agent.budget)
+    turn_budget_s: float = field(
+        default=0.0,
+        metadata={
+            "description": "Seconds from the user's message to Phase's answer. Model and tool calls get the time left "
+            "as their timeout, and the turn degrades as it runs down: fewer search results, no Forge synthesis, then "
+            "Phase answers from what it has (0 disables)."
+        },
+    )
+    answer_reserve_s: float = field(
+        default=5.0,
+        metadata={"description": "Seconds of the turn budget kept for Phase's final answer; Forge must be done before them."},
+    )
+
+    phase_streaming: bool = field(
+        default=False,
+        metadata={"description": "Stream Phase tokens to `stream_mode=\"messages\"` consumers and record TTFT."},
+    )
+
+    # Response cache for replayed / evaluation conversations (opt-in)
+    response_cache: bool = field(
+        default=False,
+        metadata={
+            "description": "Reuse Phase/Forge responses whose model, tools, prompt bundle version, variables and "
+            "history are unchanged (system_time excluded). Backend: RESPONSE_CACHE_BACKEND/_PATH/_SIZE, SQLite by default."
+        },
+    )
+    response_cache_ttl: float = field(
+        default=7 * 24 * 3600.0,
+        metadata={"description": "Seconds a cached response stays valid."},
+    )
+
+    # History windowing (tokens of thread history per model call; 0 = send everything)
+    phase_history_tokens: int = field(
+        default=16000,
+        metadata={"description": "Token budget for thread history sent to Phase (0 disables windowing)."},
+    )
+    forge_history_tokens: int = field(
+        default=32000,
+        metadata={"description": "Token budget for thread history sent to Forge (0 disables windowing)."},
+    )
+
+    turn_compaction: str = field(
+        default="off",
+        metadata={
+            "description": "'digest' replaces a finished turn's internal Phase↔Forge messages with a compact record on "
+            "the final answer; 'archive' also keeps them in the payload store; 'off' leaves the thread untouched."
+        },
+    )
+
+    # Rolling summary (folds old turns in the background; the thread's next turn uses it).
+    # The fold runs in the worker process that started it. With several workers it reaches a next turn served
+    # elsewhere only through the graph's store (the LangGraph server has one); without a store, that worker
+    # starts the fold over (see react_agent.summary).
+    summary_model: Annotated[str, {"__template_metadata__": {"kind": "llm"}}] = field(
+        default="",
+        metadata={"description": "Model that folds old turns into the running summary (empty: `model`)."},
+    )
+    summary_trigger_tokens: int = field(
+        default=0,
+        metadata={
+            "description": "Fold old turns once the unsummarized history exceeds this many tokens (0 disables, the "
+            "default; e.g. 12000)."
+        },
+    )
+    summary_keep_turns: int = field(
+        default=4,
+        metadata={"description": "Most recent turns that always stay verbatim."},
+    )
+
+    # Long-term memory (see react_agent.memory; needs numpy)
+    memory_k: int = field(
+        default=0,
+        metadata={
+            "description": "Earlier turns recalled by similarity into Phase/Forge prompts from the thread's (or the "
+            "run's `user_id`'s) vector memory; finished turns are stored as they end (0 disables memory)."
+        },
+    )
+    memory_min_score: float = field(
+        default=0.15,
+        metadata={"description": "Minimum cosine similarity (-1..1) for a stored turn to be recalled."},
+    )
+
     max_search_results: int = field(
         default=10,
         metadata={"description": "The maximum number of search results to return for each search query."},
     )
 
+    # Tool execution (Forge's `tools` node runs all calls of one message concurrently)
+    tool_timeout: float = field(
+        default=20.0,
+        metadata={"description": "Seconds per tool call, queueing included; late calls get a timeout result (0 disables)."},
+    )
+    tool_concurrency: int = field(
+        default=16,
+        metadata={"description": "Maximum tool calls running at once in this process (all threads)."},
+    )
+    tool_concurrency_per_tool: int = field(
+        default=4,
+        metadata={"description": "Maximum concurrent calls of any single tool in this process."},
+    )
+
+    search_cache_ttl: float = field(
+        default=300.0,
+        metadata={
+            "description": "Seconds a search result is reused for the same normalized query (0 disables). "
+            "Backend and size are per process: SEARCH_CACHE_BACKEND=memory|sqlite, SEARCH_CACHE_PATH, SEARCH_CACHE_SIZE."
+        },
+    )
+
+    search_result_tokens: int = field(
+        default=1500,
+        metadata={"description": "Token budget for one compacted search result: deduped, ranked, snippets cut (0 keeps the raw payload)."},
+    )
+    search_keep_payload: bool = field(
+        default=False,
+        metadata={
+            "description": "Also store the full search payload out of band (PAYLOAD_STORE_BACKEND/_PATH/_TTL) "
+            "and put its `ref` into the compacted result."
+        },
+    )
+
     # Personalization / Prompt Vars
     ai_name: str = field(
         default="AI",
@@ -87,6 +277,20 @@ class Context:
             cur = getattr(self, f.name)
             os_val = os.environ.get(env_key)
             if os_val is not None:
-                setattr(self, f.name, os_val)
+                setattr(self, f.name, _coerce(os_val, f.default))
             else:
                 setattr(self, f.name, cur)
+
+
+def _coerce(raw: str, default: object) -> object:
+    """Cast an ENV string to the type of the field default (bool/int/float)."""
+    try:
+        if isinstance(default, bool):
+            return raw.strip().lower() in {"1", "true", "yes", "on"}
+        if isinstance(default, int):
+            return int(raw)
+        if isinstance(default, float):
+            return float(raw)
+    except ValueError:
+        return default
+    return raw
@@ -0,0 +1,183 @@
+# SPDX-License-Identifier: MIT
+"""Concurrent tool execution for the Forge `tools` node.
+
+Replaces `ToolNode(TOOLS)`: all tool calls of the last AIMessage run at once,
+bounded by a per-tool and a per-process semaphore, and each call has its own
+deadline. Calls that fail or time out still get a ToolMessage with their
+`tool_call_id`, so every call stays answered and the results keep call order.
+With a turn budget, the deadline is Forge's (see `budget`): calls get the time
+left as their timeout, and none start once it has passed. Waiting for a
+provider's rate limit (see `ratelimit`) does not count against the tool
+timeout, only against that deadline.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Protocol, Sequence
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import BaseTool
+from langgraph.runtime import Runtime
+
+from react_agent import budget
+from react_agent.context import Context
+from react_agent.metrics import METRICS
+from react_agent.ratelimit import exempt_waits
+from react_agent.state import State
+
+logger = logging.getLogger(__name__)
+
+
+class _Gate:
+    """Counting semaphore whose limit can change while calls are in flight."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.active = 0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def __aexit__(self, *exc: object) -> None:
+        async with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    async def resize(self, limit: int) -> None:
+        """Set a new limit; raising it lets that many more waiters in at once."""
+        async with self._cond:
+            grown, self.limit = limit - self.limit, limit
+            if grown > 0:
+                self._cond.notify(grown)
+
+
+# One gate per name and event loop (asyncio primitives are bound to a loop; the
+# gateway and each batch worker run one loop per process). Runs with different
+# limits share the gate: the latest limit applies, so the cap is never exceeded
+# by mixing contexts.
+_GATES: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, _Gate]] = weakref.WeakKeyDictionary()
+
+_PROCESS = "*"  # gate shared by every tool
+
+
+async def _gate(name: str, limit: int) -> _Gate:
+    per_loop = _GATES.setdefault(asyncio.get_running_loop(), {})
+    gate = per_loop.get(name)
+    if gate is None:
+        gate = per_loop[name] = _Gate(limit)
+    await gate.resize(limit)
+    return gate
+
+
+def _error(call: dict[str, Any], text: str) -> ToolMessage:
+    return ToolMessage(content=text, name=call.get("name"), tool_call_id=str(call.get("id") or ""), status="error")
+
+
+async def run_tool_call(
+    tool: BaseTool | None,
+    call: dict[str, Any],
+    *,
+    timeout: float,
+    per_tool: int,
+    per_process: int,
+    deadline: float = 0.0,
+) -> ToolMessage:
+    """Run one tool call within the concurrency limits and its timeout (queueing included).
+
+    Rate-limit waits extend the timeout, but not past `deadline` (epoch
+    seconds, 0 = none). Never raises: unknown tools, errors and timeouts become error ToolMessages.
+    """
+    name = str(call.get("name") or "")
+    if tool is None:
+        return _error(call, f"Error: unknown tool '{name}'.")
+
+    async def run() -> Any:
+        async with await _gate(_PROCESS, max(1, per_process)), await _gate(name, max(1, per_tool)):
+            return await tool.ainvoke({**call, "type": "tool_call"})
+
+    async def bounded() -> Any:
+        left = budget.time_left(deadline)
+        async with asyncio.timeout(timeout) as cm:
+            with exempt_waits(cm, None if left is None else asyncio.get_running_loop().time() + max(left, 0.0)):
+                return await run()
+
+    started = time.perf_counter()
+    try:
+        result = await (bounded() if timeout > 0 else run())
+    except TimeoutError:
+        logger.warning("Tool %s timed out after %.1fs", name, timeout)
+        METRICS.observe("tool_ms", (time.perf_counter() - started) * 1000, tool=name, status="timeout")
+        return _error(call, f"Timed out after {timeout:g}s; no result from '{name}'.")
+    except Exception as e:
+        logger.warning("Tool %s failed: %s", name, e)
+        METRICS.observe("tool_ms", (time.perf_counter() - started) * 1000, tool=name, status="error")
+        return _error(call, f"Error: {e!r}\n Please fix your mistakes.")
+    if isinstance(result, ToolMessage):
+        msg = result
+    else:
+        msg = ToolMessage(content=str(result), name=name, tool_call_id=str(call.get("id") or ""))
+    elapsed = (time.perf_counter() - started) * 1000
+    METRICS.observe("tool_ms", elapsed, tool=name, status=msg.status)
+    msg.response_metadata = {**msg.response_metadata, "elapsed_ms": round(elapsed, 1)}
+    return msg
+
+
+async def run_tool_calls(
+    by_name: dict[str, BaseTool], calls: Sequence[dict[str, Any]], ctx: Context, deadline: float
+) -> list[ToolMessage]:
+    """Run `calls` concurrently under the context's limits, within Forge's `deadline` (0 = none).
+
+    Once the deadline has passed no call starts; each gets a "Skipped" result.
+    """
+    left = budget.time_left(deadline)
+    if left is not None and left <= 0:
+        budget.degraded("tools", budget.Stage.ANSWER_NOW)
+        return [_error(dict(tc), "Skipped: no time left in this turn.") for tc in calls]
+    timeout = budget.capped(float(getattr(ctx, "tool_timeout", 0) or 0), deadline)
+    per_tool = int(getattr(ctx, "tool_concurrency_per_tool", 4))
+    per_process = int(getattr(ctx, "tool_concurrency", 16))
+    with budget.tool_deadline(deadline):
+        results = await asyncio.gather(
+            *(
+                run_tool_call(by_name.get(tc["name"]), dict(tc), timeout=timeout, per_tool=per_tool, per_process=per_process, deadline=deadline)
+                for tc in calls
+            )
+        )
+    return list(results)
+
+
+def tools_by_name(tools: Sequence[Callable[..., Any]]) -> dict[str, BaseTool]:
+    """Index the BaseTool instances of `tools` by name."""
+    return {t.name: t for t in tools if isinstance(t, BaseTool)}
+
+
+class ToolsNode(Protocol):
+    """Graph node signature of the executor (LangGraph passes `runtime` by keyword)."""
+
+    def __call__(self, state: State, *, runtime: Runtime[Context]) -> Awaitable[dict[str, Any]]:
+        """Execute the pending tool calls."""
+        ...
+
+
+def tool_executor(tools: Sequence[Callable[..., Any]]) -> ToolsNode:
+    """Build the `tools` node for `tools` (limits and timeout come from the run context)."""
+    by_name = tools_by_name(tools)
+
+    async def execute_tools(state: State, *, runtime: Runtime[Context]) -> dict[str, Any]:
+        """Run every tool call of the last AIMessage concurrently; answer each one."""
+        last = state.messages[-1] if state.messages else None
+        if not isinstance(last, AIMessage) or not last.tool_calls:
+            return {}
+        ctx = runtime.context
+        deadline = budget.forge_deadline(ctx, state.turn_deadline)
+        calls = [dict(tc) for tc in last.tool_calls]
+        return {"messages": await run_tool_calls(by_name, calls, ctx, deadline)}
+
+    return execute_tools
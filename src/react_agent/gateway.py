@@ -0,0 +1,408 @@
+# SPDX-License-Identifier: MIT
+"""Streaming chat gateway: one HTTP request per chat message, no polling.
+
+Replaces the n8n create-thread / start-run / poll / join loop with a single
+call that runs the graph in-process:
+
+    POST /chat  {"session_id": "abc", "message": "Hi!"}
+    → 200 {"session_id": "abc", "thread_id": "...", "answer": "...", "turn_ms": ..., "llm_calls": ...}
+
+With `Accept: text/event-stream` (or `?stream=1`) the reply is Server-Sent
+Events over a chunked response instead: one `token` event per streamed Phase
+text chunk, then a `done` event carrying the JSON above (or an `error` event).
+Other endpoints: `GET /healthz`, `DELETE /sessions/<session_id>`.
+
+- Session → thread index: a session id is mapped to a thread id on first use
+  and reused afterwards (GATEWAY_SESSIONS_BACKEND=memory|sqlite, _PATH, _SIZE;
+  entries expire after GATEWAY_SESSION_TTL seconds without use). Lookups in
+  the sqlite backend run in a worker thread, off the event loop.
+- Connection reuse: HTTP/1.1 keep-alive; a client (n8n, a proxy) can send all
+  its messages over one connection.
+- Backpressure: at most `max_inflight` runs at once; a request that cannot get
+  a slot within `queue_timeout` seconds gets 503 with Retry-After. Messages of
+  one session run one after another. Streamed writes wait for the socket to
+  drain, and a client that disconnects cancels its run: a streamed reply
+  notices on its next write, a JSON reply by watching the connection for
+  EOF while the run is in progress.
+- Auth: with GATEWAY_TOKEN set, requests need `Authorization: Bearer <token>`.
+
+`react-agent serve` warms the worker up (see `warmup`) and starts the server.
+The default graph keeps thread state in memory; pass a persistent
+checkpointer (and the sqlite session backend) to survive restarts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hmac
+import json
+import logging
+import os
+import time
+import weakref
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Any, AsyncIterator, Awaitable, TypeVar
+from urllib.parse import parse_qsl, unquote, urlsplit
+from uuid import uuid4
+
+from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+
+from react_agent.cache import CacheBackend, backend_from_env, off_loop
+from react_agent.context import Context
+from react_agent.metrics import METRICS, start_exporter
+from react_agent.streaming import is_user_facing
+from react_agent.utils import get_message_text
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MAX_BODY = 1 << 20  # bytes
+MAX_HEADERS = 100
+KEEP_ALIVE = 30.0  # idle seconds before a connection is closed
+HANGUP_POLL = 0.25  # seconds between checks for a client gone during a JSON run
+SESSION_TTL = float(os.environ.get("GATEWAY_SESSION_TTL", str(30 * 24 * 3600)))
+
+
+class HTTPError(Exception):
+    """Reply with `status` and a JSON error body."""
+
+    def __init__(self, status: int, message: str, headers: dict[str, str] | None = None) -> None:
+        """Carry the status, message and extra response headers."""
+        super().__init__(message)
+        self.status, self.headers = status, dict(headers or {})
+
+
+@dataclass
+class Request:
+    """One parsed HTTP/1.1 request."""
+
+    method: str
+    path: str
+    query: dict[str, str]
+    headers: dict[str, str]
+    body: bytes = b""
+    version: str = "HTTP/1.1"
+
+    @property
+    def keep_alive(self) -> bool:
+        """Return whether the connection stays open after the response."""
+        conn = self.headers.get("connection", "").lower()
+        return conn != "close" if self.version == "HTTP/1.1" else conn == "keep-alive"
+
+    def json(self) -> dict[str, Any]:
+        """Return the body as a JSON object."""
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError as e:
+            raise HTTPError(400, f"invalid JSON: {e}") from e
+        if not isinstance(data, dict):
+            raise HTTPError(400, "body must be a JSON object")
+        return data
+
+
+async def read_request(reader: asyncio.StreamReader) -> Request | None:
+    """Read one request; None when the client closed the connection."""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError as e:
+        raise HTTPError(400, "malformed request line") from e
+    headers: dict[str, str] = {}
+    while True:
+        raw = await reader.readline()
+        if raw in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise HTTPError(431, "too many headers")
+        name, _, value = raw.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HTTPError(411, "send a Content-Length body")
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPError(400, "invalid Content-Length") from None
+    if length < 0:
+        raise HTTPError(400, "invalid Content-Length")
+    if length > MAX_BODY:
+        raise HTTPError(413, f"body over {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length else b""
+    url = urlsplit(target)
+    return Request(method.upper(), unquote(url.path), dict(parse_qsl(url.query)), headers, body, version)
+
+
+def _head(status: int, headers: dict[str, str]) -> bytes:
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}", *(f"{k}: {v}" for k, v in headers.items()), "", ""]
+    return "\r\n".join(lines).encode("latin-1")
+
+
+async def send_json(writer: asyncio.StreamWriter, status: int, payload: Any, *, keep_alive: bool, headers: dict[str, str] | None = None) -> None:
+    """Write a complete JSON response."""
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = {
+        "Content-Type": "application/json",
+        "Content-Length": str(len(body)),
+        "Connection": "keep-alive" if keep_alive else "close",
+        **(headers or {}),
+    }
+    writer.write(_head(status, head) + body)
+    await writer.drain()
+
+
+class EventStream:
+    """Server-Sent Events over a chunked response; every write waits for the socket to drain."""
+
+    def __init__(self, writer: asyncio.StreamWriter, *, keep_alive: bool) -> None:
+        """Wrap `writer`; call `open` before the first event."""
+        self.writer, self.keep_alive = writer, keep_alive
+
+    async def open(self) -> None:
+        """Send the response head."""
+        self.writer.write(
+            _head(
+                200,
+                {
+                    "Content-Type": "text/event-stream; charset=utf-8",
+                    "Cache-Control": "no-cache",
+                    "Transfer-Encoding": "chunked",
+                    "Connection": "keep-alive" if self.keep_alive else "close",
+                    "X-Accel-Buffering": "no",
+                },
+            )
+        )
+        await self.writer.drain()
+
+    async def send(self, event: str, data: Any) -> None:
+        """Send one event."""
+        payload = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode()
+        self.writer.write(f"{len(payload):x}\r\n".encode("ascii") + payload + b"\r\n")
+        await self.writer.drain()
+
+    async def close(self) -> None:
+        """Terminate the chunked body."""
+        self.writer.write(b"0\r\n\r\n")
+        await self.writer.drain()
+
+
+class SessionIndex:
+    """Session id → thread id, refreshed on every use."""
+
+    def __init__(self, backend: CacheBackend | None = None, ttl: float = SESSION_TTL) -> None:
+        """Store mappings in `backend` (GATEWAY_SESSIONS_* by default) for `ttl` seconds."""
+        self.backend = backend if backend is not None else backend_from_env("GATEWAY_SESSIONS", ".cache/sessions.sqlite3", 100_000)
+        self.ttl = ttl
+
+    async def thread_for(self, session_id: str) -> str:
+        """Return the session's thread id, starting a new thread for an unknown (or empty) session."""
+        return await off_loop(self.backend, self._thread_for, session_id)
+
+    async def forget(self, session_id: str) -> bool:
+        """Drop a session's mapping; the next message starts a new thread."""
+        return await off_loop(self.backend, self.backend.delete, f"session:{session_id}")
+
+    async def count(self) -> int:
+        """Return the number of stored sessions."""
+        return await off_loop(self.backend, len, self.backend)
+
+    def _thread_for(self, session_id: str) -> str:
+        found = self.backend.get(f"session:{session_id}") if session_id else None
+        thread_id = str(found) if found else str(uuid4())
+        if session_id:
+            self.backend.set(f"session:{session_id}", thread_id, self.ttl)
+        return thread_id
+
+
+@dataclass
+class Gateway:
+    """HTTP front end for the compiled graph; see the module docstring."""
+
+    app: Any = None
+    sessions: SessionIndex = field(default_factory=SessionIndex)
+    context: dict[str, Any] = field(default_factory=lambda: {"phase_streaming": True})
+    max_inflight: int = 32
+    queue_timeout: float = 10.0
+    token: str | None = field(default_factory=lambda: os.environ.get("GATEWAY_TOKEN") or None)
+    checkpointer: BaseCheckpointSaver[Any] | None = None
+
+    def __post_init__(self) -> None:
+        """Compile the graph (with an in-memory checkpointer unless one was given)."""
+        if self.app is None:
+            from react_agent.graph import GRAPH_NAME, builder
+
+            self.app = builder.compile(checkpointer=self.checkpointer or InMemorySaver(), name=GRAPH_NAME)
+        self._slots = asyncio.Semaphore(max(1, self.max_inflight))
+        self._inflight = 0
+        self._locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.Server:
+        """Listen on `host:port` (port 0 picks a free one)."""
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_BODY)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve requests on one connection until the client or the keep-alive timeout closes it."""
+        try:
+            while True:
+                try:
+                    req = await asyncio.wait_for(read_request(reader), KEEP_ALIVE)
+                except HTTPError as e:
+                    await send_json(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    return
+                if req is None:
+                    return
+                if not await self.dispatch(req, writer, reader):
+                    return
+        except (TimeoutError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    async def dispatch(self, req: Request, writer: asyncio.StreamWriter, reader: asyncio.StreamReader | None = None) -> bool:
+        """Answer one request; return whether the connection stays open.
+
+        With `reader`, a JSON chat run is cancelled when the client hangs up.
+        """
+        started = time.perf_counter()
+        route = "chat" if req.path == "/chat" else req.path.split("/")[1] or "/"
+        status = 200
+        try:
+            self._authorize(req)
+            if req.method == "POST" and req.path == "/chat":
+                await self.chat(req, writer, reader)
+            elif req.method == "GET" and req.path == "/healthz":
+                await send_json(writer, 200, await self.health(), keep_alive=req.keep_alive)
+            elif req.method == "DELETE" and req.path.startswith("/sessions/"):
+                found = await self.sessions.forget(req.path.removeprefix("/sessions/"))
+                status = 200 if found else 404
+                await send_json(writer, status, {"deleted": found}, keep_alive=req.keep_alive)
+            else:
+                raise HTTPError(404, f"no route for {req.method} {req.path}")
+        except HTTPError as e:
+            status = e.status
+            await send_json(writer, e.status, {"error": str(e)}, keep_alive=req.keep_alive, headers=e.headers)
+        except ConnectionError:
+            status = 499  # client closed the connection
+            raise
+        except Exception as e:
+            # a model or tool error inside the run; streamed replies report it as an `error` event instead
+            logger.exception("%s %s failed", req.method, req.path)
+            status = 500
+            await send_json(writer, 500, {"error": f"{type(e).__name__}: {e}"}, keep_alive=req.keep_alive)
+        finally:
+            METRICS.observe("gateway_ms", (time.perf_counter() - started) * 1000, route=route, status=status)
+        return req.keep_alive
+
+    def _authorize(self, req: Request) -> None:
+        if self.token and not hmac.compare_digest(req.headers.get("authorization", ""), f"Bearer {self.token}"):
+            raise HTTPError(401, "missing or wrong bearer token", {"WWW-Authenticate": "Bearer"})
+
+    async def health(self) -> dict[str, Any]:
+        """Return liveness data: runs in flight and known sessions."""
+        sessions = await self.sessions.count()
+        return {"status": "ok", "inflight": self._inflight, "max_inflight": self.max_inflight, "sessions": sessions}
+
+    async def chat(self, req: Request, writer: asyncio.StreamWriter, reader: asyncio.StreamReader | None = None) -> None:
+        """Run one user message on the session's thread and reply with JSON or SSE."""
+        body = req.json()
+        message = str(body.get("message") or "").strip()
+        if not message:
+            raise HTTPError(400, "`message` is required")
+        session_id = str(body.get("session_id") or "")
+        thread_id = await self.sessions.thread_for(session_id)
+        stream = "text/event-stream" in req.headers.get("accept", "") or req.query.get("stream") in ("1", "true")
+
+        lock = self._locks.get(thread_id)
+        if lock is None:
+            lock = self._locks[thread_id] = asyncio.Lock()
+        async with lock, self._slot():
+            ctx = Context(**self.context)
+            config: Any = {"configurable": {"thread_id": thread_id}}
+            meta = {"session_id": session_id, "thread_id": thread_id}
+            if not stream:
+                out = await _until_hangup(self.app.ainvoke({"messages": [("user", message)]}, config, context=ctx), reader)
+                await send_json(writer, 200, {**meta, **_result(out)}, keep_alive=req.keep_alive)
+                return
+            events = EventStream(writer, keep_alive=req.keep_alive)
+            await events.open()
+            try:
+                async for text in self._phase_tokens(message, config, ctx):
+                    await events.send("token", {"text": text})
+                state = await self.app.aget_state(config)
+                await events.send("done", {**meta, **_result(state.values)})
+            except ConnectionError:
+                raise
+            except Exception as e:
+                logger.exception("Run on thread %s failed", thread_id)
+                await events.send("error", {**meta, "error": f"{type(e).__name__}: {e}"})
+            await events.close()
+
+    @contextlib.asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except TimeoutError:
+            METRICS.inc("gateway_rejected_total", 1)
+            raise HTTPError(503, "gateway busy", {"Retry-After": str(max(1, round(self.queue_timeout)))}) from None
+        self._inflight += 1
+        try:
+            yield
+        finally:
+            self._inflight -= 1
+            self._slots.release()
+
+    async def _phase_tokens(self, message: str, config: Any, ctx: Context) -> AsyncIterator[str]:
+        """Yield Phase's text chunks as the graph streams them (Forge is never streamed)."""
+        stream = self.app.astream({"messages": [("user", message)]}, config, context=ctx, stream_mode="messages")
+        async with contextlib.aclosing(stream):
+            async for chunk, meta in stream:
+                if is_user_facing(chunk, meta):
+                    yield get_message_text(chunk)
+
+
+async def _until_hangup(run: Awaitable[T], reader: asyncio.StreamReader | None) -> T:
+    """Await `run`; cancel it and raise ConnectionResetError once the client has closed the connection."""
+    task = asyncio.ensure_future(run)
+    try:
+        while reader is not None:
+            done, _ = await asyncio.wait({task}, timeout=HANGUP_POLL)
+            if done:
+                break
+            if reader.at_eof():  # EOF with nothing left unread; a pipelined request keeps the run going
+                raise ConnectionResetError("client closed the connection during the run")
+        return await task
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+def _result(values: dict[str, Any]) -> dict[str, Any]:
+    messages: list[BaseMessage] = values.get("messages") or []
+    return {
+        "answer": get_message_text(messages[-1]) if messages else "",
+        "turn_ms": values.get("turn_ms"),
+        "llm_calls": values.get("llm_calls"),
+    }
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8080, *, warm: bool = True, **options: Any) -> None:
+    """Start the metrics exporter (if configured), warm up, then serve until cancelled."""
+    start_exporter()
+    if warm:
+        from react_agent.warmup import warm_up
+
+        report = await warm_up()
+        logger.info("Warm-up: %s", report)
+    gateway = Gateway(**options)
+    server = await gateway.start(host, port)
+    logger.info("Gateway listening on %s", ", ".join(str(s.getsockname()) for s in server.sockets))
+    async with server:
+        await server.serve_forever()
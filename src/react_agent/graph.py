@@ -1,127 +1,385 @@
 # SPDX-License-Identifier: MIT
 """LangGraph state machine for KSODI-Light (Phase/Forge) — Forge runs real tools."""
 
+import asyncio
+import contextlib
+import functools
+import json
+import logging
+import time
 from datetime import UTC, datetime
-from functools import lru_cache
-from typing import Any, Iterable, Literal
+from typing import Any, AsyncIterator, Callable, Iterable, Literal
 from uuid import uuid4
 
 from langchain_core.messages import (
     AIMessage,
     BaseMessage,
     HumanMessage,
+    RemoveMessage,
     SystemMessage,
     ToolMessage,
+    messages_to_dict,
 )
+from langgraph.config import get_config
+from langgraph.constants import TAG_NOSTREAM
 from langgraph.graph import StateGraph
+from langgraph.graph.state import CompiledStateGraph
 from langgraph.prebuilt import ToolNode
 from langgraph.runtime import Runtime
-from langsmith import Client
+from langgraph.store.base import BaseStore
+from langgraph.types import Send
 
+from react_agent import budget
+from react_agent.bundles import PROMPT_BUNDLES
+from react_agent.cache import PAYLOAD_STORE, PAYLOAD_TTL
+from react_agent.compaction import (
+    compact_tool_results,
+    last_tool_batch,
+    merge_branches,
+    turn_digest,
+    turn_internals,
+)
 from react_agent.context import Context
-from react_agent.state import InputState, State
-from react_agent.tools import DELEGATION_TOOLS_FORGE, DELEGATION_TOOLS_PHASE, TOOLS
-from react_agent.utils import get_message_text, load_chat_model, strip_messages
+from react_agent.executor import run_tool_calls, tool_executor, tools_by_name
+from react_agent.history import TOKENS, window_messages
+from react_agent.metrics import METRICS, timed_node
+from react_agent.prompts import (
+    ANSWER_NOW_NOTE,
+    FORGE_OUT_OF_TIME,
+    STABLE_TIME_REF,
+    SUMMARY_PROMPT,
+)
+from react_agent.ratelimit import OUTPUT_ALLOWANCE, RATE_LIMITS
+from react_agent.resilience import (
+    Admit,
+    Call,
+    CallPolicy,
+    Settle,
+    admitted,
+    resilient_call,
+)
+from react_agent.responses import cached_response, prompt_fingerprint, response_key
+from react_agent.routing import classify_turn
+from react_agent.state import InputState, ResearchBranch, State
+from react_agent.streaming import StreamProgress, astream_collect
+from react_agent.summary import (
+    SUMMARY_JOBS,
+    claim_fold,
+    is_visible,
+    plan_fold,
+    publish_fold,
+    summary_message,
+    transcript,
+    unsummarized,
+)
+from react_agent.tools import (
+    DELEGATION_TOOLS_FORGE,
+    DELEGATION_TOOLS_PHASE,
+    FANOUT_TOOLS,
+    TOOLS,
+)
+from react_agent.utils import (
+    get_chat_model,
+    get_message_text,
+    split_provider_model,
+    usage_counts,
+)
+
+logger = logging.getLogger(__name__)
 
-# Limits (synced from Context at runtime)
+# Fallback limits when the run context carries no usable value
 MAX_DEPTH: int = 25
 MAX_PHASE_FORGE_LOOPS: int = 3
 
-_ls = Client()
+_TOOLS_BY_NAME = tools_by_name(TOOLS)
 
-# --- LangSmith prompt pull + strip (cached) ---
-@lru_cache(maxsize=64)
-def _pull_prompt_cached(prompt_id: str) -> Any:
-    """Cache LangSmith prompt pulls to reduce API latency."""
-    return _ls.pull_prompt(prompt_id)
 
-def _ls_messages(prompt_id: str, **kwargs: Any) -> list[BaseMessage]:
-    """Pull one LangSmith prompt, render with kwargs, strip meta headers."""
+def _limits(ctx: Context) -> tuple[int, int]:
+    """Resolve (max_depth, max_phase_forge) for this run from its own context."""
     try:
-        prompt = _pull_prompt_cached(prompt_id)
-        value = prompt.invoke(kwargs)
-        return strip_messages(list(value.to_messages()))
-    except Exception:
-        return [SystemMessage(content=f"System time: {kwargs.get('system_time', '')}")]
-
-def _ls_messages_multi(prompt_ids: str, **kwargs: Any) -> list[BaseMessage]:
-    """Comma-separated handles → merged messages (stripped)."""
-    handles = [h.strip() for h in (prompt_ids or "").split(",") if h.strip()]
-    if not handles:
-        return [SystemMessage(content=f"System time: {kwargs.get('system_time', '')}")]
-    msgs: list[BaseMessage] = []
-    for h in handles:
-        msgs.extend(_ls_messages(h, **kwargs))
-    return strip_messages(msgs)  # idempotent
-
-# --- Phase (non-streaming; safe TTFT-off) ---
-async def phase(state: State, runtime: Runtime[Context]) -> dict[str, Any]:
-    """Bind delegation tools and produce the next AIMessage (single step)."""
-    # sync limits
+        md = int(getattr(ctx, "max_depth", 0))
+    except (TypeError, ValueError):
+        md = 0
     try:
-        md = int(getattr(runtime.context, "max_depth", 0))
-        if md > 0:
-            global MAX_DEPTH
-            MAX_DEPTH = md
-    except Exception:
-        pass
+        cap = int(getattr(ctx, "max_phase_forge", MAX_PHASE_FORGE_LOOPS))
+    except (TypeError, ValueError):
+        cap = MAX_PHASE_FORGE_LOOPS
+    return (md if md > 0 else MAX_DEPTH), (cap if cap >= 0 else MAX_PHASE_FORGE_LOOPS)
+
+# --- Prompt assembly: [system bundle][time (stable_prefix)][summary][history] ---
+async def _prompt(state: State, ctx: Context, prompt_ids: str, budget: int) -> tuple[list[BaseMessage], str]:
+    """Render the compiled bundle for this turn and append the history.
+
+    Also returns the prompt's fingerprint for the response cache (bundle
+    version, variables and history; never the clock).
+
+    In the `stable_prefix` layout the bundle is rendered without the clock and
+    memoized, so it is byte-identical across turns and threads for the same
+    ai_name/ai_language/ai_role (provider prefix caching). The time follows it
+    as one more system message, still in the leading system block (providers
+    such as Anthropic reject system messages after the conversation), to the
+    minute so that the calls of one turn share their prefix through the
+    history as well.
+    """
+    with METRICS.span("prompt_bundle", bundle="phase" if prompt_ids == ctx.phase_prompt_id else "forge"):
+        bundle = await PROMPT_BUNDLES.aget(prompt_ids, ttl=float(ctx.prompt_ttl))
+    fixed = {
+        "ai_name": getattr(ctx, "ai_name", "AI"),
+        "ai_language": getattr(ctx, "ai_language", "English"),
+        "ai_role": getattr(ctx, "ai_role", ""),
+    }
+    history = _history(state, budget)
+    if int(ctx.memory_k) > 0:
+        history = await _with_memories(state, ctx, history)
+    layout = getattr(ctx, "prompt_layout", "inline")
+    fingerprint = prompt_fingerprint(bundle.version, fixed, layout, history)
+    if layout == "stable_prefix":
+        sys_msgs = bundle.render_stable(system_time=STABLE_TIME_REF, **fixed)
+        clock = SystemMessage(content=f"System time: {datetime.now(tz=UTC).isoformat(timespec='minutes')}")
+        return [*sys_msgs, clock, *history], fingerprint
+    return [*bundle.render(system_time=datetime.now(tz=UTC).isoformat(), **fixed), *history], fingerprint
+
+def _with_system_note(prompt: list[BaseMessage], text: str) -> list[BaseMessage]:
+    """Add `text` as the last message of the leading system block, after the cached prefix.
+
+    Providers such as Anthropic reject system messages after the conversation.
+    """
+    at = next((i for i, m in enumerate(prompt) if not isinstance(m, SystemMessage)), len(prompt))
+    return [*prompt[:at], SystemMessage(content=text), *prompt[at:]]
+
+async def _invoke(
+    ctx: Context,
+    node: str,
+    model_id: str,
+    tools: list[Any] | None,
+    prompt: list[BaseMessage],
+    make_call: Callable[[str], Call],
+    fingerprint: str,
+    *,
+    hedge: bool = True,
+    deadline: float = 0.0,
+    progress: StreamProgress | None = None,
+) -> BaseMessage:
+    """Run a model call under the node's resilience policy, through the response cache when on.
+
+    `make_call(model_id)` builds the call for a model id; it is asked again for
+    `Context.model` when the primary's circuit breaker diverts the call.
+    `deadline` (epoch seconds, 0 = none) bounds every attempt and retry.
+    Streamed calls pass the `progress` they report their first token to, so
+    they are not repeated once the user has seen output.
+    """
+    policy = CallPolicy.for_node(ctx, node, hedge=hedge, deadline=deadline)
+
+    async def call() -> BaseMessage:
+        return await resilient_call(
+            model_id,
+            make_call,
+            policy=policy,
+            node=node,
+            fallback=ctx.model,
+            progress=progress,
+            admit=_admission(prompt),
+        )
+
+    if not getattr(ctx, "response_cache", False):
+        return await call()
+    key = response_key(model_id, tools, fingerprint)
+    return await cached_response(key, call, ttl=float(ctx.response_cache_ttl), node=node)
+
+def _ainvoke(prompt: list[BaseMessage], tools: list[Any] | None = None) -> Callable[[str], Call]:
+    """Call factory for `_invoke`: one non-streamed `ainvoke` of `prompt`."""
+
+    def make(model_id: str) -> Call:
+        model = get_chat_model(model_id, tools=tools).with_config(tags=[TAG_NOSTREAM])
+        return lambda: model.ainvoke(prompt)
+
+    return make
+
+def _admission(prompt: list[BaseMessage]) -> Admit:
+    """Admission of `prompt` to a model's provider rate limit (see `RATE_LIMITS`), settled with the reply's usage."""
+
+    @contextlib.asynccontextmanager
+    async def admit(model_id: str) -> AsyncIterator[Settle | None]:
+        provider = split_provider_model(model_id)[0]
+        if provider not in RATE_LIMITS.limits:
+            yield None
+            return
+        async with RATE_LIMITS.slot(provider, TOKENS.total(prompt) + OUTPUT_ALLOWANCE) as slot:
+
+            def settle(msg: BaseMessage) -> None:
+                counts = usage_counts(msg)
+                slot.settle(counts["input_tokens"] + counts["output_tokens"])
+
+            yield settle
+
+    return admit
+
+
+def _usage(model_id: str, node: str, msg: BaseMessage) -> dict[str, int]:
+    """Token usage of one call, also reported to the metrics sinks (under the model that served it)."""
+    counts = usage_counts(msg)
+    METRICS.record_usage(msg.response_metadata.get("fallback") or model_id, node, counts)
+    return counts
+
+def _history(state: State, budget: int) -> list[BaseMessage]:
+    """Return the running summary (if any) plus the windowed, not-yet-summarized history."""
+    recent = window_messages(unsummarized(state.messages, state.summary_through), budget)
+    return [summary_message(state.summary), *recent] if state.summary else recent
+
+# --- Long-term memory (Context.memory_k > 0; see react_agent.memory) ---
+def _memory_namespace() -> str | None:
+    """Memory is kept per `user_id` when the run config has one, else per thread (None without either)."""
     try:
-        global MAX_PHASE_FORGE_LOOPS
-        cap = int(getattr(runtime.context, "max_phase_forge", MAX_PHASE_FORGE_LOOPS))
-        MAX_PHASE_FORGE_LOOPS = cap if cap >= 0 else MAX_PHASE_FORGE_LOOPS
-    except Exception:
-        pass
+        conf = get_config().get("configurable") or {}
+    except RuntimeError:
+        return None
+    found = conf.get("user_id") or conf.get("thread_id")
+    return str(found) if found else None
 
+def _last_human_text(state: State) -> str:
+    last = next((m for m in reversed(state.messages) if isinstance(m, HumanMessage)), None)
+    return get_message_text(last) if last is not None else ""
+
+async def _with_memories(state: State, ctx: Context, history: list[BaseMessage]) -> list[BaseMessage]:
+    """Insert the stored turns most similar to the user's message (and not in `history`) after the summary."""
+    namespace = _memory_namespace()
+    if namespace is None:
+        return history
+    from react_agent.memory import MEMORY, memory_message
+
+    exclude = frozenset(str(m.id) for m in history if m.id)
+    try:
+        with METRICS.span("memory_recall"):
+            found = await asyncio.to_thread(
+                MEMORY.recall, namespace, _last_human_text(state), int(ctx.memory_k),
+                exclude=exclude, min_score=float(ctx.memory_min_score),
+            )
+    except Exception as e:
+        logger.warning("Memory recall failed: %s", e)
+        return history
+    if not found:
+        return history
+    at = 1 if state.summary else 0
+    return [*history[:at], SystemMessage(content=memory_message(found)), *history[at:]]
+
+async def _remember(state: State, answer: BaseMessage) -> None:
+    """Store the finished turn (user message + Phase's answer) in long-term memory."""
+    namespace = _memory_namespace()
+    if namespace is None or not answer.id:
+        return
+    from react_agent.memory import MEMORY
+
+    try:
+        with METRICS.span("memory_store"):
+            await asyncio.to_thread(MEMORY.remember, namespace, answer.id, _last_human_text(state), get_message_text(answer))
+    except Exception as e:
+        logger.warning("Could not store the turn in memory: %s", e)
+
+# --- Phase (streams tokens when Context.phase_streaming; records TTFT) ---
+async def phase(state: State, runtime: Runtime[Context]) -> dict[str, Any]:
+    """Bind delegation tools and produce the next AIMessage (single step)."""
     # soft reset on new human turn
     base_depth = state.depth
     base_pf = getattr(state, "c1_loops", 0)
+    turn_started = state.turn_started_at
+    new_turn = False
     try:
         last_msg = state.messages[-1] if state.messages else None
         if isinstance(last_msg, HumanMessage):
             base_depth = 0
             base_pf = 0
+            new_turn = True
+            turn_started = time.time()
     except Exception:
         pass
 
-    model_id = runtime.context.phase_model or runtime.context.model
-    model = load_chat_model(model_id).bind_tools(DELEGATION_TOOLS_PHASE)
+    ctx = runtime.context
+    streaming = bool(getattr(ctx, "phase_streaming", False))
+    model_id = ctx.phase_model or ctx.model
+    deadline = budget.turn_deadline(ctx, turn_started) if new_turn else state.turn_deadline
 
-    sys_msgs = _ls_messages_multi(
-        runtime.context.phase_prompt_id,
-        system_time=datetime.now(tz=UTC).isoformat(),
-        ai_name=getattr(runtime.context, "ai_name", "AI"),
-        ai_language=getattr(runtime.context, "ai_language", "English"),
-        ai_role=getattr(runtime.context, "ai_role", ""),
-    )
+    prompt, fingerprint = await _prompt(state, ctx, ctx.phase_prompt_id, int(ctx.phase_history_tokens))
+    tools: list[Any] | None = DELEGATION_TOOLS_PHASE
+    if budget.stage(ctx, deadline) is budget.Stage.ANSWER_NOW:
+        # out of time: no more delegation, answer from what the thread already has
+        budget.degraded("phase", budget.Stage.ANSWER_NOW)
+        tools = None
+        prompt = _with_system_note(prompt, ANSWER_NOW_NOTE)
+    update: dict[str, Any] = {}
+    if new_turn:
+        update.update(turn_started_at=turn_started, ttft_ms=None, turn_ms=None, turn_deadline=deadline)
+    call_started = time.time()
+    progress = StreamProgress() if streaming else None
+
+    def make_call(mid: str) -> Call:
+        model = get_chat_model(mid, streaming=streaming, tools=tools)
 
-    resp = await model.ainvoke([*sys_msgs, *state.messages])
+        async def call() -> BaseMessage:
+            if not streaming:
+                return await model.ainvoke(prompt)
+            msg, ttft = await astream_collect(model, prompt, progress)
+            if ttft is not None:
+                msg.response_metadata = {**msg.response_metadata, "ttft_ms": round(ttft, 1)}
+            return msg
+
+        return call
+
+    resp = await _invoke(
+        ctx, "phase", model_id, tools, prompt, make_call, fingerprint,
+        hedge=not streaming, deadline=budget.phase_deadline(ctx, deadline), progress=progress,
+    )
+    ttft = resp.response_metadata.get("ttft_ms")
+    if streaming and ttft is not None and resp.response_metadata.get("cache") != "hit":
+        if new_turn or state.ttft_ms is None:
+            update["ttft_ms"] = round((call_started - turn_started) * 1000 + ttft, 1)
     try:
         resp.name = "phase"
     except Exception:
         pass
+    if not getattr(resp, "tool_calls", None):
+        if int(ctx.memory_k) > 0:
+            resp.id = resp.id or str(uuid4())
+            await _remember(state, resp)
+        finished = time.time()
+        update["turn_ms"] = round((finished - turn_started) * 1000, 1)
+        METRICS.observe("turn_ms", update["turn_ms"])
+        if deadline and finished > deadline:
+            METRICS.inc("turn_budget_overruns_total", 1)
 
-    return {"messages": [resp], "depth": base_depth + 1, "c1_loops": base_pf}
+    return {
+        **update,
+        "messages": [resp],
+        "depth": base_depth + 1,
+        "c1_loops": base_pf,
+        "llm_calls": (0 if new_turn else state.llm_calls) + 1,
+        "usage": _usage(model_id, "phase", resp),
+    }
 
-# --- Forge (non-streaming; tools + optional synthesis + handoff) ---
+# --- Forge (never streamed to the user; tools + optional synthesis + handoff) ---
 async def forge(state: State, runtime: Runtime[Context]) -> dict[str, Any]:
     """Execute real tools. After tool results, synthesize and hand off to Phase."""
     last = state.messages[-1] if state.messages else None
+    ctx = runtime.context
+    stage = budget.stage(ctx, state.turn_deadline)
+    forge_by = budget.forge_deadline(ctx, state.turn_deadline)
 
     # post-tool synthesis path for real tools
     if isinstance(last, ToolMessage):
-        real_tool_names = {"search", "get_time"}
+        real_tool_names = {"search", "get_time", "research_parallel"}
         last_tool = (getattr(last, "name", "") or "").strip()
+        if last_tool in real_tool_names and getattr(ctx, "forge_handoff", "synthesize") == "direct":
+            return _direct_handoff(state)
+        if last_tool in real_tool_names and stage >= budget.Stage.DIRECT_HANDOFF:
+            budget.degraded("forge", stage)
+            return _direct_handoff(state)
         if last_tool in real_tool_names:
-            model_id = runtime.context.forge_model or runtime.context.model
-            summarizer = load_chat_model(model_id)
-            sys_msgs = _ls_messages_multi(
-                runtime.context.forge_prompt_id,
-                system_time=datetime.now(tz=UTC).isoformat(),
-                ai_name=getattr(runtime.context, "ai_name", "AI"),
-                ai_language=getattr(runtime.context, "ai_language", "English"),
-                ai_role=getattr(runtime.context, "ai_role", ""),
-            )
-            synth = await summarizer.ainvoke([*sys_msgs, *state.messages])
+            model_id = ctx.forge_model or ctx.model
+            prompt, fingerprint = await _prompt(state, ctx, ctx.forge_prompt_id, int(ctx.forge_history_tokens))
+            try:
+                synth = await _invoke(ctx, "forge", model_id, None, prompt, _ainvoke(prompt), fingerprint, deadline=forge_by)
+            except budget.DeadlineExceeded:
+                budget.degraded("forge", budget.Stage.ANSWER_NOW)
+                return _direct_handoff(state)
             content = get_message_text(synth) or ""
 
             handoff_msg = AIMessage(
@@ -130,29 +388,283 @@ async def forge(state: State, runtime: Runtime[Context]) -> dict[str, Any]:
                 tool_calls=[{"id": f"call_{uuid4().hex}", "name": "handoff_to_phase", "args": {}}],
                 additional_kwargs={"invisible": True, "handoff": True},
             )
-            return {"messages": [handoff_msg], "depth": state.depth + 1, "c1_loops": state.c1_loops}
+            return {
+                "messages": [handoff_msg],
+                "depth": state.depth + 1,
+                "c1_loops": state.c1_loops,
+                "llm_calls": state.llm_calls + 1,
+                "usage": _usage(model_id, "forge", synth),
+            }
 
     # normal forge
-    model_id = runtime.context.forge_model or runtime.context.model
-    model = load_chat_model(model_id).bind_tools(TOOLS)
-
-    sys_msgs = _ls_messages_multi(
-        runtime.context.forge_prompt_id,
-        system_time=datetime.now(tz=UTC).isoformat(),
-        ai_name=getattr(runtime.context, "ai_name", "AI"),
-        ai_language=getattr(runtime.context, "ai_language", "English"),
-        ai_role=getattr(runtime.context, "ai_role", ""),
-    )
+    model_id = ctx.forge_model or ctx.model
+
+    # fast path: the pre-router started this turn in Forge, so reset like Phase does
+    update: dict[str, Any] = {}
+    base_depth, base_pf, base_calls = state.depth, getattr(state, "c1_loops", 0), state.llm_calls
+    if isinstance(last, HumanMessage):
+        base_depth = base_pf = base_calls = 0
+        started = time.time()
+        deadline = budget.turn_deadline(ctx, started)
+        update.update(turn_started_at=started, ttft_ms=None, turn_ms=None, turn_deadline=deadline)
+        stage, forge_by = budget.Stage.FULL, budget.forge_deadline(ctx, deadline)
 
-    new_pf = getattr(state, "c1_loops", 0) + 1
-    resp = await model.ainvoke([*sys_msgs, *state.messages])
+    new_pf = base_pf + 1
+    forge_tools = [*TOOLS, *FANOUT_TOOLS] if int(ctx.forge_fanout) > 0 else TOOLS
+    if stage is budget.Stage.ANSWER_NOW:
+        budget.degraded("forge", stage)
+        return {**update, **_out_of_time(base_depth + 1, new_pf)}
+    prompt, fingerprint = await _prompt(state, ctx, ctx.forge_prompt_id, int(ctx.forge_history_tokens))
+    try:
+        resp = await _invoke(
+            ctx, "forge", model_id, forge_tools, prompt, _ainvoke(prompt, forge_tools), fingerprint, deadline=forge_by
+        )
+    except budget.DeadlineExceeded:
+        budget.degraded("forge", budget.Stage.ANSWER_NOW)
+        return {**update, **_out_of_time(base_depth + 1, new_pf)}
     try:
         resp.name = "forge"
         resp.additional_kwargs = {**getattr(resp, "additional_kwargs", {}), "invisible": True}
     except Exception:
         pass
 
-    return {"messages": [resp], "depth": state.depth + 1, "c1_loops": new_pf}
+    return {
+        **update,
+        "messages": [resp],
+        "depth": base_depth + 1,
+        "c1_loops": new_pf,
+        "llm_calls": base_calls + 1,
+        "usage": _usage(model_id, "forge", resp),
+    }
+
+# --- Forge fan-out: one `research` branch per sub-query, merged back into one tool result ---
+async def research(state: ResearchBranch, *, runtime: Runtime[Context]) -> dict[str, Any]:
+    """Work one sub-query: a Forge step with the real tools, then its tool calls, compacted.
+
+    The branch sees only its query, not the thread, so it runs in parallel
+    with its siblings and shares nothing with them but the turn's deadline.
+    """
+    ctx = runtime.context
+    model_id = ctx.forge_model or ctx.model
+    forge_by = budget.forge_deadline(ctx, state.turn_deadline)
+    result: dict[str, Any] = {"call_id": state.call_id, "index": state.index, "query": state.query}
+    sub = State(messages=[HumanMessage(content=state.query)])
+    prompt, fingerprint = await _prompt(sub, ctx, ctx.forge_prompt_id, int(ctx.forge_history_tokens))
+    try:
+        resp = await _invoke(ctx, "forge", model_id, TOOLS, prompt, _ainvoke(prompt, TOOLS), fingerprint, deadline=forge_by)
+    except budget.DeadlineExceeded:
+        budget.degraded("research", budget.Stage.ANSWER_NOW)
+        return {"research": [{**result, "text": "No result: out of time."}]}
+    calls = [dict(tc) for tc in getattr(resp, "tool_calls", None) or []]
+    if calls:
+        text = compact_tool_results(await run_tool_calls(_TOOLS_BY_NAME, calls, ctx, forge_by))
+    else:
+        text = get_message_text(resp)
+    return {
+        "research": [{**result, "text": text, "tools": [c["name"] for c in calls]}],
+        "usage": _usage(model_id, "forge", resp),
+    }
+
+def _fan_out(state: State, ctx: Context, msg: AIMessage) -> list[Send] | Literal["merge_research"]:
+    """One `research` branch per sub-query of the message's `research_parallel` calls, up to `forge_fanout`."""
+    cap = max(0, int(ctx.forge_fanout))
+    sends: list[Send] = []
+    for tc in _iter_tool_calls(msg):
+        if tc.get("name") != "research_parallel":
+            continue
+        for query in _queries(tc.get("args")):
+            if len(sends) >= cap:
+                break
+            sends.append(Send("research", ResearchBranch(query, str(tc.get("id") or ""), len(sends), state.turn_deadline)))
+    return sends or "merge_research"
+
+def _queries(args: Any) -> list[str]:
+    """Return the non-empty `queries` of a research_parallel call."""
+    if isinstance(args, str):
+        try:
+            args = json.loads(args)
+        except ValueError:
+            return []
+    raw = args.get("queries") if isinstance(args, dict) else None
+    return [str(q).strip() for q in raw or [] if str(q).strip()] if isinstance(raw, list) else []
+
+def merge_research(state: State, runtime: Runtime[Context]) -> dict[str, Any]:
+    """Answer Forge's fan-out message: each `research_parallel` call gets its branches' merged results.
+
+    Other tool calls on the same message are answered as not run, so the
+    message stays valid; the research results come last, which sends Forge
+    down its post-tool path (synthesis or direct handoff).
+    """
+    last = state.messages[-1]
+    branches = sorted(state.research, key=lambda b: int(b.get("index", 0)))
+    others: list[ToolMessage] = []
+    merged: list[ToolMessage] = []
+    for tc in _iter_tool_calls(last) if isinstance(last, AIMessage) else ():
+        call_id, name = str(tc.get("id") or ""), str(tc.get("name") or "")
+        if name != "research_parallel":
+            others.append(ToolMessage(content=f"Not run: call '{name}' on its own or inside a sub-query.", name=name,
+                                      tool_call_id=call_id, status="error"))
+            continue
+        mine = [b for b in branches if b.get("call_id") == call_id]
+        text = merge_branches(mine)
+        dropped = len(_queries(tc.get("args"))) - len(mine)
+        if dropped > 0:
+            cap = int(runtime.context.forge_fanout)
+            text += f"\n\n({dropped} more sub-queries were not researched; at most {cap} run in parallel.)"
+        merged.append(ToolMessage(content=text, name="research_parallel", tool_call_id=call_id))
+    return {
+        "messages": [*others, *merged],
+        "research": [],
+        "llm_calls": state.llm_calls + len(branches),
+    }
+
+def _out_of_time(depth: int, loops: int) -> dict[str, Any]:
+    """Forge's reply once the turn budget leaves it no time: hand back to Phase without a call."""
+    msg = AIMessage(content=FORGE_OUT_OF_TIME, name="forge", additional_kwargs={"invisible": True, "budget": "spent"})
+    return {"messages": [msg], "depth": depth, "c1_loops": loops}
+
+def _direct_handoff(state: State) -> dict[str, Any]:
+    """Hand compacted tool results to Phase without a synthesis call.
+
+    The handoff tool call is answered in the same update, so the turn goes
+    straight to Phase and skips `delegation_tools_forge` as well.
+    """
+    call_id = f"call_{uuid4().hex}"
+    handoff_msg = AIMessage(
+        content=compact_tool_results(last_tool_batch(state.messages)),
+        name="forge",
+        tool_calls=[{"id": call_id, "name": "handoff_to_phase", "args": {}}],
+        additional_kwargs={"invisible": True, "handoff": True, "compacted": True},
+    )
+    done = ToolMessage(content="ok", name="handoff_to_phase", tool_call_id=call_id)
+    return {"messages": [handoff_msg, done], "depth": state.depth + 1, "c1_loops": state.c1_loops}
+
+# --- Rolling summary (folded in the background; applied at the start of the next turn) ---
+SUMMARY_TIMEOUT = 120.0  # seconds; a hung fold would hold up the thread's later ones
+
+
+def _summary_key(state: State) -> str | None:
+    """Thread a background fold belongs to: the run's `thread_id`, else the thread's first message id."""
+    try:
+        thread_id = (get_config().get("configurable") or {}).get("thread_id")
+    except RuntimeError:
+        thread_id = None
+    if thread_id:
+        return f"thread:{thread_id}"
+    first = state.messages[0].id if state.messages else None
+    return f"first:{first}" if first else None
+
+
+async def summarize(state: State, runtime: Runtime[Context]) -> dict[str, Any]:
+    """Apply the fold the previous turn started, and start the next one in the background.
+
+    Never waits on a model: the turn goes on at once, and the refreshed
+    summary is used from the thread's next turn on. A fold finished by
+    another worker comes from the graph's store; one that may still be
+    running there (pending for less than SUMMARY_TIMEOUT) is not started again.
+    """
+    ctx = runtime.context
+    key = _summary_key(state)
+    if key is None or int(ctx.summary_trigger_tokens) <= 0:
+        return {}
+    store = runtime.store
+    update = SUMMARY_JOBS.take(key, state.summary_through)
+    pending = state.summary_pending
+    if pending and store is not None:
+        claimed = await claim_fold(store, key, state.summary_through)
+        if claimed is not None:
+            update, pending = claimed or update, {}
+    if update and not any(m.id == update["summary_through"] for m in state.messages):
+        update = {}
+    if store is None or time.time() - float(pending.get("started_at", 0)) > SUMMARY_TIMEOUT:
+        pending = {}  # nothing can arrive from another worker, or the one running it is gone
+    if SUMMARY_JOBS.running(key) or pending:
+        return update
+    folded = State(
+        messages=state.messages,
+        summary=update.get("summary", state.summary),
+        summary_through=update.get("summary_through", state.summary_through),
+        summary_meta=update.get("summary_meta", state.summary_meta),
+    )
+    if plan_fold(
+        folded.messages,
+        folded.summary_through,
+        trigger_tokens=int(ctx.summary_trigger_tokens),
+        keep_turns=int(ctx.summary_keep_turns),
+    ):
+        SUMMARY_JOBS.start(key, folded.summary_through, _fold_and_publish(folded, ctx, store, key))
+        return {**update, "summary_pending": {"base": folded.summary_through, "started_at": time.time()}}
+    return {**update, "summary_pending": {}} if state.summary_pending else update
+
+
+async def _fold_and_publish(state: State, ctx: Context, store: BaseStore | None, key: str) -> dict[str, Any]:
+    """Run `fold_summary`, also leaving the result in `store` for the other workers."""
+    update = await fold_summary(state, ctx)
+    if store is not None:  # also when the fold failed, so the next turn need not wait for it
+        try:
+            await publish_fold(store, key, state.summary_through, update)
+        except Exception as e:
+            logger.warning("Could not publish the rolling summary: %s", e)
+    return update
+
+
+async def fold_summary(state: State, ctx: Context) -> dict[str, Any]:
+    """Fold the oldest unsummarized turns into the running summary; return the state update (`{}` if none)."""
+    fold = plan_fold(
+        state.messages,
+        state.summary_through,
+        trigger_tokens=int(ctx.summary_trigger_tokens),
+        keep_turns=int(ctx.summary_keep_turns),
+    )
+    through = next((m.id for m in reversed(fold) if is_visible(m)), None)
+    if not through:
+        return {}
+    model_id = ctx.summary_model or ctx.model
+    model = get_chat_model(model_id).with_config(tags=[TAG_NOSTREAM])
+    prompt: list[BaseMessage] = [HumanMessage(content=SUMMARY_PROMPT.format(summary=state.summary or "(none yet)", transcript=transcript(fold)))]
+    try:
+        async with asyncio.timeout(SUMMARY_TIMEOUT):
+            resp = await admitted(lambda: model.ainvoke(prompt), _admission(prompt), model_id)()
+    except Exception as e:
+        logger.warning("Rolling summary failed; keeping the previous one: %s", e)
+        return {}
+    _usage(model_id, "summarize", resp)
+    summary = get_message_text(resp)
+    folded_tokens = TOKENS.total(fold)
+    summary_tokens = TOKENS.text(summary)
+    return {
+        "summary": summary,
+        "summary_through": through,
+        "summary_meta": {
+            "updated_at": datetime.now(tz=UTC).isoformat(),
+            "folded_messages": len(fold) + int(state.summary_meta.get("folded_messages", 0)),
+            "summary_tokens": summary_tokens,
+            "tokens_saved": max(0, folded_tokens + TOKENS.text(state.summary) - summary_tokens),
+        },
+    }
+
+# --- End-of-turn compaction (keeps checkpoints small) ---
+def compact_turn(state: State, runtime: Runtime[Context]) -> dict[str, Any]:
+    """Replace the finished turn's internal Phase↔Forge traffic with a digest.
+
+    The digest goes into the final Phase message's `additional_kwargs["turn"]`.
+    In `archive` mode the removed messages are also kept in the payload store
+    under `digest["ref"]`.
+    """
+    internal = turn_internals(state.messages)
+    if not internal:
+        return {}
+    digest = turn_digest(internal)
+    if getattr(runtime.context, "turn_compaction", "off") == "archive":
+        ref = f"turn:{uuid4().hex}"
+        try:
+            PAYLOAD_STORE.set(ref, messages_to_dict(internal), PAYLOAD_TTL)
+            digest["ref"] = ref
+        except Exception as e:
+            logger.warning("Could not archive turn internals: %s", e)
+    final = state.messages[-1]
+    kept = final.model_copy(update={"additional_kwargs": {**final.additional_kwargs, "turn": digest}})
+    return {"messages": [*(RemoveMessage(id=str(m.id)) for m in internal), kept]}
 
 # --- Tool-call inspection (unchanged helpers) ---
 def _iter_tool_call_names(msg: AIMessage) -> Iterable[str]:
@@ -207,30 +719,56 @@ def resolve_pending(state: State) -> dict[str, Any]:
             tc_id = tc.get("id") or ""
             name = tc.get("name") or "unknown_tool"
             tool_msgs.append(ToolMessage(tool_call_id=str(tc_id),
-                                         content=f"Skipped '{name}' due to limit reached (depth or loop cap)."))
+                                         content=f"Skipped '{name}' due to limit reached (depth, loop cap or time budget)."))
     return {"messages": tool_msgs, "depth": state.depth}
 
 # --- Routing ---
-def route_phase(state: State) -> Literal["__end__", "delegation_tools_phase", "resolve_pending"]:
-    """Decide next step after Phase."""
-    if state.depth >= MAX_DEPTH:
+def route_start(state: State, runtime: Runtime[Context]) -> Literal["phase", "forge"]:
+    """Start the turn in Forge when the pre-router is on and confident; otherwise in Phase."""
+    ctx = runtime.context
+    if getattr(ctx, "prerouter", "off") != "rules":
+        return "phase"
+    last = state.messages[-1] if state.messages else None
+    if not isinstance(last, HumanMessage):
+        return "phase"
+    decision = classify_turn(get_message_text(last))
+    if decision.target == "forge" and decision.confidence >= float(ctx.prerouter_threshold):
+        logger.debug("Pre-router: forge (%.2f, %s)", decision.confidence, ", ".join(decision.reasons))
+        return "forge"
+    return "phase"
+
+def _end(ctx: Context) -> Literal["__end__", "compact_turn"]:
+    """End the turn, through `compact_turn` when turn compaction is on."""
+    return "compact_turn" if getattr(ctx, "turn_compaction", "off") in {"digest", "archive"} else "__end__"
+
+def route_phase(
+    state: State, runtime: Runtime[Context]
+) -> Literal["__end__", "compact_turn", "delegation_tools_phase", "resolve_pending"]:
+    """Decide next step after Phase (limits come from this run's context)."""
+    max_depth, max_loops = _limits(runtime.context)
+    if state.depth >= max_depth:
         last = state.messages[-1]
         if isinstance(last, AIMessage) and getattr(last, "tool_calls", None):
             return "resolve_pending"
-        return "__end__"
-    if getattr(state, "c1_loops", 0) >= MAX_PHASE_FORGE_LOOPS:
+        return _end(runtime.context)
+    if getattr(state, "c1_loops", 0) >= max_loops:
         last = state.messages[-1]
         if isinstance(last, AIMessage) and getattr(last, "tool_calls", None):
             return "resolve_pending"
-        return "__end__"
+        return _end(runtime.context)
     last = state.messages[-1]
     if isinstance(last, AIMessage) and _get_tool_call(last, "delegate_phase_to_forge"):
+        if budget.stage(runtime.context, state.turn_deadline) is budget.Stage.ANSWER_NOW:
+            return "resolve_pending"
         return "delegation_tools_phase"
-    return "__end__"
+    return _end(runtime.context)
 
-def route_forge(state: State) -> Literal["tools", "delegation_tools_forge", "phase", "resolve_pending"]:
-    """Decide next step after Forge."""
-    if state.depth >= MAX_DEPTH:
+def route_forge(
+    state: State, runtime: Runtime[Context]
+) -> Literal["tools", "delegation_tools_forge", "phase", "resolve_pending", "merge_research"] | list[Send]:
+    """Decide next step after Forge (limits come from this run's context); fans out on `research_parallel`."""
+    max_depth, _ = _limits(runtime.context)
+    if state.depth >= max_depth:
         last = state.messages[-1]
         if isinstance(last, AIMessage) and getattr(last, "tool_calls", None):
             return "resolve_pending"
@@ -240,24 +778,59 @@ def route_forge(state: State) -> Literal["tools", "delegation_tools_forge", "pha
         if getattr(last, "tool_calls", None):
             if _get_tool_call(last, "handoff_to_phase"):
                 return "delegation_tools_forge"
+            if budget.stage(runtime.context, state.turn_deadline) is budget.Stage.ANSWER_NOW:
+                return "resolve_pending"
+            if _get_tool_call(last, "research_parallel"):
+                return _fan_out(state, runtime.context, last)
             return "tools"
     return "phase"
 
 # --- Build Graph ---
 builder = StateGraph(State, input_schema=InputState, context_schema=Context)
-builder.add_node("phase", phase)
-builder.add_node("forge", forge)
-builder.add_node("tools", ToolNode(TOOLS))
+builder.add_node("phase", timed_node("phase", phase))
+builder.add_node("forge", timed_node("forge", forge))
+builder.add_node("tools", timed_node("tools", tool_executor(TOOLS)))
 builder.add_node("delegation_tools_phase", ToolNode(DELEGATION_TOOLS_PHASE))
 builder.add_node("delegation_tools_forge", ToolNode(DELEGATION_TOOLS_FORGE))
-builder.add_node("resolve_pending", resolve_pending)
+builder.add_node("resolve_pending", timed_node("resolve_pending", resolve_pending))
+builder.add_node("summarize", timed_node("summarize", summarize))
+builder.add_node("compact_turn", timed_node("compact_turn", compact_turn))
+builder.add_node("research", timed_node("research", research), input_schema=ResearchBranch)
+builder.add_node("merge_research", timed_node("merge_research", merge_research))
 
-builder.add_edge("__start__", "phase")
+builder.add_edge("__start__", "summarize")
+builder.add_conditional_edges("summarize", route_start)
 builder.add_conditional_edges("phase", route_phase)
-builder.add_conditional_edges("forge", route_forge)
+builder.add_conditional_edges(
+    "forge", route_forge, ["tools", "delegation_tools_forge", "phase", "resolve_pending", "research", "merge_research"]
+)
 builder.add_edge("delegation_tools_phase", "forge")
 builder.add_edge("delegation_tools_forge", "phase")
 builder.add_edge("resolve_pending", "phase")
 builder.add_edge("tools", "forge")
+builder.add_edge("research", "merge_research")
+builder.add_edge("merge_research", "forge")
+builder.add_edge("compact_turn", "__end__")
+
+
+GRAPH_NAME = "KSODI-Light—PhaseForge"
+
+
+@functools.cache
+def compiled_graph() -> CompiledStateGraph[State, Context, InputState, Any]:
+    """Compile the deployment graph once, on first use (or in `warmup.warm_up`)."""
+    return builder.compile(name=GRAPH_NAME)
+
+def __getattr__(name: str) -> Any:
+    """Resolve `graph`, the langgraph.json entry point, lazily so importing the module stays cheap.
+
+    A process that loads the graph this way (the LangGraph server) gets the
+    rest of its warm-up in the background (see `warmup.warm_up_in_background`).
+    """
+    if name == "graph":
+        from react_agent.warmup import warm_up_in_background
 
-graph = builder.compile(name="KSODI-Light—PhaseForge")
+        graph = compiled_graph()
+        warm_up_in_background()
+        return graph
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
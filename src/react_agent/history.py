@@ -0,0 +1,166 @@
+# SPDX-License-Identifier: MIT
+"""Token-budgeted history windowing for model calls.
+
+The system bundle is assembled separately; this module only decides which part
+of `State.messages` goes to the model. Tool calls and their results are kept
+or dropped together, oversized older tool payloads are elided first, then the
+oldest turns are dropped whole. Token counts are cached per message id,
+so a turn only counts the messages it has not seen before.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from react_agent.utils import get_message_text
+
+# Per-message framing overhead (role, separators), as in OpenAI's accounting.
+MESSAGE_OVERHEAD = 4
+
+ELIDED_MARKER = "…[elided to fit the context budget]"
+
+
+def _load_encoder() -> Callable[[str], int]:
+    try:
+        import tiktoken
+
+        enc = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(enc.encode(text, disallowed_special=()))
+    except Exception:
+        return lambda text: (len(text) + 3) // 4
+
+
+class TokenCounter:
+    """Count message tokens with a bounded per-message-id cache."""
+
+    def __init__(self, encoder: Callable[[str], int] | None = None, maxsize: int = 100_000) -> None:
+        """Use `encoder` (text → tokens) or a lazily loaded tiktoken encoding."""
+        self._encoder = encoder
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def text(self, text: str) -> int:
+        """Count tokens in a plain string."""
+        if self._encoder is None:
+            self._encoder = _load_encoder()
+        return self._encoder(text)
+
+    def _measure(self, msg: BaseMessage) -> int:
+        n = MESSAGE_OVERHEAD + self.text(get_message_text(msg))
+        for tc in getattr(msg, "tool_calls", None) or []:
+            n += self.text(str(tc.get("name") or "")) + self.text(json.dumps(tc.get("args") or {}))
+        return n
+
+    def count(self, msg: BaseMessage) -> int:
+        """Token count of one message; cached when the message has an id."""
+        key = msg.id
+        if key is None:
+            return self._measure(msg)
+        with self._lock:
+            n = self._cache.get(key)
+            if n is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return n
+        n = self._measure(msg)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = n
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return n
+
+    def total(self, messages: Sequence[BaseMessage]) -> int:
+        """Sum of `count` over `messages`."""
+        return sum(self.count(m) for m in messages)
+
+
+TOKENS = TokenCounter()
+
+
+def group_units(messages: Sequence[BaseMessage]) -> list[list[BaseMessage]]:
+    """Split history into atomic units: an AIMessage with tool calls plus its ToolMessages."""
+    units: list[list[BaseMessage]] = []
+    open_ids: set[str] = set()
+    for m in messages:
+        if isinstance(m, ToolMessage) and units and m.tool_call_id in open_ids:
+            units[-1].append(m)
+            open_ids.discard(m.tool_call_id)
+            continue
+        units.append([m])
+        open_ids = {str(tc.get("id")) for tc in m.tool_calls} if isinstance(m, AIMessage) and m.tool_calls else set()
+    return units
+
+
+def _elide(msg: ToolMessage, tokens: int, limit: int) -> ToolMessage:
+    text = get_message_text(msg)
+    keep = int(len(text) * limit / max(1, tokens))  # proportional cut on characters
+    # distinct id: the copy only goes to the model and must not alias the cached count
+    return msg.model_copy(update={"content": text[:keep] + ELIDED_MARKER, "id": f"{msg.id}:elided"})
+
+
+def window_messages(
+    messages: Sequence[BaseMessage],
+    budget: int,
+    *,
+    counter: TokenCounter | None = None,
+) -> list[BaseMessage]:
+    """Return the most recent history that fits `budget` tokens (0 disables windowing).
+
+    Tool results of earlier turns larger than a quarter of the budget are
+    elided first.
+    Then whole turns (a HumanMessage and everything after it) are dropped from
+    the front. The latest turn is always kept; if it alone is over budget, its
+    HumanMessage plus as many of its newest units as fit are kept.
+    """
+    if budget <= 0:
+        return list(messages)
+    counter = counter or TOKENS
+    units = group_units(messages)
+    costs = [sum(counter.count(m) for m in u) for u in units]
+    if sum(costs) <= budget:
+        return list(messages)
+
+    # turn boundaries (indices into units)
+    starts = [i for i, u in enumerate(units) if isinstance(u[0], HumanMessage)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    bounds = list(zip(starts, [*starts[1:], len(units)]))
+
+    payload_cap = max(1, budget // 4)
+    for i, unit in enumerate(units[: bounds[-1][0]]):
+        for j, m in enumerate(unit):
+            n = counter.count(m)
+            if isinstance(m, ToolMessage) and n > payload_cap:
+                short = _elide(m, n, payload_cap)
+                costs[i] += counter.text(get_message_text(short)) + MESSAGE_OVERHEAD - n
+                unit[j] = short
+
+    first, total = len(units), 0
+    for lo, hi in reversed(bounds):
+        cost = sum(costs[lo:hi])
+        if first < len(units) and total + cost > budget:
+            break
+        first, total = lo, total + cost
+    if total <= budget or first != bounds[-1][0]:
+        return [m for u in units[first:] for m in u]
+
+    # the latest turn alone is over budget: keep its opener and newest units
+    lo, hi = bounds[-1]
+    head = [lo] if isinstance(units[lo][0], HumanMessage) else []
+    total = sum(costs[i] for i in head)
+    tail: list[int] = []
+    for i in range(hi - 1, lo + len(head) - 1, -1):
+        if tail and total + costs[i] > budget:
+            break
+        tail.append(i)
+        total += costs[i]
+    return [m for i in [*head, *reversed(tail)] for m in units[i]]
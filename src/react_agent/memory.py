@@ -0,0 +1,256 @@
+# SPDX-License-Identifier: MIT
+"""Long-term memory: finished turns in a local vector index, recalled into prompts.
+
+With `Context.memory_k > 0`, Phase's final answer is stored together with the
+user message that asked for it, and every Phase/Forge prompt gets the `memory_k`
+most similar earlier turns that have left the history window (a system
+message after the running summary). The recent window stays bounded by
+`phase_history_tokens` / `forge_history_tokens`, so older context comes back
+by relevance instead of by sending the whole thread.
+
+- `Embedder`: texts → unit vectors. `HashingEmbedder` (the default) hashes
+  word unigrams and bigrams into a fixed number of signed buckets: local,
+  deterministic, no model download. Swap it with
+  `MEMORY_EMBEDDER=package.module:factory` (a callable returning an Embedder)
+  or `MEMORY_EMBEDDER=hashing:<dim>`.
+- `VectorIndex`: one directory per namespace with `vectors.f32` (float32 rows,
+  appended in place and memory-mapped for search) and `turns.jsonl` (the text
+  per row). Only the row offsets into `turns.jsonl` are held in memory.
+  Appends hold an exclusive file lock (`.lock`), so several processes (gateway
+  or batch workers) can share a directory; each picks up the others' rows
+  before it searches.
+- `MemoryStore`: namespaces (the run's `user_id`, else its `thread_id`) →
+  indexes under `MEMORY_DIR` (default `.cache/memory`), with a bounded set of
+  open ones.
+
+Needs numpy (`pip install "react-agent[memory]"`); the module is only
+imported once memory is switched on.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Protocol, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from react_agent.utils import file_lock
+
+Vectors = npt.NDArray[np.float32]
+
+DEFAULT_DIM = 256
+TURN_CHARS = 2000  # stored text per turn
+_WORD = re.compile(r"\w+")
+
+
+class Embedder(Protocol):
+    """Maps texts to L2-normalized vectors of a fixed dimension."""
+
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> Vectors:
+        """Return one row per text, shape (len(texts), dim)."""
+        ...
+
+
+class HashingEmbedder:
+    """Feature-hashing embedder over lower-cased word unigrams and bigrams."""
+
+    def __init__(self, dim: int = DEFAULT_DIM) -> None:
+        """Hash into `dim` signed buckets."""
+        self.dim = dim
+
+    def embed(self, texts: Sequence[str]) -> Vectors:
+        """Return the normalized bucket counts of each text."""
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _WORD.findall(text.casefold())
+            features = [*words, *(f"{a} {b}" for a, b in zip(words, words[1:]))]
+            if not features:
+                continue
+            hashes = np.fromiter((zlib.crc32(f.encode()) for f in features), dtype=np.uint32, count=len(features))
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(out[row], (hashes % self.dim).astype(np.intp), signs)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+
+def load_embedder(spec: str) -> Embedder:
+    """Build the embedder named by `spec`: "hashing[:dim]" or "package.module:factory"."""
+    name, _, arg = spec.partition(":")
+    if name in ("", "hashing"):
+        return HashingEmbedder(int(arg) if arg else DEFAULT_DIM)
+    factory = getattr(importlib.import_module(name), arg)
+    embedder: Embedder = factory()
+    return embedder
+
+
+@dataclass(frozen=True)
+class Memory:
+    """One recalled turn."""
+
+    id: str
+    text: str
+    score: float
+
+
+class VectorIndex:
+    """Append-only float32 vector rows plus their turn records, searched by cosine similarity."""
+
+    def __init__(self, path: Path, dim: int) -> None:
+        """Open (or create) the index in directory `path`; a torn last append is dropped."""
+        path.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self._vectors = path / "vectors.f32"
+        self._turns = path / "turns.jsonl"
+        self._file_lock = path / ".lock"
+        self._row_bytes = dim * np.dtype(np.float32).itemsize
+        self._lock = threading.Lock()
+        self._map: np.memmap[Any, np.dtype[np.float32]] | None = None
+        self._offsets = array("q")
+        self._end = 0  # bytes of turns.jsonl covered by _offsets
+        with self._lock, file_lock(self._file_lock):
+            self._load()
+
+    def _load(self) -> None:
+        self._vectors.touch()
+        self._turns.touch()
+        self._sync()
+        with self._vectors.open("r+b") as f:
+            f.truncate(len(self._offsets) * self._row_bytes)
+        with self._turns.open("r+b") as f:
+            f.truncate(self._end)
+
+    def _sync(self) -> None:
+        """Pick up rows appended since the last sync (by any process); hold both locks."""
+        if self._turns.stat().st_size == self._end:
+            return
+        rows = self._vectors.stat().st_size // self._row_bytes
+        with self._turns.open("rb") as f:
+            f.seek(self._end)
+            for line in f:
+                if not line.endswith(b"\n") or len(self._offsets) >= rows:
+                    break
+                self._offsets.append(self._end)
+                self._end += len(line)
+
+    def _read_line(self, offset: int) -> bytes:
+        with self._turns.open("rb") as f:
+            f.seek(offset)
+            return f.readline()
+
+    def __len__(self) -> int:
+        """Return the number of stored rows."""
+        return len(self._offsets)
+
+    def add(self, vectors: Vectors, records: Sequence[dict[str, Any]]) -> None:
+        """Append rows and their records (each record needs an `id` and a `text`)."""
+        if len(vectors) != len(records) or (len(vectors) and vectors.shape[1] != self.dim):
+            raise ValueError(f"expected {len(records)} vectors of dimension {self.dim}")
+        lines = [(json.dumps(r, ensure_ascii=False) + "\n").encode() for r in records]
+        with self._lock, file_lock(self._file_lock):
+            self._sync()
+            with self._vectors.open("ab") as f:
+                f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            with self._turns.open("ab") as f:
+                f.write(b"".join(lines))
+            for line in lines:
+                self._offsets.append(self._end)
+                self._end += len(line)
+
+    def _mapped(self, rows: int) -> Vectors:
+        if self._map is None or self._map.shape[0] < rows:
+            self._map = np.memmap(self._vectors, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return self._map[:rows]
+
+    def scores(self, query: Vectors) -> Vectors:
+        """Return the cosine similarity of every row to the normalized `query`."""
+        with self._lock:
+            if self._turns.stat().st_size != self._end:
+                with file_lock(self._file_lock):
+                    self._sync()
+            rows = len(self._offsets)
+            if not rows:
+                return np.empty(0, dtype=np.float32)
+            mapped = self._mapped(rows)
+        scores: Vectors = mapped @ query
+        return scores
+
+    def search(self, query: Vectors, k: int, *, exclude: frozenset[str] = frozenset(), min_score: float = -1.0) -> list[Memory]:
+        """Return up to `k` best rows scoring at least `min_score`, skipping record ids in `exclude`."""
+        scores = self.scores(query)
+        if k <= 0 or not len(scores):
+            return []
+        take = min(len(scores), k + len(exclude))
+        best = np.argpartition(-scores, take - 1)[:take]
+        found: list[Memory] = []
+        for row in best[np.argsort(-scores[best], kind="stable")]:
+            score = float(scores[row])
+            if score < min_score:
+                break
+            record = json.loads(self._read_line(self._offsets[int(row)]))
+            if record.get("id") in exclude:
+                continue
+            found.append(Memory(str(record.get("id")), str(record.get("text", "")), round(score, 4)))
+            if len(found) == k:
+                break
+        return found
+
+
+class MemoryStore:
+    """Per-namespace vector indexes under one directory."""
+
+    def __init__(self, root: Path, embedder: Embedder, max_open: int = 64) -> None:
+        """Keep indexes under `root`; at most `max_open` stay open."""
+        self.root, self.embedder, self.max_open = root, embedder, max_open
+        self._open: OrderedDict[str, VectorIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def index(self, namespace: str) -> VectorIndex:
+        """Return the (cached) index of `namespace`."""
+        with self._lock:
+            found = self._open.get(namespace)
+            if found is None:
+                path = self.root / hashlib.sha1(namespace.encode()).hexdigest()[:24]
+                found = self._open[namespace] = VectorIndex(path, self.embedder.dim)
+                while len(self._open) > self.max_open:
+                    self._open.popitem(last=False)
+            self._open.move_to_end(namespace)
+            return found
+
+    def remember(self, namespace: str, turn_id: str, user: str, answer: str) -> None:
+        """Embed one finished turn and append it to the namespace's index."""
+        text = f"User: {user}\nAssistant: {answer}"[:TURN_CHARS]
+        record = {"id": turn_id, "text": text, "at": round(time.time(), 3)}
+        self.index(namespace).add(self.embedder.embed([text]), [record])
+
+    def recall(
+        self, namespace: str, query: str, k: int, *, exclude: frozenset[str] = frozenset(), min_score: float = 0.0
+    ) -> list[Memory]:
+        """Return the `k` stored turns of `namespace` most similar to `query`."""
+        if k <= 0 or not query.strip():
+            return []
+        vector = self.embedder.embed([query])[0]
+        return self.index(namespace).search(vector, k, exclude=exclude, min_score=min_score)
+
+
+def memory_message(memories: Sequence[Memory]) -> str:
+    """Render recalled turns for the prompt, best first."""
+    blocks = "\n\n".join(m.text for m in memories)
+    return f"Relevant earlier turns of this conversation (most relevant first):\n\n{blocks}"
+
+
+MEMORY = MemoryStore(Path(os.getenv("MEMORY_DIR", ".cache/memory")), load_embedder(os.getenv("MEMORY_EMBEDDER", "hashing")))
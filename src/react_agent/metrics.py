@@ -0,0 +1,379 @@
+# SPDX-License-Identifier: MIT
+"""Latency, token and cost instrumentation.
+
+Graph nodes, prompt-bundle loads and tool calls report timing spans; model
+calls report token usage (cached tokens included) and an estimated cost.
+Everything is aggregated in-process into counters and histograms and handed
+to pluggable sinks:
+
+- `log`: one log line per observation (logger `react_agent.metrics`).
+- `prometheus`: text exposition via `METRICS.render_prometheus()`, served on
+  `http://127.0.0.1:$METRICS_PORT/metrics` when that variable is set. The
+  exporter is started by `start_exporter()` from the long-running entry
+  points (`react-agent serve`, `react-agent batch`) in the parent process,
+  and otherwise on the first observation (the LangGraph server loading
+  `langgraph.json`); never at import, and never in batch pool workers.
+- `otel`: OpenTelemetry instruments (needs `opentelemetry-api`).
+
+Select sinks with `METRICS=log,prometheus` (default `off`). When off, spans
+are a shared no-op and observations return immediately.
+"""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import importlib
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import TracebackType
+from typing import Any, Callable, Mapping, Protocol, TypeVar, cast
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in milliseconds (Prometheus `le`), +Inf implied.
+BUCKETS_MS: tuple[float, ...] = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+# Estimated USD per 1M tokens: (input, cached input, output). Override with MODEL_PRICES_JSON.
+MODEL_PRICES: dict[str, tuple[float, float, float]] = {
+    "openai/gpt-4o-2024-05-13": (5.0, 5.0, 15.0),
+    "openai/gpt-4o": (2.5, 1.25, 10.0),
+    "openai/gpt-4o-mini": (0.15, 0.075, 0.6),
+    "openai/gpt-5": (1.25, 0.125, 10.0),
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: Mapping[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)."""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS_MS) -> None:
+        """Create an empty histogram over `buckets` (upper bounds)."""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add one observation."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile (upper bound of the bucket holding it)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+class Sink(Protocol):
+    """Receives every observation: `kind` is "histogram" or "counter"."""
+
+    def emit(self, kind: str, name: str, value: float, labels: Labels) -> None:
+        """Export one observation."""
+        ...
+
+
+class LogSink:
+    """Log each observation at INFO."""
+
+    def emit(self, kind: str, name: str, value: float, labels: Labels) -> None:
+        """Write one log line."""
+        logger.info("%s %s=%.3f %s", kind, name, value, " ".join(f"{k}={v}" for k, v in labels))
+
+
+class PrometheusSink:
+    """Start the exporter on the first observation of a process no entry point started it in."""
+
+    def __init__(self) -> None:
+        """Start pending."""
+        self.pending = True
+
+    def emit(self, kind: str, name: str, value: float, labels: Labels) -> None:
+        """Start the exporter once; observations themselves are aggregated by `Metrics`."""
+        if self.pending:
+            self.pending = False
+            if _LAZY_EXPORTER:
+                start_exporter()
+
+
+class OTelSink:
+    """Forward observations to OpenTelemetry histograms and counters."""
+
+    def __init__(self) -> None:
+        """Create a meter; raises ImportError without `opentelemetry-api`."""
+        otel_metrics = importlib.import_module("opentelemetry.metrics")
+        self._meter = otel_metrics.get_meter("react_agent")
+        self._instruments: dict[tuple[str, str], Any] = {}
+
+    def emit(self, kind: str, name: str, value: float, labels: Labels) -> None:
+        """Record on the matching instrument."""
+        inst = self._instruments.get((kind, name))
+        if inst is None:
+            make = self._meter.create_histogram if kind == "histogram" else self._meter.create_counter
+            inst = self._instruments[(kind, name)] = make(name)
+        (inst.record if kind == "histogram" else inst.add)(value, attributes=dict(labels))
+
+
+class _NoopSpan:
+    def __enter__(self) -> _NoopSpan:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    """Times a block and records `<name>_ms` with its labels (plus `status`)."""
+
+    __slots__ = ("metrics", "name", "labels", "started")
+
+    def __init__(self, metrics: Metrics, name: str, labels: dict[str, Any]) -> None:
+        """Prepare a span; timing starts on enter."""
+        self.metrics, self.name, self.labels, self.started = metrics, name, labels, 0.0
+
+    def __enter__(self) -> Span:
+        """Start timing."""
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None
+    ) -> None:
+        """Stop timing and record."""
+        ms = (time.perf_counter() - self.started) * 1000
+        self.metrics.observe(f"{self.name}_ms", ms, status="error" if exc_type else "ok", **self.labels)
+
+
+class Metrics:
+    """Process-wide metric registry; disabled (no-op) when it has no sinks."""
+
+    def __init__(self, sinks: list[Sink] | None = None) -> None:
+        """Aggregate locally and export to `sinks`."""
+        self.sinks: list[Sink] = list(sinks or [])
+        self.enabled = bool(self.sinks)
+        self.prices = dict(MODEL_PRICES)
+        self._histograms: dict[tuple[str, Labels], Histogram] = {}
+        self._counters: dict[tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **labels: Any) -> Span | _NoopSpan:
+        """Time a `with` block as `<name>_ms`."""
+        return Span(self, name, labels) if self.enabled else _NOOP
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Add `value` to the histogram `name`."""
+        if not self.enabled:
+            return
+        key = _labels(labels)
+        with self._lock:
+            hist = self._histograms.get((name, key))
+            if hist is None:
+                hist = self._histograms[(name, key)] = Histogram()
+            hist.observe(value)
+        self._emit("histogram", name, value, key)
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        """Add `value` to the counter `name`."""
+        if not self.enabled:
+            return
+        key = _labels(labels)
+        with self._lock:
+            self._counters[(name, key)] = self._counters.get((name, key), 0.0) + value
+        self._emit("counter", name, value, key)
+
+    def record_usage(self, model: str, node: str, usage: Mapping[str, int]) -> None:
+        """Count tokens by kind and the estimated cost of one model call."""
+        if not self.enabled:
+            return
+        fresh = max(0, usage.get("input_tokens", 0) - usage.get("cached_tokens", 0))
+        for kind, n in (("input", fresh), ("cached", usage.get("cached_tokens", 0)), ("output", usage.get("output_tokens", 0))):
+            if n:
+                self.inc("llm_tokens_total", n, model=model, node=node, kind=kind)
+        self.inc("llm_calls_total", 1, model=model, node=node)
+        price = self.prices.get(model)
+        if price:
+            cost = (fresh * price[0] + usage.get("cached_tokens", 0) * price[1] + usage.get("output_tokens", 0) * price[2]) / 1e6
+            self.inc("llm_cost_usd_total", cost, model=model, node=node)
+
+    def _emit(self, kind: str, name: str, value: float, labels: Labels) -> None:
+        for sink in self.sinks:
+            try:
+                sink.emit(kind, name, value, labels)
+            except Exception as e:  # exporting must never break a run
+                logger.debug("Metrics sink %r failed: %s", sink, e)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return counters and histogram summaries (count, sum, p50, p95, p99) as plain data."""
+        with self._lock:
+            return {
+                "counters": {_series(n, k): v for (n, k), v in self._counters.items()},
+                "histograms": {
+                    _series(n, k): {"count": h.count, "sum": round(h.sum, 3), "p50": h.quantile(0.5), "p95": h.quantile(0.95), "p99": h.quantile(0.99)}
+                    for (n, k), h in self._histograms.items()
+                },
+            }
+
+    def render_prometheus(self) -> str:
+        """Render everything in the Prometheus text exposition format."""
+        lines: list[str] = []
+        with self._lock:
+            for name in sorted({n for n, _ in self._counters}):
+                lines.append(f"# TYPE {name} counter")
+                lines += [f"{_series(n, k)} {v:g}" for (n, k), v in self._counters.items() if n == name]
+            for name in sorted({n for n, _ in self._histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (n, k), h in self._histograms.items():
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, c in zip([*map(str, h.buckets), "+Inf"], h.counts):
+                        cumulative += c
+                        lines.append(f"{_series(n + '_bucket', (*k, ('le', bound)))} {cumulative}")
+                    lines.append(f"{_series(n + '_sum', k)} {h.sum:g}")
+                    lines.append(f"{_series(n + '_count', k)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Drop all aggregated values."""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _series(name: str, labels: Labels) -> str:
+    if not labels:
+        return name
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return f"{name}{{{body}}}"
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def timed_node(name: str, fn: F) -> F:
+    """Wrap a graph node so each run records `node_ms{node=name}` (signature preserved)."""
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def run_async(*args: Any, **kwargs: Any) -> Any:
+            if not METRICS.enabled:
+                return await fn(*args, **kwargs)
+            with METRICS.span("node", node=name):
+                return await fn(*args, **kwargs)
+
+        return cast(F, run_async)
+
+    @functools.wraps(fn)
+    def run(*args: Any, **kwargs: Any) -> Any:
+        if not METRICS.enabled:
+            return fn(*args, **kwargs)
+        with METRICS.span("node", node=name):
+            return fn(*args, **kwargs)
+
+    return cast(F, run)
+
+
+def serve_prometheus(metrics: Metrics, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve `/metrics` from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            body = metrics.render_prometheus().encode("utf-8")
+            self.send_response(200 if self.path.rstrip("/") in {"", "/metrics"} else 404)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return None
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def _wanted() -> set[str]:
+    return {s.strip().lower() for s in os.environ.get("METRICS", "off").split(",")} - {"", "off"}
+
+
+_EXPORTER: ThreadingHTTPServer | None = None
+_EXPORTER_LOCK = threading.Lock()
+_LAZY_EXPORTER = True
+
+
+def disable_exporter() -> None:
+    """Keep this process from binding METRICS_PORT on its first observation (pool workers)."""
+    global _LAZY_EXPORTER
+    _LAZY_EXPORTER = False
+
+
+def start_exporter(metrics: Metrics | None = None) -> ThreadingHTTPServer | None:
+    """Serve `metrics` (default METRICS) on METRICS_PORT when the prometheus sink is on.
+
+    Idempotent: the port is bound once per process. Returns the server, or
+    None when not configured or the port cannot be bound (logged).
+    """
+    global _EXPORTER
+    port = os.environ.get("METRICS_PORT")
+    if "prometheus" not in _wanted() or not port:
+        return None
+    with _EXPORTER_LOCK:
+        if _EXPORTER is None:
+            try:
+                _EXPORTER = serve_prometheus(metrics or METRICS, int(port))
+            except (OSError, ValueError) as e:
+                logger.warning("Could not serve metrics on port %s: %s", port, e)
+        return _EXPORTER
+
+
+def _default_metrics() -> Metrics:
+    """Build the process-wide registry from METRICS and MODEL_PRICES_JSON."""
+    wanted = _wanted()
+    sinks: list[Sink] = []
+    if "log" in wanted:
+        sinks.append(LogSink())
+    if "otel" in wanted:
+        try:
+            sinks.append(OTelSink())
+        except ImportError:
+            logger.warning("METRICS=otel needs opentelemetry-api; skipping the OpenTelemetry sink")
+    if "prometheus" in wanted:
+        sinks.append(PrometheusSink())  # aggregation is `Metrics`' own; the sink only starts the exporter
+    metrics = Metrics(sinks)
+    raw_prices = os.environ.get("MODEL_PRICES_JSON")
+    if raw_prices:
+        try:
+            metrics.prices.update({k: (float(v[0]), float(v[1]), float(v[2])) for k, v in json.loads(raw_prices).items()})
+        except (ValueError, TypeError, IndexError) as e:
+            logger.warning("Ignoring MODEL_PRICES_JSON: %s", e)
+    return metrics
+
+
+METRICS = _default_metrics()
@@ -3,3 +3,23 @@
 
 SYSTEM_PROMPT = """You are a helpful AI assistant. System time: {system_time}"""
 
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an assistant.
+Update the existing summary with the new turns below. Keep facts, decisions, names, open questions
+and the user's preferences and tone; drop small talk. Answer with the updated summary only.
+
+Existing summary:
+{summary}
+
+New turns:
+{transcript}"""
+
+# Stands in for {system_time} in the cached prompt prefix; the real time follows in its own system message.
+STABLE_TIME_REF = "see the latest 'System time' note"
+
+# Sent when the turn's time budget is spent (see react_agent.budget).
+ANSWER_NOW_NOTE = (
+    "The time for this turn is nearly up. Answer the user now from what you already have; "
+    "say briefly if something could not be checked."
+)
+FORGE_OUT_OF_TIME = "Out of time for this turn; no further tools were run. Answer from the results so far."
@@ -0,0 +1,208 @@
+# SPDX-License-Identifier: MIT
+"""Provider-aware token-bucket rate limits for model and search calls.
+
+Each configured provider gets up to two buckets: requests per minute and
+tokens per minute. A call reserves one request and its estimated tokens
+before it starts and waits until both buckets cover it; afterwards the token
+estimate is corrected with the usage the provider reported. Waiting on our
+side keeps a batch just under the provider limits instead of running into
+429 responses and their retry storms. A reservation whose wait is cancelled
+(or fails) before the call starts is refunded.
+
+The wait is queueing, not provider latency: model calls take their slot
+before the attempt timeout starts (see `resilience`), and a tool call that
+waits here inside `exempt_waits` has its timeout pushed back by the wait.
+
+Limits come from `RATE_LIMITS`, one `provider:key=value,...` entry per
+provider, separated by `;`:
+
+    RATE_LIMITS="openai:rpm=500,tpm=800000;anthropic:rpm=50,tpm=40000;tavily:rpm=100"
+
+Providers without an entry are not limited.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import AsyncIterator, Iterator
+
+from react_agent.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Tokens reserved for the reply on top of the prompt estimate; settled after the call.
+OUTPUT_ALLOWANCE = 256
+
+# The timeout of the tool call running in this context and the loop time it may be pushed back to.
+_EXEMPT: ContextVar[tuple[asyncio.Timeout, float | None] | None] = ContextVar("ratelimit_exempt", default=None)
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding at most `capacity` units, refilled over `per` seconds."""
+
+    def __init__(self, capacity: float, per: float = 60.0) -> None:
+        """Start full."""
+        self.capacity = float(capacity)
+        self.rate = self.capacity / per
+        self._level = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` now and return the seconds to wait before using it.
+
+        The level may go negative: later callers queue behind the debt, so
+        reservations are served in arrival order.
+        """
+        with self._lock:
+            self._refill()
+            self._level -= min(float(amount), self.capacity)
+            return max(0.0, -self._level / self.rate)
+
+    def refund(self, amount: float) -> None:
+        """Give back `amount` (negative to charge more than was reserved)."""
+        with self._lock:
+            self._refill()
+            self._level = min(self.capacity, self._level + amount)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+
+class ProviderLimit:
+    """Request and token buckets of one provider (either may be unlimited)."""
+
+    def __init__(self, rpm: float | None = None, tpm: float | None = None) -> None:
+        """Create the buckets for the given per-minute limits."""
+        self.rpm, self.tpm = rpm, tpm
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.waited_s = 0.0
+
+    def reserve(self, tokens: int) -> float:
+        """Reserve one request and `tokens` tokens; return the seconds to wait."""
+        waits = [0.0]
+        if self.requests is not None:
+            waits.append(self.requests.reserve(1))
+        if self.tokens is not None and tokens > 0:
+            waits.append(self.tokens.reserve(tokens))
+        return max(waits)
+
+    def release(self, tokens: int) -> None:
+        """Give back a reservation that was never used."""
+        if self.requests is not None:
+            self.requests.refund(1)
+        if self.tokens is not None and tokens > 0:
+            self.tokens.refund(tokens)
+
+    def scaled(self, factor: float) -> ProviderLimit:
+        """Return a fresh limit with both rates multiplied by `factor`."""
+        return ProviderLimit(self.rpm * factor if self.rpm else None, self.tpm * factor if self.tpm else None)
+
+
+class Slot:
+    """A granted reservation; call `settle` with the real token count once known."""
+
+    def __init__(self, limit: ProviderLimit | None, reserved: int) -> None:
+        """Wrap the reservation of `reserved` tokens on `limit`."""
+        self.limit, self.reserved = limit, reserved
+
+    def settle(self, used: int) -> None:
+        """Correct the token bucket by the difference between reserved and used tokens."""
+        if self.limit is None or self.limit.tokens is None or used <= 0:
+            return
+        self.limit.tokens.refund(self.reserved - used)
+        self.reserved = used
+
+
+class RateLimiter:
+    """Per-provider limits shared by every call in the process."""
+
+    def __init__(self, limits: dict[str, ProviderLimit] | None = None) -> None:
+        """Use `limits` keyed by provider name (e.g. "openai", "tavily")."""
+        self.limits: dict[str, ProviderLimit] = dict(limits or {})
+
+    @contextlib.asynccontextmanager
+    async def slot(self, provider: str, tokens: int = 0) -> AsyncIterator[Slot]:
+        """Wait until `provider` can take one more request of about `tokens` tokens.
+
+        The reservation is released if the wait is cancelled.
+        """
+        limit = self.limits.get(provider)
+        if limit is None:
+            yield Slot(None, 0)
+            return
+        wait = limit.reserve(tokens)
+        if wait > 0:
+            limit.waited_s += wait
+            METRICS.observe("ratelimit_wait_ms", wait * 1000, provider=provider)
+            _postpone(wait)
+            try:
+                await asyncio.sleep(wait)
+            except BaseException:
+                limit.release(tokens)
+                raise
+        yield Slot(limit, tokens)
+
+    def scale(self, factor: float) -> None:
+        """Multiply every limit by `factor` (a share of the account limit per worker process)."""
+        self.limits = {p: lim.scaled(factor) for p, lim in self.limits.items()}
+
+    def stats(self) -> dict[str, float]:
+        """Return the seconds spent waiting, per provider."""
+        return {p: round(lim.waited_s, 3) for p, lim in self.limits.items()}
+
+
+@contextlib.contextmanager
+def exempt_waits(timeout: asyncio.Timeout, until: float | None = None) -> Iterator[None]:
+    """Push `timeout` back by every limiter wait inside the block, but not past loop time `until`."""
+    token = _EXEMPT.set((timeout, until))
+    try:
+        yield
+    finally:
+        _EXEMPT.reset(token)
+
+
+def _postpone(wait: float) -> None:
+    exempt = _EXEMPT.get()
+    if exempt is None:
+        return
+    timeout, until = exempt
+    when = timeout.when()
+    if when is None or timeout.expired():
+        return
+    when += wait
+    timeout.reschedule(when if until is None else min(when, until))
+
+
+def parse_limits(spec: str) -> dict[str, ProviderLimit]:
+    """Parse a RATE_LIMITS spec; malformed entries are logged and skipped."""
+    limits: dict[str, ProviderLimit] = {}
+    for entry in spec.split(";"):
+        provider, _, params = entry.partition(":")
+        provider = provider.strip().lower()
+        if not provider:
+            continue
+        values: dict[str, float] = {}
+        try:
+            for pair in params.split(","):
+                if pair.strip():
+                    key, _, raw = pair.partition("=")
+                    values[key.strip().lower()] = float(raw)
+        except ValueError:
+            logger.warning("Ignoring malformed rate limit entry %r", entry)
+            continue
+        if values.get("rpm") or values.get("tpm"):
+            limits[provider] = ProviderLimit(values.get("rpm"), values.get("tpm"))
+    return limits
+
+
+RATE_LIMITS = RateLimiter(parse_limits(os.environ.get("RATE_LIMITS", "")))
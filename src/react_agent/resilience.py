@@ -0,0 +1,335 @@
+# SPDX-License-Identifier: MIT
+"""Timeouts, retries, hedging and circuit-breaker fallback for model calls.
+
+`resilient_call` wraps one Phase or Forge model call:
+
+- every attempt runs under the node's timeout, shortened to the time left
+  before the turn's deadline (see `budget`); no retry starts after it;
+- timeouts, 429s, 5xx and connection errors are retried with full-jitter
+  exponential backoff, anything else is raised at once;
+- with hedging on, a second identical request starts once the first has run
+  longer than the chosen percentile of the model's recent latencies, and
+  whichever finishes first wins;
+- a per-model circuit breaker opens after consecutive retryable failures;
+  while it is open (and when the primary fails for good) the call is served
+  by the fallback model, and after a cooldown one probe goes to the primary;
+- a streamed call (`progress` given) is never hedged, and once its first
+  token has reached the user it is neither retried nor sent to the fallback:
+  only failures before the first token are, so the user never sees the
+  answer twice.
+
+A rate-limited call (`admit` given) waits for its provider slot before the
+attempt's timeout and clock start, so queueing in the limiter is bounded only
+by the deadline: it is not a timeout, not a breaker failure, not retried and
+not part of the latency samples hedging uses. A hedge takes its own slot.
+
+Attempts are reported as `llm_ms{model,node,status}`, so the effect on tail
+latency shows in the p95/p99 of that histogram, together with
+`llm_retries_total`, `llm_hedges_total` and `llm_fallbacks_total`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import random
+import threading
+import time
+from collections import deque
+from contextlib import AbstractAsyncContextManager
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from langchain_core.messages import BaseMessage
+
+from react_agent.budget import DeadlineExceeded, capped, time_left
+from react_agent.context import Context
+from react_agent.metrics import METRICS
+from react_agent.streaming import StreamProgress
+
+Call = Callable[[], Awaitable[BaseMessage]]
+Settle = Callable[[BaseMessage], None]
+# Admission to a model's provider: waits for a slot, yields how to settle it with the reply (None = unlimited).
+Admit = Callable[[str], AbstractAsyncContextManager[Settle | None]]
+
+MAX_BACKOFF = 8.0  # seconds
+HEDGE_MIN_SAMPLES = 20  # latencies needed before hedging starts
+
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+_RETRYABLE_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "InternalServerError",
+    "OverloadedError",
+    "RateLimitError",
+    "ServiceUnavailableError",
+}
+
+
+@dataclass(frozen=True)
+class CallPolicy:
+    """Resilience settings for one node's model calls."""
+
+    timeout: float = 0.0
+    retries: int = 0
+    backoff: float = 0.5
+    hedge_percentile: float = 0.0
+    breaker_failures: int = 0
+    breaker_cooldown: float = 30.0
+    deadline: float = 0.0  # epoch seconds; 0 = none
+
+    @classmethod
+    def for_node(cls, ctx: Context, node: str, *, hedge: bool = True, deadline: float = 0.0) -> CallPolicy:
+        """Build the policy for `node` ("phase" or "forge") from the run context."""
+        return cls(
+            deadline=deadline,
+            timeout=float(getattr(ctx, f"{node}_timeout", 0.0)),
+            retries=max(0, int(ctx.model_retries)),
+            backoff=float(ctx.retry_backoff),
+            hedge_percentile=float(ctx.hedge_percentile) if hedge else 0.0,
+            breaker_failures=int(ctx.breaker_failures),
+            breaker_cooldown=float(ctx.breaker_cooldown),
+        )
+
+
+def retryable(error: BaseException) -> bool:
+    """Return whether `error` is transient: a timeout, 408/409/429/5xx or a connection problem."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status in _RETRYABLE_STATUS
+    return type(error).__name__ in _RETRYABLE_NAMES
+
+
+class LatencyWindow:
+    """Recent successful call latencies of one model (ms)."""
+
+    def __init__(self, size: int = 256) -> None:
+        """Keep the last `size` samples."""
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, ms: float) -> None:
+        """Record one latency."""
+        with self._lock:
+            self._samples.append(ms)
+
+    def percentile(self, p: float) -> float | None:
+        """Return the p-th percentile (0..100), or None below HEDGE_MIN_SAMPLES samples."""
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed → open → (after cooldown) one half-open probe."""
+
+    def __init__(self) -> None:
+        """Start closed."""
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probe_at: float | None = None
+        self._lock = threading.Lock()
+
+    def allow(self, cooldown: float) -> bool:
+        """Return whether a call may go to this model now.
+
+        While open, one probe is let through per `cooldown`; a probe that never
+        reports back (cancelled) does not block the next one.
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at < cooldown or (self._probe_at is not None and now - self._probe_at < cooldown):
+                return False
+            self._probe_at = now
+            return True
+
+    def success(self) -> None:
+        """Close the breaker."""
+        with self._lock:
+            self.failures, self.opened_at, self._probe_at = 0, None, None
+
+    def failure(self, threshold: int) -> None:
+        """Count a retryable failure; open after `threshold` in a row or a failed probe."""
+        with self._lock:
+            self.failures += 1
+            if self._probe_at is not None or (threshold > 0 and self.failures >= threshold):
+                self.opened_at, self._probe_at = time.monotonic(), None
+
+    @property
+    def open(self) -> bool:
+        """Return whether calls are currently diverted."""
+        return self.opened_at is not None
+
+
+# Per-process state, keyed by "provider/model".
+BREAKERS: dict[str, CircuitBreaker] = {}
+LATENCIES: dict[str, LatencyWindow] = {}
+
+
+def _breaker(model_id: str) -> CircuitBreaker:
+    return BREAKERS.setdefault(model_id, CircuitBreaker())
+
+
+def _latency(model_id: str) -> LatencyWindow:
+    return LATENCIES.setdefault(model_id, LatencyWindow())
+
+
+async def resilient_call(
+    model_id: str,
+    make_call: Callable[[str], Call],
+    *,
+    policy: CallPolicy,
+    node: str,
+    fallback: str | None = None,
+    progress: StreamProgress | None = None,
+    admit: Admit | None = None,
+) -> BaseMessage:
+    """Run the call built by `make_call(model_id)` under `policy`.
+
+    `make_call` is asked for a call on `fallback` when the primary's breaker is
+    open or the primary fails with retryable errors on every attempt (and the
+    deadline, if any, has not passed). A reply
+    served by the fallback carries `response_metadata["fallback"] = fallback`.
+    For a streamed call, `progress` is the one its calls report the first
+    token to; a failure after it is raised as is. `admit(model_id)` is entered
+    around every attempt, before its timeout starts.
+    """
+    breaker = _breaker(model_id)
+    use_fallback = fallback is not None and fallback != model_id and policy.breaker_failures > 0
+    if use_fallback and not breaker.allow(policy.breaker_cooldown):
+        return await _fallback(fallback, make_call, policy, node, model_id, "circuit_open", progress, admit)
+    try:
+        return await _attempts(model_id, make_call(model_id), policy, node, progress, admit)
+    except Exception as e:
+        if not (use_fallback and retryable(e)) or isinstance(e, DeadlineExceeded) or _past(policy.deadline) or _emitted(progress):
+            raise
+        return await _fallback(fallback, make_call, policy, node, model_id, "error", progress, admit)
+
+
+async def _fallback(
+    fallback: str | None,
+    make_call: Callable[[str], Call],
+    policy: CallPolicy,
+    node: str,
+    primary: str,
+    reason: str,
+    progress: StreamProgress | None,
+    admit: Admit | None,
+) -> BaseMessage:
+    assert fallback is not None
+    METRICS.inc("llm_fallbacks_total", 1, model=primary, node=node, reason=reason)
+    msg = await _attempts(fallback, make_call(fallback), policy, node, progress, admit)
+    msg.response_metadata = {**msg.response_metadata, "fallback": fallback}
+    return msg
+
+
+async def _attempts(
+    model_id: str,
+    call: Call,
+    policy: CallPolicy,
+    node: str,
+    progress: StreamProgress | None = None,
+    admit: Admit | None = None,
+) -> BaseMessage:
+    """Try `call` up to 1 + retries times, within the deadline; only retryable errors are retried.
+
+    A streamed call is retried only while no token has reached the user.
+    """
+    breaker = _breaker(model_id)
+    duplicate = call if admit is None else admitted(call, admit, model_id)
+    attempt = 0
+    while True:
+        async with contextlib.AsyncExitStack() as slot:
+            settle = await _admit(slot, admit, model_id, policy) if admit is not None else None
+            started = time.perf_counter()
+            timeout = capped(policy.timeout, policy.deadline)
+            cut = policy.deadline > 0 and (policy.timeout <= 0 or timeout < policy.timeout)
+            try:
+                async with asyncio.timeout(timeout if timeout > 0 else None):
+                    msg = await (call() if progress is not None else _hedged(model_id, call, policy, node, duplicate))
+            except Exception as e:
+                status = "timeout" if isinstance(e, TimeoutError) else "error"
+                METRICS.observe("llm_ms", (time.perf_counter() - started) * 1000, model=model_id, node=node, status=status)
+                if cut and isinstance(e, TimeoutError):
+                    raise DeadlineExceeded(f"{model_id}: the turn's deadline passed") from e
+                if not retryable(e):
+                    raise
+                breaker.failure(policy.breaker_failures)
+                if attempt >= policy.retries or _past(policy.deadline) or _emitted(progress):
+                    raise
+                METRICS.inc("llm_retries_total", 1, model=model_id, node=node, reason=status)
+            else:
+                elapsed = (time.perf_counter() - started) * 1000
+                METRICS.observe("llm_ms", elapsed, model=model_id, node=node, status="ok")
+                _latency(model_id).add(elapsed)
+                breaker.success()
+                if settle is not None:
+                    settle(msg)
+                return msg
+        pause = random.uniform(0, min(MAX_BACKOFF, policy.backoff * 2**attempt))
+        await asyncio.sleep(capped(pause, policy.deadline) if pause > 0 else 0)
+        attempt += 1
+
+
+def admitted(call: Call, admit: Admit, model_id: str) -> Call:
+    """Wrap `call` in `admit(model_id)`, settling the slot with its reply."""
+
+    async def run() -> BaseMessage:
+        async with admit(model_id) as settle:
+            msg = await call()
+            if settle is not None:
+                settle(msg)
+            return msg
+
+    return run
+
+
+async def _admit(slot: contextlib.AsyncExitStack, admit: Admit, model_id: str, policy: CallPolicy) -> Settle | None:
+    """Enter `admit(model_id)` on `slot`, waiting no longer than the deadline allows."""
+    bound = capped(0.0, policy.deadline)
+    try:
+        async with asyncio.timeout(bound if bound > 0 else None):
+            return await slot.enter_async_context(admit(model_id))
+    except TimeoutError as e:
+        raise DeadlineExceeded(f"{model_id}: the turn's deadline passed waiting for the rate limit") from e
+
+
+def _emitted(progress: StreamProgress | None) -> bool:
+    return progress is not None and progress.emitted
+
+
+def _past(deadline: float) -> bool:
+    left = time_left(deadline)
+    return left is not None and left <= 0
+
+
+async def _hedged(model_id: str, call: Call, policy: CallPolicy, node: str, duplicate: Call | None = None) -> BaseMessage:
+    """Run `call`; start `duplicate` (default: `call`) once it outlives the hedge percentile and take the first reply."""
+    delay = _latency(model_id).percentile(policy.hedge_percentile) if policy.hedge_percentile > 0 else None
+    if delay is None:
+        return await call()
+    tasks = {asyncio.ensure_future(call())}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay / 1000)
+        if not done:
+            METRICS.inc("llm_hedges_total", 1, model=model_id, node=node)
+            tasks.add(asyncio.ensure_future((duplicate or call)()))
+        error: BaseException | None = None
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        assert error is not None
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,111 @@
+# SPDX-License-Identifier: MIT
+"""Opt-in cache of model responses for replayed and evaluation conversations.
+
+A response is reused when the same model, with the same bound tools, sees the
+same prompt again. The prompt is identified by the compiled bundle version,
+the prompt variables except `system_time`, the layout and the history
+messages. Message ids, tool-call ids and the clock are left out, so rerunning
+an eval set only calls the provider from the first turn whose input changed.
+The default backend is SQLite (`RESPONSE_CACHE_BACKEND`, `_PATH`, `_SIZE`); its
+reads and writes run in a worker thread (see `cache.off_loop`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from typing import Any, Awaitable, Callable, Mapping, Sequence
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    message_to_dict,
+    messages_from_dict,
+)
+
+from react_agent.cache import ResultCache, backend_from_env
+from react_agent.metrics import METRICS
+from react_agent.utils import get_message_text, tool_key
+
+_CACHE: ResultCache | None = None
+_LOCK = threading.Lock()
+
+
+def response_cache() -> ResultCache:
+    """Return the process-wide response cache, opening its backend on first use."""
+    global _CACHE
+    with _LOCK:
+        if _CACHE is None:
+            _CACHE = ResultCache(backend_from_env("RESPONSE_CACHE", ".cache/responses.sqlite3", 20_000, "sqlite"))
+        return _CACHE
+
+
+def _message_key(msg: BaseMessage) -> dict[str, Any]:
+    """Content-only form of a message: no ids, no tool-call ids, no metadata."""
+    key: dict[str, Any] = {"type": msg.type, "text": get_message_text(msg)}
+    calls = getattr(msg, "tool_calls", None)
+    if calls:
+        key["calls"] = [[tc.get("name"), tc.get("args") or {}] for tc in calls]
+    name = getattr(msg, "name", None)
+    if msg.type == "tool" and name:
+        key["tool"] = name
+    return key
+
+
+def prompt_fingerprint(
+    bundle_version: str,
+    variables: Mapping[str, str],
+    layout: str,
+    history: Sequence[BaseMessage],
+) -> str:
+    """Hash the parts of a prompt that determine the response (the clock excluded)."""
+    doc = {
+        "bundle": bundle_version,
+        "vars": {k: v for k, v in sorted(variables.items()) if k != "system_time"},
+        "layout": layout,
+        "history": [_message_key(m) for m in history],
+    }
+    return hashlib.sha256(json.dumps(doc, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def response_key(model_id: str, tools: Sequence[Any] | None, fingerprint: str) -> str:
+    """Cache key for one model call."""
+    return f"llm:{model_id}:{','.join(tool_key(tools))}:{fingerprint}"
+
+
+def _cacheable(data: dict[str, Any]) -> bool:
+    """Keep invalid tool calls and fallback-model replies out of the cache."""
+    return not data.get("invalid_tool_calls") and not (data.get("response_metadata") or {}).get("fallback")
+
+
+async def cached_response(
+    key: str,
+    call: Callable[[], Awaitable[BaseMessage]],
+    *,
+    ttl: float,
+    node: str,
+) -> BaseMessage:
+    """Return the cached response for `key`, or make the call and cache it.
+
+    Hits come back with a fresh id, no usage (no tokens were spent) and
+    `response_metadata["cache"] == "hit"`.
+    """
+    fresh = False
+
+    async def run() -> dict[str, Any]:
+        nonlocal fresh
+        fresh = True
+        return message_to_dict(await call())
+
+    data = await response_cache().get_or_call(
+        key, run, ttl=ttl, cacheable=lambda d: d.get("type") == "ai" and _cacheable(d.get("data") or {})
+    )
+    msg = messages_from_dict([data])[0]
+    METRICS.inc("llm_cache_total", 1, node=node, result="miss" if fresh else "hit")
+    if fresh:
+        return msg
+    update: dict[str, Any] = {"id": None, "response_metadata": {**msg.response_metadata, "cache": "hit"}}
+    if isinstance(msg, AIMessage):
+        update["usage_metadata"] = None
+    return msg.model_copy(update=update)
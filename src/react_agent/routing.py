@@ -0,0 +1,104 @@
+# SPDX-License-Identifier: MIT
+"""Fast-path pre-router in front of Phase.
+
+A deterministic classifier scores the new human message. Turns that clearly
+need tools (fresh facts, lookups, URLs, the clock) go straight to Forge and
+skip the Phase call whose only output would be `delegate_phase_to_forge`.
+Everything else, including anything personal or reflective, goes to Phase.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Literal
+
+# (pattern, weight, reason) — weights combine as independent evidence. The intent signals are anchored to
+# a request (a clock question, an explicit request to search, a question for the latest news or price); the
+# topical ones (WEAK_REASONS) only add to them: on their own they score at most WEAK_CAP, below the default
+# threshold, because the same words occur in conversation ("the weather was awful today").
+_ASK = r"(?:^|[.!?]\s+|\b(?:can|could|would|will) you\s+|\bplease\s+)"
+_FORGE_SIGNALS: tuple[tuple[re.Pattern[str], float, str], ...] = (
+    (re.compile(r"https?://\S+"), 0.9, "url"),
+    (
+        re.compile(
+            r"\bwhat time is it\b|\bwhat(?:'s| is) the (?:current |local )?time\b|\bcurrent (?:local )?time\b"
+            r"|\btoday'?s date\b|\bwhat(?:'s| is) (?:the )?date\b|\bwhat day is (?:it|today)\b",
+            re.I,
+        ),
+        0.9,
+        "clock",
+    ),
+    (
+        re.compile(
+            _ASK + r"(?:please\s+)?(?:search (?:for|the web|online)|look up|google(?=\s)|find out)\b"
+            r"|\b(?:search|look|check)\b.{0,60}\b(?:online|on the (?:web|internet))\b",
+            re.I,
+        ),
+        0.85,
+        "lookup",
+    ),
+    (
+        re.compile(
+            r"^(?:(?:what(?:'s| is| are)|give me|show me|get me|tell me)\s+)?(?:the\s+)?(?:latest|current|today'?s)\s+"
+            r"(?:[\w-]+\s+){0,3}?(?:news|headlines|weather|forecast|prices?|exchange rates?|scores?|results)\b",
+            re.I,
+        ),
+        0.85,
+        "fresh-query",
+    ),
+    (
+        re.compile(r"\b(latest|today|tonight|yesterday|this week|right now|currently|recent)\b", re.I),
+        0.6,
+        "freshness",
+    ),
+    (
+        re.compile(
+            r"\b(news|headlines|weather|forecast|stock price|share price|stock market|exchange rate|release date)\b",
+            re.I,
+        ),
+        0.6,
+        "live-data",
+    ),
+    (re.compile(r"\b(how much|how many|when (is|was|did)|who (is|won|was)|where is)\b", re.I), 0.4, "factual"),
+)
+WEAK_REASONS = frozenset({"freshness", "live-data", "factual"})
+WEAK_CAP = 0.75
+
+_PHASE_SIGNALS: tuple[re.Pattern[str], ...] = (
+    re.compile(r"\b(i feel|i'm feeling|i am feeling|how are you|what do you think|what you think|your opinion|tell me about yourself)\b", re.I),
+    re.compile(r"\b(thank you|thanks|hello|hi|hey)\b\W*$", re.I),
+)
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    """Where a new turn should start, and how sure the classifier is."""
+
+    target: Literal["phase", "forge"]
+    confidence: float
+    reasons: tuple[str, ...] = ()
+
+
+def classify_turn(text: str) -> RouteDecision:
+    """Score a human message for the Forge fast path.
+
+    Without an intent signal (url, clock, lookup, fresh-query) the confidence
+    is capped at WEAK_CAP.
+    """
+    text = (text or "").strip()
+    if not text or any(p.search(text) for p in _PHASE_SIGNALS):
+        return RouteDecision("phase", 1.0)
+    miss = 1.0
+    reasons: list[str] = []
+    for pattern, weight, reason in _FORGE_SIGNALS:
+        if pattern.search(text):
+            miss *= 1.0 - weight
+            reasons.append(reason)
+    if not reasons:
+        return RouteDecision("phase", 1.0)
+    confidence = 1.0 - miss
+    if WEAK_REASONS.issuperset(reasons):
+        confidence = min(confidence, WEAK_CAP)
+    return RouteDecision("forge", round(confidence, 3), tuple(reasons))
+
@@ -4,7 +4,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Sequence
+from typing import Any, Sequence
 
 from langchain_core.messages import AnyMessage
 from langgraph.graph import add_messages
@@ -12,6 +12,23 @@ from langgraph.managed import IsLastStep
 from typing_extensions import Annotated
 
 
+def add_counts(left: dict[str, int], right: dict[str, int]) -> dict[str, int]:
+    """Reducer that sums integer counters key by key."""
+    if not right:
+        return left
+    merged = dict(left or {})
+    for k, v in right.items():
+        merged[k] = merged.get(k, 0) + int(v)
+    return merged
+
+
+def collect_branches(left: list[dict[str, Any]], right: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Reducer that gathers fan-out branch results; an empty update clears them."""
+    if not right:
+        return []
+    return [*(left or []), *right]
+
+
 @dataclass
 class InputState:
     """Defines the input state for the agent, representing a narrower interface to the outside world."""
@@ -30,3 +47,34 @@ class State(InputState):
 
     # --- loop counters for conversation limits ---
     c1_loops: int = 0        # Phase ↔ Forge exchanges seen
+
+    # --- model calls in the current turn (Phase, Forge, synthesis) ---
+    llm_calls: int = 0
+
+    # --- turn timing ---
+    turn_started_at: float = 0.0  # epoch seconds of the current human turn
+    ttft_ms: float | None = None  # turn start → first visible Phase token (streaming only)
+    turn_ms: float | None = None  # turn start → Phase's final answer
+    turn_deadline: float = 0.0  # epoch seconds the turn should be answered by (0 = no budget)
+
+    # --- rolling summary of folded turns ---
+    summary: str = ""
+    summary_through: str | None = None  # id of the newest message folded into `summary`
+    summary_meta: dict[str, Any] = field(default_factory=dict)  # freshness + tokens saved
+    summary_pending: dict[str, Any] = field(default_factory=dict)  # fold in progress: its base and start time
+
+    # --- provider token usage across the thread (input/cached/output tokens, calls) ---
+    usage: Annotated[dict[str, int], add_counts] = field(default_factory=dict)
+
+    # --- results of Forge's parallel research branches, until `merge_research` hands them on ---
+    research: Annotated[list[dict[str, Any]], collect_branches] = field(default_factory=list)
+
+
+@dataclass
+class ResearchBranch:
+    """Input of one `research` branch of a Forge fan-out (sent with `Send`)."""
+
+    query: str
+    call_id: str
+    index: int = 0
+    turn_deadline: float = 0.0
@@ -0,0 +1,88 @@
+# SPDX-License-Identifier: MIT
+"""User-facing token streaming.
+
+`graph.astream(stream_mode="messages")` also carries Forge output, tool results
+and the invisible handoff messages. These helpers keep only Phase text.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Mapping, cast
+
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    message_chunk_to_message,
+)
+from langchain_core.runnables import Runnable, RunnableConfig
+from langgraph.constants import TAG_NOSTREAM
+from langgraph.pregel import Pregel
+
+from react_agent.utils import get_message_text
+
+USER_FACING_NODES: frozenset[str] = frozenset({"phase"})
+
+
+def is_user_facing(message: BaseMessage, metadata: Mapping[str, Any]) -> bool:
+    """Keep Phase text; drop Forge, tool results, invisible/handoff and nostream-tagged messages."""
+    if (getattr(message, "additional_kwargs", None) or {}).get("invisible"):
+        return False
+    if TAG_NOSTREAM in (metadata.get("tags") or ()):
+        return False
+    if metadata.get("langgraph_node") not in USER_FACING_NODES:
+        return False
+    return isinstance(message, AIMessage) and bool(get_message_text(message))
+
+
+async def astream_text(
+    graph: Pregel[Any, Any, Any, Any],
+    input: Any,
+    config: RunnableConfig | None = None,
+    **kwargs: Any,
+) -> AsyncIterator[str]:
+    """Yield Phase text as it is generated (invisible traffic filtered out)."""
+    async for item in graph.astream(input, config, stream_mode="messages", **kwargs):
+        message, metadata = cast(tuple[BaseMessage, dict[str, Any]], item)
+        if is_user_facing(message, metadata):
+            yield get_message_text(message)
+
+
+@dataclass
+class StreamProgress:
+    """Whether a streamed call has put text in front of the user yet.
+
+    Once it has, the call must not be repeated: a retry, hedge or fallback
+    would stream the same answer a second time (see `resilience`).
+    """
+
+    emitted: bool = False
+
+
+async def astream_collect(
+    model: Runnable[LanguageModelInput, BaseMessage],
+    messages: list[BaseMessage],
+    progress: StreamProgress | None = None,
+) -> tuple[BaseMessage, float | None]:
+    """Stream a model call to completion; return the message and time-to-first-token (ms).
+
+    Only text tokens count as "first token"; tool-call chunks do not reach the
+    user. `progress.emitted` is set with the first text token.
+    """
+    started = time.perf_counter()
+    ttft: float | None = None
+    full: AIMessageChunk | None = None
+    async for chunk in model.astream(messages):
+        if not isinstance(chunk, AIMessageChunk):
+            continue
+        if ttft is None and get_message_text(chunk):
+            ttft = (time.perf_counter() - started) * 1000
+            if progress is not None:
+                progress.emitted = True
+        full = chunk if full is None else cast(AIMessageChunk, full + chunk)
+    if full is None:
+        return AIMessage(content=""), ttft
+    return message_chunk_to_message(full), ttft
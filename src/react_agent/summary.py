@@ -0,0 +1,167 @@
+# SPDX-License-Identifier: MIT
+"""Incremental rolling summary of old turns.
+
+Once the not-yet-summarized part of a thread passes a token threshold, its
+oldest whole turns are folded into `State.summary` by a cheap model. Only the
+newly folded turns and the previous summary are sent, so the summary is
+updated incrementally and never recomputed from the full thread. Messages up
+to `State.summary_through` are then replaced by the summary in every prompt.
+
+The fold runs off the critical path: a turn starts it in the background
+(`SUMMARY_JOBS`, keyed by thread) and the thread's next turn applies the
+result, provided no other fold was applied in between.
+
+`SUMMARY_JOBS` is per process. The fold in progress is also recorded in the
+checkpointed state (`State.summary_pending`), and a finished fold is handed
+over through the graph's store when it has one (`compile(store=...)`; the
+LangGraph server always provides one). So a next turn served by another
+worker still applies it. Without a store, that worker only sees the pending
+marker and starts the fold over.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from typing import Any, Coroutine, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langgraph.store.base import BaseStore
+
+from react_agent.history import TOKENS, TokenCounter
+from react_agent.utils import get_message_text
+
+
+def unsummarized(messages: Sequence[BaseMessage], summary_through: str | None) -> list[BaseMessage]:
+    """Messages after the last one folded into the summary."""
+    if summary_through:
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i].id == summary_through:
+                return list(messages[i + 1 :])
+    return list(messages)
+
+
+def plan_fold(
+    messages: Sequence[BaseMessage],
+    summary_through: str | None,
+    *,
+    trigger_tokens: int,
+    keep_turns: int,
+    counter: TokenCounter | None = None,
+) -> list[BaseMessage]:
+    """Pick the oldest whole turns to fold, or `[]` if the thread is still small.
+
+    Folding starts once the unsummarized tail exceeds `trigger_tokens`; the
+    newest `keep_turns` turns always stay verbatim.
+    """
+    if trigger_tokens <= 0:
+        return []
+    counter = counter or TOKENS
+    tail = unsummarized(messages, summary_through)
+    if counter.total(tail) <= trigger_tokens:
+        return []
+    starts = [i for i, m in enumerate(tail) if isinstance(m, HumanMessage)]
+    if len(starts) <= keep_turns:
+        return []
+    cut = starts[-keep_turns] if keep_turns > 0 else len(tail)
+    return tail[:cut]
+
+
+def is_visible(msg: BaseMessage) -> bool:
+    """User turns and Phase replies; internal Forge/tool traffic is excluded."""
+    if isinstance(msg, HumanMessage):
+        return True
+    return (
+        isinstance(msg, AIMessage)
+        and not (msg.additional_kwargs or {}).get("invisible")
+        and bool(get_message_text(msg))
+    )
+
+
+def transcript(messages: Sequence[BaseMessage]) -> str:
+    """Plain-text transcript of the visible messages."""
+    lines: list[str] = []
+    for m in messages:
+        if is_visible(m):
+            who = "User" if isinstance(m, HumanMessage) else "Assistant"
+            lines.append(f"{who}: {get_message_text(m)}")
+    return "\n".join(lines)
+
+
+def summary_message(summary: str) -> SystemMessage:
+    """System message carrying the running summary into a prompt."""
+    return SystemMessage(content=f"Summary of the earlier conversation:\n{summary}")
+
+
+class SummaryJobs:
+    """Background summary folds per thread: started by one turn, applied by the next."""
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        """Track at most `maxsize` threads' folds (the oldest is cancelled beyond that)."""
+        self.maxsize = maxsize
+        self._jobs: OrderedDict[str, tuple[str | None, asyncio.Task[dict[str, Any]]]] = OrderedDict()
+
+    def _live(self, key: str) -> tuple[str | None, asyncio.Task[dict[str, Any]]] | None:
+        found = self._jobs.get(key)
+        if found is None:
+            return None
+        task = found[1]
+        if not task.done() and task.get_loop() is not asyncio.get_running_loop():
+            # started on an event loop that is gone (e.g. an earlier asyncio.run); it will never finish
+            task.cancel()
+            del self._jobs[key]
+            return None
+        return found
+
+    def running(self, key: str) -> bool:
+        """Return whether a fold for `key` is still in progress."""
+        found = self._live(key)
+        return found is not None and not found[1].done()
+
+    def start(self, key: str, base: str | None, fold: Coroutine[Any, Any, dict[str, Any]]) -> None:
+        """Run `fold` (a state update) in the background; `base` is the `summary_through` it builds on."""
+        self._jobs[key] = (base, asyncio.get_running_loop().create_task(fold))
+        self._jobs.move_to_end(key)
+        while len(self._jobs) > self.maxsize:
+            self._jobs.popitem(last=False)[1][1].cancel()
+
+    def take(self, key: str, base: str | None) -> dict[str, Any]:
+        """Return (and forget) the finished fold for `key`, or `{}` if there is none or it is stale.
+
+        A fold is stale when the thread's `summary_through` has moved past
+        `base` since it started.
+        """
+        found = self._live(key)
+        if found is None or not found[1].done():
+            return {}
+        del self._jobs[key]
+        started_from, task = found
+        if task.cancelled() or task.exception() is not None or started_from != base:
+            return {}
+        return task.result()
+
+    async def wait(self) -> None:
+        """Wait for every running fold (tests, shutdown)."""
+        running = [task for _, task in self._jobs.values() if not task.done()]
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+
+SUMMARY_JOBS = SummaryJobs()
+
+# Store namespace of finished folds waiting for their thread's next turn.
+FOLDS_NAMESPACE = ("summary_folds",)
+
+
+async def publish_fold(store: BaseStore, key: str, base: str | None, update: dict[str, Any]) -> None:
+    """Leave a finished fold (`{}` if it failed) in `store` for whichever worker serves the thread's next turn."""
+    await store.aput(FOLDS_NAMESPACE, key, {"base": base, "update": update})
+
+
+async def claim_fold(store: BaseStore, key: str, base: str | None) -> dict[str, Any] | None:
+    """Return (and remove) the fold published for `key`: None if there is none yet, `{}` if it failed or is stale."""
+    item = await store.aget(FOLDS_NAMESPACE, key)
+    if item is None:
+        return None
+    await store.adelete(FOLDS_NAMESPACE, key)
+    return dict(item.value.get("update") or {}) if item.value.get("base") == base else {}
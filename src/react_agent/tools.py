@@ -3,16 +3,25 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
 import os
+import re
 from datetime import datetime
-from typing import Any, Callable, TypeVar, cast
+from typing import TYPE_CHECKING, Any, Callable, TypeVar, cast
 from zoneinfo import ZoneInfo
 
 from langchain_core.tools import tool as _tool
-from langchain_tavily import TavilySearch
 from langgraph.runtime import get_runtime
 
+from react_agent.budget import search_results
+from react_agent.cache import PAYLOAD_STORE, PAYLOAD_TTL, SEARCH_CACHE, off_loop
+from react_agent.compaction import compact_search
 from react_agent.context import Context
+from react_agent.ratelimit import RATE_LIMITS
+
+if TYPE_CHECKING:
+    from langchain_tavily import TavilySearch
 
 # --- typed decorator alias ---
 F = TypeVar("F", bound=Callable[..., Any])
@@ -20,15 +29,70 @@ TOOL = cast(Callable[[F], F], _tool)
 
 # --------- Real tools (used by Forge) ---------
 
+# one client per max_results, reused across calls (keeps its HTTP session)
+_TAVILY: dict[int, TavilySearch] = {}
+
+
+def _tavily(max_results: int) -> TavilySearch:
+    client = _TAVILY.get(max_results)
+    if client is None:
+        # deferred: heavy import, only needed once Forge searches
+        from langchain_tavily import TavilySearch
+
+        # TAVILY_API_BASE_URL points search at a proxy or a local stand-in (load tests)
+        base_url = os.getenv("TAVILY_API_BASE_URL")
+        options = {"api_base_url": base_url} if base_url else {}
+        client = _TAVILY[max_results] = TavilySearch(max_results=max_results, **options)
+    return client
+
+
+def normalize_query(query: str) -> str:
+    """Cache key form of a query: case-folded, single-spaced, no trailing punctuation."""
+    return re.sub(r"\s+", " ", query.casefold()).strip().rstrip("?!. ")
+
+
 @TOOL
 async def search(query: str) -> dict[str, Any] | None:
     """Search the web (Tavily). Best for fresh/current info."""
     if not os.getenv("TAVILY_API_KEY"):
         return {"error": "TAVILY_API_KEY not set"}
-    runtime = get_runtime(Context)
-    wrapped = TavilySearch(max_results=runtime.context.max_search_results)
-    result = await wrapped.ainvoke({"query": query})
-    return cast(dict[str, Any], result)
+    ctx = get_runtime(Context).context
+    max_results = search_results(ctx)
+
+    async def call() -> dict[str, Any]:
+        async with RATE_LIMITS.slot("tavily"):
+            return cast(dict[str, Any], await _tavily(max_results).ainvoke({"query": query}))
+
+    result = await SEARCH_CACHE.get_or_call(
+        f"search:{max_results}:{normalize_query(query)}",
+        call,
+        ttl=float(ctx.search_cache_ttl),
+        cacheable=lambda r: isinstance(r, dict) and not r.get("error"),
+    )
+    if not isinstance(result, dict) or result.get("error") or int(ctx.search_result_tokens) <= 0:
+        return cast(dict[str, Any] | None, result)
+    compact = compact_search(result, budget_tokens=int(ctx.search_result_tokens))
+    ref = await off_loop(PAYLOAD_STORE, store_payload, result) if ctx.search_keep_payload else ""
+    if ref:
+        compact["ref"] = ref
+    return compact
+
+
+def store_payload(payload: dict[str, Any]) -> str:
+    """Keep a full tool payload out of graph state; return its reference id ("" if the store failed)."""
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    ref = "payload:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+    try:
+        PAYLOAD_STORE.set(ref, payload, PAYLOAD_TTL)
+    except Exception:
+        return ""
+    return ref
+
+
+def load_payload(ref: str) -> dict[str, Any] | None:
+    """Return the full payload stored under `ref`, or None once expired."""
+    found = PAYLOAD_STORE.get(ref)
+    return cast(dict[str, Any] | None, found)
 
 @TOOL
 def get_time() -> str:
@@ -38,6 +102,20 @@ def get_time() -> str:
 # Export: real tools set (Forge binds these directly)
 TOOLS: list[Callable[..., Any]] = [search, get_time]
 
+# --------- Fan-out (Forge -> parallel research branches) ---------
+
+@TOOL
+def research_parallel(queries: list[str]) -> str:
+    """Research independent sub-questions at the same time, one self-contained query each.
+
+    Use it when a task splits into parts that do not depend on each other;
+    the merged results come back in one message.
+    """
+    return "ok"
+
+# Bound for Forge when Context.forge_fanout > 0; routed to `research` branches, never executed
+FANOUT_TOOLS: list[Callable[..., Any]] = [research_parallel]
+
 # --------- Delegation tools (Phase -> Forge) ---------
 
 @TOOL
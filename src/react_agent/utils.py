@@ -1,20 +1,28 @@
 # SPDX-License-Identifier: MIT
 """Utility & helper functions."""
 
+import contextlib
+import functools
+import importlib
+import os
 import re
-from typing import Any, Type, cast
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterator, Sequence, Type, cast
 
-from langchain.chat_models import init_chat_model
-from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable
 
-# Use native OpenAI wrapper to ensure usage + streaming.
-ChatOpenAI: Type[Any] | None
-try:
-    from langchain_openai import ChatOpenAI as _ChatOpenAI
-    ChatOpenAI = _ChatOpenAI
-except Exception:
-    ChatOpenAI = None
+
+@functools.cache
+def chat_openai_class() -> Type[Any] | None:
+    """Return the native OpenAI wrapper (usage + streaming), imported on first use; None if unavailable."""
+    try:
+        return cast(Type[Any], importlib.import_module("langchain_openai").ChatOpenAI)
+    except Exception:
+        return None
 
 
 def get_message_text(msg: BaseMessage) -> str:
@@ -35,13 +43,36 @@ def get_message_text(msg: BaseMessage) -> str:
     return "".join(parts).strip()
 
 
+def usage_counts(msg: BaseMessage) -> dict[str, int]:
+    """Token usage of one model response, including provider prompt-cache hits.
+
+    Reads `usage_metadata` (LangChain standard) and falls back to the raw
+    OpenAI `response_metadata["token_usage"]` block.
+    """
+    usage = getattr(msg, "usage_metadata", None) or {}
+    raw = (getattr(msg, "response_metadata", None) or {}).get("token_usage") or {}
+    details = usage.get("input_token_details") or {}
+    cached = details.get("cache_read")
+    if cached is None:
+        cached = (raw.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+    return {
+        "calls": 1,
+        "input_tokens": int(usage.get("input_tokens", raw.get("prompt_tokens", 0)) or 0),
+        "cached_tokens": int(cached or 0),
+        "output_tokens": int(usage.get("output_tokens", raw.get("completion_tokens", 0)) or 0),
+    }
+
+
 def load_chat_model(fully_specified_name: str, **kwargs: Any) -> BaseChatModel:
     """Load a chat model by name, with optional streaming support."""
-    provider, model = _split_provider_model(fully_specified_name)
+    provider, model = split_provider_model(fully_specified_name)
     streaming = bool(kwargs.get("streaming", False))
 
-    if provider == "openai" and ChatOpenAI is not None:
-        return cast(BaseChatModel, ChatOpenAI(model=model, stream_usage=True, streaming=streaming))
+    chat_openai = chat_openai_class() if provider == "openai" else None
+    if chat_openai is not None:
+        return cast(BaseChatModel, chat_openai(model=model, stream_usage=True, streaming=streaming))
+
+    from langchain.chat_models import init_chat_model
 
     return cast(
         BaseChatModel,
@@ -49,13 +80,130 @@ def load_chat_model(fully_specified_name: str, **kwargs: Any) -> BaseChatModel:
     )
 
 
-def _split_provider_model(name: str) -> tuple[str, str]:
+def split_provider_model(name: str) -> tuple[str, str]:
+    """Split "provider/model" into its parts; bare names are OpenAI models."""
     if "/" in name:
         p, m = name.split("/", maxsplit=1)
         return p.strip(), m.strip()
     return "openai", name.strip()
 
 
+# ---------- Pooled chat-model registry ----------
+
+ModelKey = tuple[str, bool, tuple[str, ...]]
+
+
+def tool_key(tools: Sequence[Any] | None) -> tuple[str, ...]:
+    """Stable, hashable identity for a bound tool set (order-insensitive)."""
+    names: list[str] = []
+    for t in tools or ():
+        name = getattr(t, "name", None) or getattr(t, "__name__", None)
+        if not name and isinstance(t, dict):
+            name = t.get("name") or (t.get("function") or {}).get("name")
+        names.append(str(name or repr(t)))
+    return tuple(sorted(names))
+
+
+class ModelRegistry:
+    """Process-wide, bounded LRU of constructed chat models.
+
+    Keyed by (provider/model, streaming, bound tool set). Reusing the instance
+    reuses its HTTP client and keep-alive pool across runs and threads. Bound
+    variants are built from the shared base model, so every tool set for one
+    model id talks through the same connection pool.
+    """
+
+    def __init__(self, maxsize: int = 32) -> None:
+        """Create an empty registry holding at most `maxsize` entries."""
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[ModelKey, Runnable[LanguageModelInput, BaseMessage]] = OrderedDict()
+        self._building: dict[ModelKey, threading.Lock] = {}  # one build per key at a time
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        fully_specified_name: str,
+        *,
+        streaming: bool = False,
+        tools: Sequence[Any] | None = None,
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        """Return a cached (optionally tool-bound) model, constructing it on a miss.
+
+        Models are built outside the registry lock, so a slow build does not
+        hold up lookups of other models; concurrent misses on one key wait for
+        a single build. Each call counts as one hit or one miss.
+        """
+        return self._get((fully_specified_name, streaming, tool_key(tools)), tools, count=True)
+
+    def _get(self, key: ModelKey, tools: Sequence[Any] | None, *, count: bool) -> Runnable[LanguageModelInput, BaseMessage]:
+        with self._lock:
+            found = self._cached(key)
+            if count:
+                if found is not None:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            if found is not None:
+                return found
+            once = self._building.setdefault(key, threading.Lock())
+        with once:
+            with self._lock:
+                found = self._cached(key)
+            if found is not None:  # built by the call we waited for
+                return found
+            name, streaming, bound = key
+            if bound:
+                base = cast(BaseChatModel, self._get((name, streaming, ()), None, count=False))
+                model: Runnable[LanguageModelInput, BaseMessage] = base.bind_tools(list(tools or ()))
+            else:
+                model = load_chat_model(name, streaming=streaming)
+            with self._lock:
+                self._entries[key] = model
+                self._building.pop(key, None)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            return model
+
+    def _cached(self, key: ModelKey) -> Runnable[LanguageModelInput, BaseMessage] | None:
+        found = self._entries.get(key)
+        if found is not None:
+            self._entries.move_to_end(key)
+        return found
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss/eviction counters and the current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
+
+    def clear(self) -> None:
+        """Drop all cached models and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+MODEL_REGISTRY = ModelRegistry(maxsize=int(os.environ.get("MODEL_REGISTRY_SIZE", "32")))
+
+
+def get_chat_model(
+    fully_specified_name: str,
+    *,
+    streaming: bool = False,
+    tools: Sequence[Any] | None = None,
+) -> Runnable[LanguageModelInput, BaseMessage]:
+    """Fetch a pooled chat model from the process-wide registry."""
+    return MODEL_REGISTRY.get(fully_specified_name, streaming=streaming, tools=tools)
+
+
 # ---------- Prompt header stripping (for CC BY headers etc.) ----------
 
 _CUT_MARKERS: tuple[str, ...] = (
@@ -137,3 +285,24 @@ def strip_messages(messages: list[BaseMessage]) -> list[BaseMessage]:
         else:
             out.append(m)
     return out
+
+
+@contextlib.contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive advisory lock on `path` (created if missing) across processes.
+
+    Uses `fcntl.flock`; where that is unavailable (Windows) the block runs
+    unlocked, so callers must still serialize their own threads.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a+b") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,150 @@
+# SPDX-License-Identifier: MIT
+"""Warm a worker up before it takes traffic.
+
+Importing `react_agent` is cheap: the graph is compiled on first access and
+the OpenAI, Tavily and LangSmith client modules load on first use. A worker
+that should serve its first request at steady-state latency calls
+`await warm_up()` at startup (or `react-agent warmup` to check the timings).
+The call, step by step:
+
+- `graph`: compiles the deployment graph;
+- `prompts`: loads the Phase and Forge prompt bundles (snapshot, LangSmith, or
+  the offline fallback);
+- `models`: builds the pooled chat models for every role, tool set and the
+  breaker fallback;
+- `search`: builds the Tavily client (when TAVILY_API_KEY is set);
+- `memory`: loads numpy and the memory store (when `memory_k` > 0);
+- `connections`: opens a connection to each OpenAI-compatible endpoint with a
+  `GET /models` call, so the first turn does not pay for DNS and TLS.
+
+A failing step is logged and reported as an error; warm-up never raises.
+
+Processes that never call `warm_up` (the LangGraph server loading the
+langgraph.json entry point) get `warm_up_in_background()` on their first
+access of `react_agent.graph.graph`: the same steps but `connections`, in a
+daemon thread, so the first turn does not pay for them. Connections are left
+out because they belong to the serving event loop. `WARMUP_ON_LOAD=0` turns
+this off.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable
+
+from react_agent.context import Context
+from react_agent.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Seconds per connection probe.
+CONNECT_TIMEOUT = 5.0
+
+_BACKGROUND: threading.Thread | None = None
+_BACKGROUND_LOCK = threading.Lock()
+
+
+async def warm_up(ctx: Context | None = None, *, connect: bool = True) -> dict[str, Any]:
+    """Prepare this process for traffic; return milliseconds per step (or the step's error)."""
+    from react_agent import tools, utils
+
+    # the module, not the compiled graph the package attribute resolves to before it is imported
+    graph_module = importlib.import_module("react_agent.graph")
+    ctx = ctx or Context()
+    report: dict[str, Any] = {}
+
+    async def step(name: str, run: Callable[[], Awaitable[Any]]) -> None:
+        started = time.perf_counter()
+        try:
+            with METRICS.span("warmup", step=name):
+                await run()
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", name, e)
+            report[name] = f"error: {type(e).__name__}: {e}"
+            return
+        report[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    async def compile_graph() -> None:
+        graph_module.compiled_graph()
+
+    async def prompts() -> None:
+        ttl = float(ctx.prompt_ttl)
+        bundles = graph_module.PROMPT_BUNDLES
+        await asyncio.gather(bundles.aget(ctx.phase_prompt_id, ttl=ttl), bundles.aget(ctx.forge_prompt_id, ttl=ttl))
+
+    def roles() -> list[tuple[str, bool, list[Any] | None]]:
+        phase = ctx.phase_model or ctx.model
+        forge = ctx.forge_model or ctx.model
+        found: list[tuple[str, bool, list[Any] | None]] = [
+            (phase, bool(ctx.phase_streaming), tools.DELEGATION_TOOLS_PHASE),
+            (forge, False, tools.TOOLS),
+            (forge, False, None),
+            (ctx.model, False, tools.TOOLS),
+            (ctx.model, False, None),
+        ]
+        if int(ctx.summary_trigger_tokens) > 0:
+            found.append((ctx.summary_model or ctx.model, False, None))
+        if int(ctx.forge_fanout) > 0:
+            found.append((forge, False, [*tools.TOOLS, *tools.FANOUT_TOOLS]))
+        return found
+
+    async def models() -> None:
+        for name, streaming, bound in roles():
+            utils.get_chat_model(name, streaming=streaming, tools=bound)
+
+    async def search() -> None:
+        if os.getenv("TAVILY_API_KEY"):
+            tools._tavily(int(ctx.max_search_results))
+
+    async def memory() -> None:
+        if int(ctx.memory_k) > 0:
+            importlib.import_module("react_agent.memory")
+
+    async def connections() -> None:
+        bases = {name: utils.get_chat_model(name) for name, _, _ in roles()}
+        await asyncio.gather(*(_open_connection(name, model) for name, model in bases.items()))
+
+    await step("graph", compile_graph)
+    await step("prompts", prompts)
+    await step("models", models)
+    await step("search", search)
+    await step("memory", memory)
+    if connect:
+        await step("connections", connections)
+    return report
+
+
+def warm_up_in_background(ctx: Context | None = None) -> threading.Thread | None:
+    """Start the loop-independent warm-up steps in a daemon thread, once per process.
+
+    Returns the thread, or None when WARMUP_ON_LOAD=0.
+    """
+    global _BACKGROUND
+    if os.environ.get("WARMUP_ON_LOAD", "1").strip().lower() in ("0", "false", "off", "no"):
+        return None
+    with _BACKGROUND_LOCK:
+        if _BACKGROUND is None:
+
+            def run() -> None:
+                report = asyncio.run(warm_up(ctx, connect=False))
+                logger.info("Background warm-up done: %s", report)
+
+            _BACKGROUND = threading.Thread(target=run, name="warmup", daemon=True)
+            _BACKGROUND.start()
+        return _BACKGROUND
+
+
+async def _open_connection(name: str, model: Any) -> None:
+    """Open a pooled connection for `model` (OpenAI-compatible clients only; others are skipped)."""
+    client = getattr(model, "root_async_client", None)
+    if client is None:
+        return
+    try:
+        await asyncio.wait_for(client.models.list(), CONNECT_TIMEOUT)
+    except Exception as e:  # an unreachable endpoint only costs the first request its handshake
+        logger.info("Could not pre-connect %s: %s", name, e)
@@ -0,0 +1,2 @@
+# SPDX-License-Identifier: MIT
+"""Offline benchmarks (run as modules, e.g. `python -m tests.benchmarks.bench_checkpoint`)."""
@@ -0,0 +1,69 @@
+# SPDX-License-Identifier: MIT
+"""Checkpoint size and save/load time per turn, with and without end-of-turn compaction.
+
+    python -m tests.benchmarks.bench_checkpoint [--turns 20]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+from react_agent.context import Context
+from react_agent.graph import builder
+
+from .replay import offline
+
+
+async def run(mode: str, turns: int) -> list[dict[str, Any]]:
+    saver = InMemorySaver()
+    app = builder.compile(checkpointer=saver)
+    config: Any = {"configurable": {"thread_id": f"bench-{mode}"}}
+    ctx = Context(turn_compaction=mode)
+    rows: list[dict[str, Any]] = []
+    for turn in range(1, turns + 1):
+        await app.ainvoke({"messages": [("user", "what time is it?")]}, config, context=ctx)
+        tup = saver.get_tuple(config)
+        assert tup is not None
+        started = time.perf_counter()
+        _, blob = saver.serde.dumps_typed(tup.checkpoint)
+        save_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        state = await app.aget_state(config)
+        load_ms = (time.perf_counter() - started) * 1000
+        rows.append(
+            {
+                "turn": turn,
+                "messages": len(state.values["messages"]),
+                "checkpoint_bytes": len(blob),
+                "save_ms": round(save_ms, 3),
+                "load_ms": round(load_ms, 3),
+            }
+        )
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args(argv)
+    report: dict[str, Any] = {}
+    with offline():
+        for mode in ("off", "digest"):
+            report[mode] = asyncio.run(run(mode, args.turns))
+    for mode, rows in report.items():
+        last = rows[-1]
+        sys.stdout.write(
+            f"{mode:>7}: turn {last['turn']}: {last['messages']} messages, {last['checkpoint_bytes']} B, "
+            f"save {last['save_ms']:.2f} ms, load {last['load_ms']:.2f} ms\n"
+        )
+    sys.stdout.write(json.dumps(report) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,82 @@
+# SPDX-License-Identifier: MIT
+"""Cold-start cost: import time and first-request latency, with and without warm-up.
+
+    python -m tests.benchmarks.bench_coldstart [--repeat 5] [--max-import-ms 50] [--max-graph-import-ms 2000]
+                                            [--max-first-request-ms 500]
+
+Every sample runs in a fresh interpreter. Models, prompts and search are
+served offline (see `replay.offline`), so the first request measures graph
+compilation, prompt loading and model construction, not provider latency.
+`client_import_ms` is the one-off cost of the provider client modules that
+`import react_agent` no longer pays and `warm_up()` moves off the first request.
+With `--max-import-ms`, `--max-graph-import-ms` or `--max-first-request-ms`
+the run fails when that median (`import react_agent`, `import
+react_agent.graph`, the cold first request) is slower.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Any
+
+# WARMUP_ON_LOAD=0: the cold first request stays cold, without the entry point's background warm-up.
+_PREAMBLE = "import time, json, asyncio, os\nos.environ['WARMUP_ON_LOAD'] = '0'\nt0 = time.perf_counter()\n"
+
+SNIPPETS = {
+    "import_ms": "import react_agent\n",
+    "graph_import_ms": "import react_agent.graph\n",
+    "client_import_ms": "import langchain_openai, langchain_tavily\n",
+    "first_request_ms": """
+from tests.benchmarks.replay import offline
+from react_agent.context import Context
+t0 = time.perf_counter()
+with offline():
+    from react_agent.graph import graph
+    asyncio.run(graph.ainvoke({"messages": [("user", "what time is it?")]}, context=Context()))
+""",
+    "first_request_warm_ms": """
+from tests.benchmarks.replay import offline
+from react_agent.context import Context
+from react_agent.warmup import warm_up
+with offline():
+    asyncio.run(warm_up(connect=False))
+    from react_agent.graph import graph
+    t0 = time.perf_counter()
+    asyncio.run(graph.ainvoke({"messages": [("user", "what time is it?")]}, context=Context()))
+""",
+}
+
+# measurement -> (command-line flag, what it times)
+LIMITS = {
+    "import_ms": ("--max-import-ms", "import react_agent"),
+    "graph_import_ms": ("--max-graph-import-ms", "import react_agent.graph"),
+    "first_request_ms": ("--max-first-request-ms", "the first request"),
+}
+
+
+def sample(snippet: str) -> float:
+    code = _PREAMBLE + snippet + "print(json.dumps((time.perf_counter() - t0) * 1000))\n"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m tests.benchmarks.bench_coldstart", description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per measurement; the median is reported.")
+    for name, (flag, what) in LIMITS.items():
+        parser.add_argument(flag, type=float, dest=name, help=f"Fail when {what} takes longer (median, ms).")
+    args = parser.parse_args(argv)
+    report: dict[str, Any] = {
+        name: round(statistics.median(sample(code) for _ in range(max(1, args.repeat))), 1) for name, code in SNIPPETS.items()
+    }
+    sys.stdout.write(json.dumps(report, indent=2) + "\n")
+    over = [(name, limit) for name in LIMITS if (limit := getattr(args, name)) is not None and report[name] > limit]
+    for name, limit in over:
+        sys.stderr.write(f"{LIMITS[name][1]} took {report[name]} ms (limit {limit} ms)\n")
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,120 @@
+# SPDX-License-Identifier: MIT
+"""Wall time of a multi-part research turn: serial Forge rounds vs. one batch vs. parallel fan-out.
+
+    python -m tests.benchmarks.bench_fanout [--subqueries 3] [--model-latency 0.3] [--search-latency 0.5]
+
+Models and search are offline with fixed latencies, so the numbers show the
+critical path of each strategy, not provider speed:
+
+- `serial`: Phase delegates one sub-question per Phase↔Forge round (search,
+  synthesis, handoff), the way the graph works without fan-out;
+- `batched`: Forge issues every search in one message (the `tools` node runs
+  them concurrently), then synthesizes once;
+- `fanout`: Forge calls `research_parallel`; each sub-query runs as its own
+  `research` branch (Forge step + search), merged before one synthesis.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from typing import Any
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from react_agent.context import Context
+from react_agent.graph import builder
+
+from .replay import ReplayChatModel, offline
+
+
+def _parts(messages: list[BaseMessage]) -> list[str]:
+    question = next(str(m.content) for m in reversed(messages) if isinstance(m, HumanMessage))
+    return [p.strip() for p in question.split(";") if p.strip()]
+
+
+def _searched(messages: list[BaseMessage]) -> int:
+    turn: list[BaseMessage] = []
+    for m in reversed(messages):
+        if isinstance(m, HumanMessage):
+            break
+        turn.append(m)
+    return sum(isinstance(m, ToolMessage) and m.name == "search" for m in turn)
+
+
+def _phase(model: ReplayChatModel, messages: list[BaseMessage], done: bool) -> AIMessage:
+    if isinstance(messages[-1], ToolMessage) and done:
+        return AIMessage(content="Here is everything you asked for.")
+    return AIMessage(content="", tool_calls=[{"id": f"d{len(messages)}", "name": "delegate_phase_to_forge", "args": {}}])
+
+
+def serial(model: ReplayChatModel, messages: list[BaseMessage]) -> AIMessage:
+    """One sub-question per round: Forge searches it, synthesizes and hands back; Phase delegates the next."""
+    parts, searched = _parts(messages), _searched(messages)
+    if "delegate_phase_to_forge" in model.tools:
+        return _phase(model, messages, searched >= len(parts))
+    if "search" in model.tools:
+        return AIMessage(content="", tool_calls=[{"id": f"s{searched}", "name": "search", "args": {"query": parts[searched]}}])
+    return AIMessage(content="Findings: " + "one relevant fact. " * 20)
+
+
+def batched(model: ReplayChatModel, messages: list[BaseMessage]) -> AIMessage:
+    """Forge searches every sub-question in one message."""
+    parts = _parts(messages)
+    if "delegate_phase_to_forge" in model.tools:
+        return _phase(model, messages, True)
+    if "search" in model.tools:
+        calls = [{"id": f"s{i}", "name": "search", "args": {"query": q}} for i, q in enumerate(parts)]
+        return AIMessage(content="", tool_calls=calls)
+    return AIMessage(content="Findings: " + "one relevant fact. " * 20)
+
+
+def fanout(model: ReplayChatModel, messages: list[BaseMessage]) -> AIMessage:
+    """Forge splits the task with research_parallel; each branch searches its sub-query."""
+    if "delegate_phase_to_forge" in model.tools:
+        return _phase(model, messages, True)
+    if "research_parallel" in model.tools:
+        return AIMessage(content="", tool_calls=[{"id": "r1", "name": "research_parallel", "args": {"queries": _parts(messages)}}])
+    if "search" in model.tools:
+        query = str(messages[-1].content)
+        return AIMessage(content="", tool_calls=[{"id": "s0", "name": "search", "args": {"query": query}}])
+    return AIMessage(content="Findings: " + "one relevant fact. " * 20)
+
+
+STRATEGIES = {"serial": serial, "batched": batched, "fanout": fanout}
+
+
+async def run(strategy: str, question: str, subqueries: int) -> dict[str, Any]:
+    ctx = Context(
+        max_phase_forge=subqueries + 1,
+        forge_fanout=subqueries if strategy == "fanout" else 0,
+        summary_trigger_tokens=0,
+    )
+    started = time.perf_counter()
+    out = await builder.compile().ainvoke({"messages": [("user", question)]}, context=ctx, config={"recursion_limit": 100})
+    return {"wall_ms": (time.perf_counter() - started) * 1000, "llm_calls": out["llm_calls"]}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m tests.benchmarks.bench_fanout", description=__doc__.splitlines()[0])
+    parser.add_argument("--subqueries", type=int, default=3)
+    parser.add_argument("--model-latency", type=float, default=0.3, help="Seconds per model call.")
+    parser.add_argument("--search-latency", type=float, default=0.5, help="Seconds per search.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per strategy; the median is reported.")
+    args = parser.parse_args(argv)
+    question = "; ".join(f"latest figures for region {i}" for i in range(1, args.subqueries + 1))
+    report: dict[str, Any] = {}
+    for name, responder in STRATEGIES.items():
+        with offline(responder, latency=args.model_latency, search_latency=args.search_latency):
+            runs = [asyncio.run(run(name, question, args.subqueries)) for _ in range(max(1, args.repeat))]
+        report[name] = {"wall_ms": round(statistics.median(r["wall_ms"] for r in runs), 1), "llm_calls": runs[-1]["llm_calls"]}
+    for name, row in report.items():
+        row["speedup_vs_serial"] = round(report["serial"]["wall_ms"] / row["wall_ms"], 2)
+    sys.stdout.write(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
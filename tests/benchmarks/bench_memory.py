@@ -0,0 +1,93 @@
+# SPDX-License-Identifier: MIT
+"""Long-term memory cost: append and recall latency, disk and RAM per 10k stored turns.
+
+    python -m tests.benchmarks.bench_memory [--turns 10000] [--queries 200] [--dim 256]
+
+Turns are synthetic (a few topic words out of a 5k-word vocabulary plus
+filler), embedded with the default hashing embedder and stored in a fresh
+index in a temporary directory. `recall_ms` covers embedding the query,
+scoring every row and reading the top-k records. `heap_kib` is the Python heap
+held by a reopened index (the vectors stay in the page cache via the
+memory map, counted in `vectors_kib`).
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+from react_agent.memory import HashingEmbedder, MemoryStore, VectorIndex
+
+VOCAB = [f"w{i}" for i in range(5000)]
+
+
+def _turn(rng: random.Random) -> tuple[str, str]:
+    topic = " ".join(rng.sample(VOCAB, 6))
+    return f"Tell me about {topic}.", f"Here is what I know about {topic}. " + "Some longer explanation. " * 8
+
+
+def _percentile(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def run(turns: int, queries: int, dim: int, k: int) -> dict[str, Any]:
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as root:
+        store = MemoryStore(Path(root), HashingEmbedder(dim))
+        asked: list[str] = []
+        started = time.perf_counter()
+        for i in range(turns):
+            user, answer = _turn(rng)
+            store.remember("bench", f"t{i}", user, answer)
+            asked.append(user)
+        append_ms = (time.perf_counter() - started) * 1000 / turns
+
+        latencies: list[float] = []
+        hits = 0
+        for i in range(queries):
+            target = rng.randrange(turns)
+            started = time.perf_counter()
+            found = store.recall("bench", asked[target], k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits += any(m.id == f"t{target}" for m in found)
+
+        path = store.index("bench")._vectors.parent
+        tracemalloc.start()
+        reopened = VectorIndex(path, dim)
+        heap = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        assert len(reopened) == turns
+        return {
+            "turns": turns,
+            "append_ms": round(append_ms, 3),
+            "recall_ms_p50": round(statistics.median(latencies), 3),
+            "recall_ms_p95": round(_percentile(latencies, 95), 3),
+            "recall_hit_rate": round(hits / queries, 3),
+            "vectors_kib": round((path / "vectors.f32").stat().st_size / 1024, 1),
+            "records_kib": round((path / "turns.jsonl").stat().st_size / 1024, 1),
+            "heap_kib": round(heap / 1024, 1),
+        }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m tests.benchmarks.bench_memory", description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args(argv)
+    sizes = sorted({max(1, args.turns // 10), args.turns})
+    report = {str(n): run(n, args.queries, args.dim, args.k) for n in sizes}
+    sys.stdout.write(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,237 @@
+# SPDX-License-Identifier: MIT
+"""Load test: the throughput ceiling of one worker running the compiled graph.
+
+    python -m tests.benchmarks.loadtest [--ramp 10,50,100,200] [--step-seconds 15] [--latency lognormal:0.4,0.5]
+                                        [--search-latency 0.3] [--script lookup] [--stream] [--stub URL] [--out report.json]
+
+The graph runs in this process with its real clients (ChatOpenAI, Tavily):
+`OPENAI_BASE_URL` and `TAVILY_API_BASE_URL` point them at `stub_server`,
+started in a subprocess unless `--stub` names a running one. Prompts come from
+the offline fallback. After `warmup.warm_up`, each ramp step runs that many
+simulated users for `--step-seconds`; a user sends one message after another
+(closed loop) and starts a new thread every `--turns-per-thread` turns.
+Threads stay in the in-memory checkpointer across steps, like a worker that
+has been up a while.
+
+Per step the report holds turns per second, turn latency (p50/p95/p99), node
+and model-call latency per node from the graph's own metrics, the mean time
+per node run spent outside the model call (`graph.py`, message trimming,
+prompt assembly), event-loop lag and resident memory. The step after which
+throughput stops growing is the ceiling; run with `--latency 0` to see the
+orchestration cost on its own.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Iterator
+from uuid import uuid4
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+from react_agent import utils
+from react_agent.bundles import BundleStore
+from react_agent.cache import SEARCH_CACHE
+from react_agent.context import Context
+from react_agent.graph import builder
+from react_agent.metrics import METRICS, Labels
+from react_agent.warmup import warm_up
+
+from .replay import graph_module
+from .stub_server import stub_env
+
+ROOT = Path(__file__).resolve().parents[2]
+LAG_INTERVAL = 0.01  # seconds between event-loop probes
+
+
+class Recorder:
+    """Metrics sink keeping the raw node and model-call timings of one step."""
+
+    def __init__(self) -> None:
+        self.samples: dict[tuple[str, str], list[float]] = defaultdict(list)
+
+    def emit(self, kind: str, name: str, value: float, labels: Labels) -> None:
+        if kind == "histogram" and name in ("node_ms", "llm_ms"):
+            self.samples[(name.removesuffix("_ms"), dict(labels).get("node", ""))].append(value)
+
+    def report(self) -> dict[str, Any]:
+        nodes = {node: _summary(v) for (kind, node), v in sorted(self.samples.items()) if kind == "node"}
+        llm = {node: _summary(v) for (kind, node), v in sorted(self.samples.items()) if kind == "llm"}
+        outside = {
+            node: round((sum(self.samples[("node", node)]) - sum(self.samples[("llm", node)])) / len(self.samples[("node", node)]), 2)
+            for node in llm
+            if self.samples.get(("node", node))
+        }
+        return {"node_ms": nodes, "llm_ms": llm, "outside_llm_ms": outside}
+
+
+def _percentile(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def _summary(samples: list[float]) -> dict[str, Any]:
+    if not samples:
+        return {"count": 0}
+    return {
+        "count": len(samples),
+        "p50": round(statistics.median(samples), 2),
+        "p95": round(_percentile(samples, 95), 2),
+        "p99": round(_percentile(samples, 99), 2),
+    }
+
+
+def _rss_mib() -> float:
+    """Resident memory now (peak where /proc is unavailable)."""
+    with contextlib.suppress(OSError):
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1024), 1)
+
+
+@contextlib.contextmanager
+def stub_process(argv: list[str]) -> Iterator[str]:
+    """Run `stub_server` in a subprocess; yield its base URL."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "tests.benchmarks.stub_server", "--port", "0", *argv],
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert proc.stdout is not None
+        line = proc.stdout.readline()
+        if not line.startswith("listening on "):
+            raise RuntimeError(f"stub server did not start (exit code {proc.poll()})")
+        yield line.removeprefix("listening on ").strip()
+    finally:
+        proc.terminate()
+        proc.wait(10)
+
+
+@contextlib.contextmanager
+def pointed_at(url: str, recorder: Recorder) -> Iterator[None]:
+    """Send the graph's model and search traffic to the stub at `url` and record its metrics."""
+    saved = utils.MODEL_REGISTRY, graph_module.PROMPT_BUNDLES, METRICS.enabled
+    utils.MODEL_REGISTRY = utils.ModelRegistry()
+    graph_module.PROMPT_BUNDLES = BundleStore(offline=True)
+    SEARCH_CACHE.clear()
+    METRICS.sinks.append(recorder)
+    METRICS.enabled = True
+    try:
+        with stub_env(url):
+            yield
+    finally:
+        METRICS.sinks.remove(recorder)
+        utils.MODEL_REGISTRY, graph_module.PROMPT_BUNDLES, METRICS.enabled = saved
+
+
+async def _loop_lag(samples: list[float]) -> None:
+    """Record how late the event loop wakes a sleeper, every LAG_INTERVAL seconds."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        samples.append((time.perf_counter() - started - LAG_INTERVAL) * 1000)
+
+
+async def _user(app: Any, ctx: Context, user: int, until: float, turns_per_thread: int, latencies: list[float], errors: Counter[str]) -> None:
+    """Send messages back to back until `until`, on a new thread every `turns_per_thread` turns."""
+    turn, thread_id = 0, str(uuid4())
+    while time.perf_counter() < until:
+        if turn and turn % turns_per_thread == 0:
+            thread_id = str(uuid4())
+        message = f"User {user}, question {turn}: what are the latest figures for region {turn % 50}?"
+        started = time.perf_counter()
+        try:
+            await app.ainvoke({"messages": [("user", message)]}, {"configurable": {"thread_id": thread_id}}, context=ctx)
+            latencies.append((time.perf_counter() - started) * 1000)
+        except Exception as e:
+            errors[type(e).__name__] += 1
+        turn += 1
+
+
+async def step(app: Any, ctx: Context, users: int, seconds: float, turns_per_thread: int, recorder: Recorder) -> dict[str, Any]:
+    """Run `users` simulated users for `seconds` and report the step."""
+    gc.collect()
+    rss_start = _rss_mib()
+    recorder.samples.clear()
+    latencies: list[float] = []
+    lag: list[float] = []
+    errors: Counter[str] = Counter()
+    probe = asyncio.create_task(_loop_lag(lag))
+    started = time.perf_counter()
+    until = started + seconds
+    await asyncio.gather(*(_user(app, ctx, i, until, max(1, turns_per_thread), latencies, errors) for i in range(users)))
+    elapsed = time.perf_counter() - started
+    probe.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await probe
+    return {
+        "users": users,
+        "turns": len(latencies),
+        "errors": dict(errors),
+        "turns_per_s": round(len(latencies) / elapsed, 2),
+        "turn_ms": _summary(latencies),
+        **recorder.report(),
+        "loop_lag_ms": {**_summary(lag), "max": round(max(lag, default=0.0), 2)},
+        "rss_mib": {"start": rss_start, "end": _rss_mib()},
+    }
+
+
+async def run(url: str, ramp: list[int], seconds: float, turns_per_thread: int, stream: bool) -> dict[str, Any]:
+    recorder = Recorder()
+    with pointed_at(url, recorder):
+        app = builder.compile(checkpointer=InMemorySaver())
+        ctx = Context(phase_streaming=stream)
+        warmed = await warm_up(ctx)
+        rss_start = _rss_mib()
+        steps = []
+        for users in ramp:
+            steps.append(await step(app, ctx, users, seconds, turns_per_thread, recorder))
+            sys.stderr.write(f"{users:>5} users: {steps[-1]['turns_per_s']} turns/s, p95 {steps[-1]['turn_ms'].get('p95')} ms\n")
+    best = max(steps, key=lambda s: s["turns_per_s"])
+    return {
+        "warmup_ms": warmed,
+        "steps": steps,
+        "ceiling": {"users": best["users"], "turns_per_s": best["turns_per_s"]},
+        "rss_growth_mib": round(steps[-1]["rss_mib"]["end"] - rss_start, 1),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m tests.benchmarks.loadtest", description=__doc__.splitlines()[0])
+    parser.add_argument("--ramp", default="10,50,100,200", help="Comma-separated user counts, one step each.")
+    parser.add_argument("--step-seconds", type=float, default=15.0)
+    parser.add_argument("--turns-per-thread", type=int, default=5)
+    parser.add_argument("--stream", action="store_true", help="Stream Phase's calls (phase_streaming).")
+    parser.add_argument("--stub", help="Base URL of a running stub_server (default: start one).")
+    parser.add_argument("--latency", default="lognormal:0.4,0.5", help="Stub model latency (see stub_server).")
+    parser.add_argument("--search-latency", default="lognormal:0.3,0.5", help="Stub search latency.")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="Stub seconds between streamed chunks.")
+    parser.add_argument("--script", default="lookup", help="Stub reply script (see stub_server).")
+    parser.add_argument("--out", type=Path, help="Also write the report here.")
+    args = parser.parse_args(argv)
+    ramp = [int(n) for n in args.ramp.split(",") if n.strip()]
+    stub_args = ["--latency", args.latency, "--search-latency", args.search_latency, "--chunk-delay", str(args.chunk_delay), "--script", args.script]
+    with contextlib.nullcontext(args.stub) if args.stub else stub_process(stub_args) as url:
+        report = asyncio.run(run(url, ramp, args.step_seconds, args.turns_per_thread, args.stream))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+    sys.stdout.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
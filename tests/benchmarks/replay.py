@@ -0,0 +1,233 @@
+# SPDX-License-Identifier: MIT
+"""Offline stand-ins shared by the benchmarks.
+
+- `ReplayChatModel`: deterministic chat model; replies come from a responder.
+- `Cassette`: recorded model replies and Tavily payloads, replayed in order
+  per model role. Stored as YAML next to the VCR cassettes, under
+  `tests/cassettes/benchmarks/`; `recording()` fills it from the real clients
+  (`RecordingChatModel`, `ReplaySearch` with an inner client).
+- `offline()`: routes the graph's models, prompts and search through the above.
+- `stub_script()`: plays a scenario's responder from `stub_server`, so
+  cassettes can be recorded through the real clients without API keys.
+"""
+
+import asyncio
+import contextlib
+import importlib
+import os
+from pathlib import Path
+from typing import Any, Callable, Iterator, Sequence
+
+import yaml
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    ToolMessage,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from react_agent import tools, utils
+from react_agent.bundles import BundleStore
+from react_agent.cache import SEARCH_CACHE
+
+from .stub_server import Script, messages_of
+
+graph_module = importlib.import_module("react_agent.graph")
+
+Responder = Callable[["ReplayChatModel", list[BaseMessage]], AIMessage]
+SearchResponder = Callable[[str], dict[str, Any]]
+
+
+def lookup_turn(model: "ReplayChatModel", messages: list[BaseMessage]) -> AIMessage:
+    """Phase delegates once, Forge calls get_time once and writes notes, Phase answers."""
+    last = messages[-1]
+    if "delegate_phase_to_forge" in model.tools:
+        if isinstance(last, ToolMessage):
+            return AIMessage(content="Here is what I found. " * 10)
+        return AIMessage(content="", tool_calls=[{"id": f"d{len(messages)}", "name": "delegate_phase_to_forge", "args": {}}])
+    if "get_time" in model.tools:
+        return AIMessage(content="Plan: check the clock. " * 20, tool_calls=[{"id": f"t{len(messages)}", "name": "get_time", "args": {}}])
+    return AIMessage(content="Forge notes on the result. " * 60)
+
+
+def synthetic_search(query: str) -> dict[str, Any]:
+    """Tavily-shaped payload with ten long results."""
+    body = f"Background on {query}. " * 120
+    results = [
+        {"title": f"{query} #{i}", "url": f"https://example.org/{i % 7}", "content": body, "score": 1 - i / 20, "raw_content": None}
+        for i in range(10)
+    ]
+    return {"query": query, "answer": None, "images": [], "results": results, "response_time": 0.8}
+
+
+def role(model_tools: Sequence[str]) -> str:
+    """Cassette key of a model call: its bound tool set ('plain' when unbound)."""
+    return ",".join(sorted(model_tools)) or "plain"
+
+
+class Cassette:
+    """Recorded traffic for one scenario: model replies per role and search payloads per query."""
+
+    def __init__(self, data: dict[str, Any] | None = None) -> None:
+        self.models: dict[str, list[dict[str, Any]]] = dict((data or {}).get("models") or {})
+        self.search: dict[str, dict[str, Any]] = dict((data or {}).get("search") or {})
+        self._cursor: dict[str, int] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> "Cassette":
+        return cls(yaml.safe_load(path.read_text(encoding="utf-8")))
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"models": self.models, "search": self.search}
+        path.write_text(yaml.safe_dump(data, sort_keys=False, allow_unicode=True, width=120), encoding="utf-8")
+
+    def record_model(self, key: str, message: BaseMessage) -> None:
+        self.models.setdefault(key, []).append(message_to_dict(message))
+
+    def next_model(self, key: str) -> AIMessage | None:
+        replies = self.models.get(key) or []
+        i = self._cursor.get(key, 0)
+        if i >= len(replies):
+            return None
+        self._cursor[key] = i + 1
+        msg = messages_from_dict([replies[i]])[0]
+        return msg if isinstance(msg, AIMessage) else None
+
+    def responder(self, fallback: Responder) -> Responder:
+        """Replay recorded replies in order per role; script the rest with `fallback`."""
+
+        def respond(model: "ReplayChatModel", messages: list[BaseMessage]) -> AIMessage:
+            return self.next_model(role(model.tools)) or fallback(model, messages)
+
+        return respond
+
+    def searcher(self, fallback: SearchResponder) -> SearchResponder:
+        def search(query: str) -> dict[str, Any]:
+            return self.search.get(tools.normalize_query(query)) or fallback(query)
+
+        return search
+
+
+class ReplayChatModel(BaseChatModel):
+    """Deterministic chat model; replies come from `responder`, optionally after `latency` seconds."""
+
+    tools: tuple[str, ...] = ()
+    responder: Responder = lookup_turn
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "ReplayChatModel":  # type: ignore[override]
+        return self.model_copy(update={"tools": tuple(t.name for t in tools)})
+
+    def _generate(self, messages: list[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self.responder(self, messages))])
+
+    async def _agenerate(self, messages: list[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._generate(messages, stop)
+
+
+class RecordingChatModel(BaseChatModel):
+    """Pass calls through to a live model and append its replies to a cassette."""
+
+    inner: Any
+    bound: Any = None
+    tools: tuple[str, ...] = ()
+    cassette: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "recording"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "RecordingChatModel":  # type: ignore[override]
+        return self.model_copy(update={"bound": self.inner.bind_tools(tools, **kwargs), "tools": tuple(t.name for t in tools)})
+
+    def _generate(self, messages: list[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        reply = (self.bound or self.inner).invoke(messages)
+        self.cassette.record_model(role(self.tools), reply)
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    async def _agenerate(self, messages: list[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        reply = await (self.bound or self.inner).ainvoke(messages)
+        self.cassette.record_model(role(self.tools), reply)
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+
+class ReplaySearch:
+    """Stands in for a TavilySearch client."""
+
+    def __init__(
+        self, respond: SearchResponder, inner: Any = None, cassette: Cassette | None = None, latency: float = 0.0
+    ) -> None:
+        self.respond, self.inner, self.cassette, self.latency = respond, inner, cassette, latency
+
+    async def ainvoke(self, args: dict[str, Any]) -> dict[str, Any]:
+        query = str(args.get("query") or "")
+        if self.inner is None:
+            await asyncio.sleep(self.latency)
+            return self.respond(query)
+        payload: dict[str, Any] = await self.inner.ainvoke(args)
+        if self.cassette is not None:
+            self.cassette.search[tools.normalize_query(query)] = payload
+        return payload
+
+
+def stub_script(responder: Responder) -> Script:
+    """Return a `stub_server` script that answers each request like `responder` would."""
+
+    def script(body: dict[str, Any]) -> dict[str, Any]:
+        bound = tuple(t["function"]["name"] for t in body.get("tools") or ())
+        reply = responder(ReplayChatModel(tools=bound), messages_of(body))
+        return {"content": reply.content, "tool_calls": [{"name": c["name"], "args": c["args"]} for c in reply.tool_calls]}
+
+    return script
+
+
+@contextlib.contextmanager
+def offline(
+    responder: Responder = lookup_turn,
+    latency: float = 0.0,
+    search: SearchResponder = synthetic_search,
+    search_latency: float = 0.0,
+) -> Iterator[None]:
+    """Serve every model from ReplayChatModel, prompts from the offline fallback, search from `search`.
+
+    `latency` and `search_latency` add a fixed delay (seconds) to every model call and search.
+    """
+    saved = utils.load_chat_model, utils.MODEL_REGISTRY, graph_module.PROMPT_BUNDLES, tools._tavily
+    saved_key = os.environ.get("TAVILY_API_KEY")
+    utils.load_chat_model = lambda name, **kw: ReplayChatModel(responder=responder, latency=latency)
+    utils.MODEL_REGISTRY = utils.ModelRegistry()
+    graph_module.PROMPT_BUNDLES = BundleStore(offline=True)
+    tools._tavily = lambda n: ReplaySearch(search, latency=search_latency)  # type: ignore[assignment,return-value]
+    os.environ["TAVILY_API_KEY"] = saved_key or "offline"
+    SEARCH_CACHE.clear()
+    try:
+        yield
+    finally:
+        utils.load_chat_model, utils.MODEL_REGISTRY, graph_module.PROMPT_BUNDLES, tools._tavily = saved
+        if saved_key is None:
+            os.environ.pop("TAVILY_API_KEY", None)
+        SEARCH_CACHE.clear()
+
+
+@contextlib.contextmanager
+def recording(cassette: Cassette) -> Iterator[None]:
+    """Run against live models and Tavily, recording their replies into `cassette`."""
+    real_load, real_tavily = utils.load_chat_model, tools._tavily
+    saved_registry = utils.MODEL_REGISTRY
+    utils.load_chat_model = lambda name, **kw: RecordingChatModel(inner=real_load(name, **kw), cassette=cassette)
+    utils.MODEL_REGISTRY = utils.ModelRegistry()
+    tools._tavily = lambda n: ReplaySearch(synthetic_search, inner=real_tavily(n), cassette=cassette)  # type: ignore[assignment,return-value]
+    SEARCH_CACHE.clear()
+    try:
+        yield
+    finally:
+        utils.load_chat_model, utils.MODEL_REGISTRY, tools._tavily = real_load, saved_registry, real_tavily
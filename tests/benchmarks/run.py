@@ -0,0 +1,216 @@
+# SPDX-License-Identifier: MIT
+"""Offline benchmark suite for the Phase/Forge graph.
+
+    python -m tests.benchmarks.run [--scenario NAME ...] [--repeat 3] [--out report.json] [--compare old.json]
+    python -m tests.benchmarks.run --record          # live keys: refresh tests/cassettes/benchmarks/
+    python -m tests.benchmarks.run --record --stub   # same, the real clients against stub_server
+
+Each scenario runs against replayed model and Tavily traffic: the recorded
+cassette when one exists, the scenario's scripted model otherwise. The report
+holds wall time per node, LLM calls and prompt tokens per turn and the final
+checkpoint size. Counts are exact and timings are medians over `--repeat`
+runs, so reports from two commits can be compared with `--compare`.
+
+`--record` runs each scenario through the real OpenAI and Tavily clients and
+writes what they returned to `tests/cassettes/benchmarks/<scenario>.yaml`.
+With `--stub` the clients talk to an in-process `stub_server` that answers
+like the scenario's scripted model, so no keys are needed; the committed
+cassettes are recorded that way.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+from react_agent.bundles import BundleStore
+from react_agent.context import Context
+from react_agent.graph import builder
+from react_agent.history import TOKENS
+
+from .replay import (
+    Cassette,
+    graph_module,
+    offline,
+    recording,
+    stub_script,
+    synthetic_search,
+)
+from .scenarios import SCENARIOS, Scenario
+from .stub_server import StubServer, stub_env
+
+CASSETTES = Path(__file__).parents[1] / "cassettes" / "benchmarks"
+
+
+class Probe(AsyncCallbackHandler):
+    """Collects node wall time, model calls and prompt tokens from graph callbacks."""
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self.node_ms: dict[str, float] = defaultdict(float)
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self._open: dict[UUID, tuple[str, float]] = {}
+
+    async def on_chain_start(
+        self, serialized: Any, inputs: Any, *, run_id: UUID, metadata: dict[str, Any] | None = None, **kwargs: Any
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._open[run_id] = (str(node), time.perf_counter())
+
+    async def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._close(run_id)
+
+    async def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._close(run_id)
+
+    async def on_chat_model_start(
+        self, serialized: Any, messages: list[list[BaseMessage]], *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self.llm_calls += 1
+        self.prompt_tokens += TOKENS.total(messages[0])
+
+    def _close(self, run_id: UUID) -> None:
+        found = self._open.pop(run_id, None)
+        if found:
+            self.node_ms[found[0]] += (time.perf_counter() - found[1]) * 1000
+
+
+async def run_once(scenario: Scenario) -> dict[str, Any]:
+    saver = InMemorySaver()
+    app = builder.compile(checkpointer=saver)
+    probe = Probe()
+    config: Any = {"configurable": {"thread_id": scenario.name}, "callbacks": [probe]}
+    ctx = Context(**scenario.context)
+    started = time.perf_counter()
+    for text in scenario.turns:
+        await app.ainvoke({"messages": [("user", text)]}, config, context=ctx)
+    wall_ms = (time.perf_counter() - started) * 1000
+    tup = saver.get_tuple(config)
+    blob = saver.serde.dumps_typed(tup.checkpoint)[1] if tup else b""
+    turns = len(scenario.turns)
+    return {
+        "turns": turns,
+        "wall_ms": wall_ms,
+        "node_ms": dict(probe.node_ms),
+        "llm_calls_per_turn": probe.llm_calls / turns,
+        "prompt_tokens_per_turn": probe.prompt_tokens / turns,
+        "checkpoint_bytes": len(blob),
+    }
+
+
+def run_scenario(scenario: Scenario, repeat: int) -> dict[str, Any]:
+    path = CASSETTES / f"{scenario.name}.yaml"
+    runs = []
+    for _ in range(repeat):
+        cassette = Cassette.load(path) if path.exists() else Cassette()
+        with offline(cassette.responder(scenario.responder), search=cassette.searcher(synthetic_search)):
+            runs.append(asyncio.run(run_once(scenario)))
+    result = dict(runs[0])
+    result["wall_ms"] = round(statistics.median(r["wall_ms"] for r in runs), 2)
+    nodes = {n for r in runs for n in r["node_ms"]}
+    result["node_ms"] = {n: round(statistics.median(r["node_ms"].get(n, 0.0) for r in runs), 2) for n in sorted(nodes)}
+    result["prompt_tokens_per_turn"] = round(result["prompt_tokens_per_turn"], 1)
+    result["replayed"] = path.exists()
+    return result
+
+
+async def run_on_stub(scenario: Scenario) -> dict[str, Any]:
+    """Run the scenario with the real clients pointed at an in-process stub scripted like it."""
+    stub = StubServer(stub_script(scenario.responder))
+    server = await stub.start()
+    host, port = server.sockets[0].getsockname()[:2]
+    saved = graph_module.PROMPT_BUNDLES
+    graph_module.PROMPT_BUNDLES = BundleStore(offline=True)
+    try:
+        async with server:
+            try:
+                with stub_env(f"http://{host}:{port}"):
+                    return await run_once(scenario)
+            finally:
+                await stub.hang_up()
+    finally:
+        graph_module.PROMPT_BUNDLES = saved
+
+
+def record(scenario: Scenario, stub: bool = False) -> None:
+    cassette = Cassette()
+    with recording(cassette):
+        asyncio.run(run_on_stub(scenario) if stub else run_once(scenario))
+    cassette.save(CASSETTES / f"{scenario.name}.yaml")
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(old: dict[str, Any], new: dict[str, Any]) -> str:
+    lines = [f"{'scenario':<18} {'metric':<28} {'before':>12} {'after':>12} {'change':>8}"]
+    for name, after in new["scenarios"].items():
+        before = old.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        metrics = ["wall_ms", "llm_calls_per_turn", "prompt_tokens_per_turn", "checkpoint_bytes"]
+        pairs = [(m, before.get(m), after.get(m)) for m in metrics]
+        pairs += [(f"node:{n}", before.get("node_ms", {}).get(n), v) for n, v in after.get("node_ms", {}).items()]
+        for metric, a, b in pairs:
+            if a is None or b is None:
+                continue
+            change = f"{(b - a) / a * 100:+.0f}%" if a else "n/a"
+            lines.append(f"{name:<18} {metric:<28} {a:>12} {b:>12} {change:>8}")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m tests.benchmarks.run", description="Offline Phase/Forge benchmarks.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Scenario to run (default: all).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario; timings are medians.")
+    parser.add_argument("--out", type=Path, help="Write the JSON report here.")
+    parser.add_argument("--compare", type=Path, help="Earlier JSON report to diff against.")
+    parser.add_argument("--record", action="store_true", help="Record cassettes from live models and Tavily.")
+    parser.add_argument("--stub", action="store_true", help="With --record: record against the local stub_server instead.")
+    args = parser.parse_args(argv)
+    chosen = [SCENARIOS[n] for n in (args.scenario or sorted(SCENARIOS))]
+
+    if args.record:
+        for scenario in chosen:
+            record(scenario, stub=args.stub)
+            sys.stdout.write(f"recorded {scenario.name}\n")
+        return 0
+
+    report = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "scenarios": {s.name: run_scenario(s, max(1, args.repeat)) for s in chosen},
+    }
+    for name, r in report["scenarios"].items():
+        sys.stdout.write(
+            f"{name:<18} wall {r['wall_ms']:>9.1f} ms  calls/turn {r['llm_calls_per_turn']:>5.2f}  "
+            f"prompt tokens/turn {r['prompt_tokens_per_turn']:>8.1f}  checkpoint {r['checkpoint_bytes']:>8} B\n"
+        )
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.compare:
+        sys.stdout.write(compare(json.loads(args.compare.read_text(encoding="utf-8")), report))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
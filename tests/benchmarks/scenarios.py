@@ -0,0 +1,82 @@
+# SPDX-License-Identifier: MIT
+"""Benchmark scenarios: user turns, run context and the scripted model behaviour for offline runs."""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from .replay import ReplayChatModel, Responder
+
+
+def _is_summary_call(model: ReplayChatModel, messages: list[BaseMessage]) -> bool:
+    return not model.tools and isinstance(messages[-1], HumanMessage) and "running summary" in str(messages[-1].content)
+
+
+def chat(model: ReplayChatModel, messages: list[BaseMessage]) -> AIMessage:
+    """Phase answers directly."""
+    if _is_summary_call(model, messages):
+        return AIMessage(content="The user and the assistant have been chatting about their week. " * 4)
+    return AIMessage(content="That sounds lovely — tell me more about it. " * 6)
+
+
+def delegated_search(model: ReplayChatModel, messages: list[BaseMessage]) -> AIMessage:
+    """Phase delegates, Forge searches once, synthesizes, Phase answers."""
+    last = messages[-1]
+    if "delegate_phase_to_forge" in model.tools:
+        if isinstance(last, ToolMessage):
+            return AIMessage(content="Here is the latest, in short: " + "a calm summary. " * 12)
+        return AIMessage(content="", tool_calls=[{"id": f"d{len(messages)}", "name": "delegate_phase_to_forge", "args": {}}])
+    if "search" in model.tools:
+        query = str(next(m.content for m in reversed(messages) if isinstance(m, HumanMessage)))
+        return AIMessage(content="", tool_calls=[{"id": f"s{len(messages)}", "name": "search", "args": {"query": query}}])
+    return AIMessage(content="Findings: " + "one relevant fact. " * 40)
+
+
+def depth_cap(model: ReplayChatModel, messages: list[BaseMessage]) -> AIMessage:
+    """Phase keeps delegating and Forge keeps calling tools until the caps stop the turn."""
+    last = messages[-1]
+    if isinstance(last, ToolMessage) and str(last.content).startswith("Skipped"):
+        return AIMessage(content="I had to stop here.")
+    if "delegate_phase_to_forge" in model.tools:
+        return AIMessage(content="", tool_calls=[{"id": f"d{len(messages)}", "name": "delegate_phase_to_forge", "args": {}}])
+    if "get_time" in model.tools:
+        return AIMessage(content="", tool_calls=[{"id": f"t{len(messages)}", "name": "get_time", "args": {}}])
+    return AIMessage(content="still working")
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """One benchmark scenario."""
+
+    name: str
+    turns: tuple[str, ...]
+    responder: Responder
+    context: dict[str, Any] = field(default_factory=dict)
+
+
+_LOOKUPS = (
+    "latest news on the EU AI act",
+    "what time is it in Tokyo?",
+    "Can you look up the population of Peru?",
+    "Thanks! I had a great time in Lisbon last year, by the way.",
+)
+_LONG = "Today I walked along the river, met an old friend and we talked about music, work and travel plans. " * 6
+
+SCENARIOS: dict[str, Scenario] = {
+    s.name: s
+    for s in (
+        Scenario("chat", ("Hi! How was your day?",), chat),
+        Scenario("search", ("latest news on the EU AI act",), delegated_search),
+        # the same lookups with and without the rules pre-router (prerouter=rules skips Phase's delegating call)
+        Scenario("lookups", _LOOKUPS, delegated_search),
+        Scenario("lookups_prerouted", _LOOKUPS, delegated_search, {"prerouter": "rules"}),
+        Scenario("depth_cap", ("keep checking the time",), depth_cap, {"max_depth": 6}),
+        Scenario(
+            "long_thread",
+            tuple(f"{_LONG} (turn {i})" for i in range(30)),
+            chat,
+            {"phase_history_tokens": 4000, "summary_trigger_tokens": 3000},
+        ),
+    )
+}
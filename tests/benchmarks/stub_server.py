@@ -0,0 +1,317 @@
+# SPDX-License-Identifier: MIT
+"""Local stand-in for the OpenAI chat-completions and Tavily search APIs, for load tests.
+
+    python -m tests.benchmarks.stub_server [--port 8900] [--latency lognormal:0.4,0.5] [--search-latency 0.3] [--script lookup]
+
+Endpoints:
+
+- `POST /v1/chat/completions`: OpenAI chat completions, as a JSON reply or,
+  with `stream`, as SSE chunks (text deltas, tool-call deltas, a final
+  `usage` chunk when `stream_options.include_usage` is set, `[DONE]`);
+- `POST /search`: Tavily search (ten long results per query);
+- `GET /healthz`, `GET /stats` (requests served per endpoint).
+
+Point the real clients at it with `OPENAI_BASE_URL=<url>/v1` and
+`TAVILY_API_BASE_URL=<url>` (any API keys), or in-process with `stub_env`.
+The first line on stdout is `listening on <url>`.
+
+Latency specs (seconds, drawn per call): `0.3` (fixed), `uniform:0.1,0.5`,
+`lognormal:<median>,<sigma>`. The model latency is the time to the first
+byte; `--chunk-delay` adds a pause between streamed chunks.
+
+Scripts decide each reply from the request's bound tools and messages:
+
+- `lookup` (default): Phase delegates, Forge searches the user's message,
+  synthesizes, Phase answers;
+- `chat`: every call answers in text;
+- `package.module:function`: a callable taking the request body and
+  returning `{"content": str, "tool_calls": [{"name": ..., "args": {...}}]}`
+  (`messages_of` turns the body's messages into LangChain messages).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Any, Callable, Iterator
+from uuid import uuid4
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+
+from react_agent import tools
+from react_agent.gateway import HTTPError, Request, read_request, send_json
+
+Script = Callable[[dict[str, Any]], dict[str, Any]]
+Latency = Callable[[random.Random], float]
+
+ANSWER = "Here is what I found: the figures moved a little since last quarter. " * 4
+NOTES = "Forge notes on the search results, with the relevant numbers. " * 8
+
+
+def parse_latency(spec: str) -> Latency:
+    """Build a sampler from a latency spec (see the module docstring)."""
+    kind, _, args = spec.partition(":")
+    if not args:
+        fixed = float(kind or 0)
+        return lambda rng: fixed
+    a, _, b = args.partition(",")
+    if kind == "uniform":
+        lo, hi = float(a), float(b)
+        return lambda rng: rng.uniform(lo, hi)
+    if kind == "lognormal":
+        mu, sigma = math.log(float(a)), float(b or 0.5)
+        return lambda rng: rng.lognormvariate(mu, sigma)
+    raise ValueError(f"unknown latency spec {spec!r}")
+
+
+def _text(message: dict[str, Any]) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return "".join(str(p.get("text", "")) for p in content if isinstance(p, dict))
+    return str(content)
+
+
+def messages_of(body: dict[str, Any]) -> list[BaseMessage]:
+    """Return the request's messages as LangChain messages."""
+    out: list[BaseMessage] = []
+    for m in body.get("messages") or ():
+        role, text = m.get("role"), _text(m)
+        if role == "assistant":
+            calls = [
+                {"id": c["id"], "name": c["function"]["name"], "args": json.loads(c["function"]["arguments"] or "{}")}
+                for c in m.get("tool_calls") or ()
+            ]
+            out.append(AIMessage(content=text, tool_calls=calls))
+        elif role == "tool":
+            out.append(ToolMessage(content=text, tool_call_id=str(m.get("tool_call_id") or "")))
+        elif role in ("system", "developer"):
+            out.append(SystemMessage(content=text))
+        else:
+            out.append(HumanMessage(content=text))
+    return out
+
+
+def lookup(body: dict[str, Any]) -> dict[str, Any]:
+    """Phase delegates once, Forge searches the user's message and writes notes, Phase answers."""
+    tools = {t["function"]["name"] for t in body.get("tools") or ()}
+    messages = body.get("messages") or [{}]
+    if "delegate_phase_to_forge" in tools:
+        if messages[-1].get("role") == "tool":
+            return {"content": ANSWER}
+        return {"tool_calls": [{"name": "delegate_phase_to_forge", "args": {}}]}
+    if "search" in tools:
+        question = next((_text(m) for m in reversed(messages) if m.get("role") == "user"), "news")
+        return {"tool_calls": [{"name": "search", "args": {"query": question[:200]}}]}
+    return {"content": NOTES}
+
+
+def chat(body: dict[str, Any]) -> dict[str, Any]:
+    """Answer every call in text."""
+    return {"content": ANSWER}
+
+
+SCRIPTS: dict[str, Script] = {"lookup": lookup, "chat": chat}
+
+
+def load_script(spec: str) -> Script:
+    """Return the script named by `spec`: a built-in name or "package.module:function"."""
+    if spec in SCRIPTS:
+        return SCRIPTS[spec]
+    module, _, name = spec.partition(":")
+    script: Script = getattr(importlib.import_module(module), name)
+    return script
+
+
+@contextlib.contextmanager
+def stub_env(url: str) -> Iterator[None]:
+    """Point the OpenAI and Tavily clients built inside the block at the stub at `url`."""
+    env = {"OPENAI_BASE_URL": f"{url}/v1", "OPENAI_API_KEY": "stub", "TAVILY_API_BASE_URL": url, "TAVILY_API_KEY": "stub"}
+    saved = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)
+    tools._TAVILY.clear()
+    try:
+        yield
+    finally:
+        tools._TAVILY.clear()
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _tool_calls(reply: dict[str, Any]) -> list[dict[str, Any]]:
+    return [
+        {"id": f"call_{uuid4().hex[:24]}", "type": "function", "function": {"name": c["name"], "arguments": json.dumps(c.get("args") or {})}}
+        for c in reply.get("tool_calls") or ()
+    ]
+
+
+class StubServer:
+    """Serves the OpenAI and Tavily stand-ins; see the module docstring."""
+
+    def __init__(
+        self,
+        script: Script = lookup,
+        latency: Latency = lambda rng: 0.0,
+        search_latency: Latency = lambda rng: 0.0,
+        chunk_delay: float = 0.0,
+        seed: int = 7,
+    ) -> None:
+        """Reply with `script`, after delays drawn from `latency` / `search_latency`."""
+        self.script, self.latency, self.search_latency, self.chunk_delay = script, latency, search_latency, chunk_delay
+        self.stats: Counter[str] = Counter()
+        self._rng = random.Random(seed)
+        self._connections: dict[asyncio.StreamWriter, asyncio.Task[Any]] = {}
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.Server:
+        """Listen on `host:port` (port 0 picks a free one)."""
+        return await asyncio.start_server(self.handle, host, port, backlog=4096)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve keep-alive requests on one connection."""
+        task = asyncio.current_task()
+        if task is not None:
+            self._connections[writer] = task
+        try:
+            while (req := await read_request(reader)) is not None:
+                await self.dispatch(req, writer)
+                if not req.keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except HTTPError as e:
+            await send_json(writer, e.status, {"error": str(e)}, keep_alive=False)
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    async def hang_up(self) -> None:
+        """Close every open connection and wait for its handler, e.g. before stopping an in-process stub."""
+        open_now = dict(self._connections)
+        for writer in open_now:
+            writer.close()
+        await asyncio.gather(*open_now.values(), return_exceptions=True)
+
+    async def dispatch(self, req: Request, writer: asyncio.StreamWriter) -> None:
+        """Answer one request."""
+        route = req.path.rstrip("/")
+        self.stats[route] += 1
+        if req.method == "POST" and route in ("/v1/chat/completions", "/chat/completions"):
+            await self.completions(req.json(), writer, keep_alive=req.keep_alive)
+        elif req.method == "POST" and route == "/search":
+            await self.search(req.json(), writer, keep_alive=req.keep_alive)
+        elif req.method == "GET" and route in ("/healthz", "/stats"):
+            await send_json(writer, 200, {"status": "ok", "requests": dict(self.stats)}, keep_alive=req.keep_alive)
+        else:
+            await send_json(writer, 404, {"error": f"no route for {req.method} {req.path}"}, keep_alive=req.keep_alive)
+
+    async def completions(self, body: dict[str, Any], writer: asyncio.StreamWriter, *, keep_alive: bool) -> None:
+        """Reply like `POST /v1/chat/completions`."""
+        reply = self.script(body)
+        content, calls = str(reply.get("content") or ""), _tool_calls(reply)
+        prompt_tokens = _tokens(json.dumps(body.get("messages") or []))
+        completion_tokens = _tokens(content + "".join(c["function"]["arguments"] for c in calls))
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+        meta = {"id": f"chatcmpl-{uuid4().hex[:24]}", "created": int(time.time()), "model": body.get("model", "stub")}
+        finish = "tool_calls" if calls else "stop"
+        await asyncio.sleep(self.latency(self._rng))
+        if not body.get("stream"):
+            message = {"role": "assistant", "content": content or None, **({"tool_calls": calls} if calls else {})}
+            choice = {"index": 0, "message": message, "finish_reason": finish, "logprobs": None}
+            await send_json(writer, 200, {**meta, "object": "chat.completion", "choices": [choice], "usage": usage}, keep_alive=keep_alive)
+            return
+
+        def chunk(delta: dict[str, Any], finish_reason: str | None = None) -> dict[str, Any]:
+            choice = {"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}
+            return {**meta, "object": "chat.completion.chunk", "choices": [choice]}
+
+        events = [chunk({"role": "assistant", "content": ""})]
+        events += [chunk({"content": piece}) for piece in _pieces(content)]
+        events += [chunk({"tool_calls": [{"index": i, **c}]}) for i, c in enumerate(calls)]
+        events.append(chunk({}, finish))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            events.append({**meta, "object": "chat.completion.chunk", "choices": [], "usage": usage})
+        head = "HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n"
+        writer.write(f"{head}Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode())
+        for i, event in enumerate([*map(json.dumps, events), "[DONE]"]):
+            if i and self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+            payload = f"data: {event}\n\n".encode()
+            writer.write(f"{len(payload):x}\r\n".encode() + payload + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def search(self, body: dict[str, Any], writer: asyncio.StreamWriter, *, keep_alive: bool) -> None:
+        """Reply like Tavily's `POST /search`."""
+        started = time.perf_counter()
+        query = str(body.get("query") or "")
+        await asyncio.sleep(self.search_latency(self._rng))
+        text = f"Background on {query}. " * 60
+        results = [
+            {"title": f"{query} #{i}", "url": f"https://example.org/{i}", "content": text, "score": round(1 - i / 20, 2), "raw_content": None}
+            for i in range(int(body.get("max_results") or 5))
+        ]
+        payload = {"query": query, "follow_up_questions": None, "answer": None, "images": [], "results": results}
+        await send_json(writer, 200, {**payload, "response_time": round(time.perf_counter() - started, 3)}, keep_alive=keep_alive)
+
+
+def _pieces(text: str, size: int = 16) -> list[str]:
+    """Split a streamed reply into word-aligned chunks of about `size` characters."""
+    pieces, current = [], ""
+    for word in text.split(" "):
+        current = f"{current} {word}" if current else word
+        if len(current) >= size:
+            pieces.append(current + " ")
+            current = ""
+    return [*pieces, current] if current else pieces
+
+
+async def run(args: argparse.Namespace) -> None:
+    stub = StubServer(
+        load_script(args.script), parse_latency(args.latency), parse_latency(args.search_latency), args.chunk_delay
+    )
+    server = await stub.start(args.host, args.port)
+    host, port = server.sockets[0].getsockname()[:2]
+    sys.stdout.write(f"listening on http://{host}:{port}\n")
+    sys.stdout.flush()
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m tests.benchmarks.stub_server", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900, help="0 picks a free port.")
+    parser.add_argument("--latency", default="0", help="Model time to first byte (latency spec).")
+    parser.add_argument("--search-latency", default="0", help="Search latency (latency spec).")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="Seconds between streamed chunks.")
+    parser.add_argument("--script", default="lookup", help="lookup, chat or package.module:function.")
+    args = parser.parse_args(argv)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
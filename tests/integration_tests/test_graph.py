@@ -4,8 +4,8 @@ from typing import Any, Awaitable, Callable, TypeVar, cast
 import pytest
 from langsmith import unit
 
-from react_agent import graph
 from react_agent.context import Context
+from react_agent.graph import graph
 
 F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
 
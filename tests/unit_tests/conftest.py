@@ -0,0 +1,125 @@
+# SPDX-License-Identifier: MIT
+"""Offline stand-ins for the chat models and prompt store used by the graph."""
+
+import asyncio
+import importlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Iterator, Sequence
+
+import pytest
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from react_agent import utils
+from react_agent.bundles import BundleStore
+
+# Tests build their own models; no background warm-up when a test module imports `graph`.
+os.environ["WARMUP_ON_LOAD"] = "0"
+graph_module = importlib.import_module("react_agent.graph")
+
+Responder = Callable[["ScriptedChatModel", list[BaseMessage]], AIMessage]
+
+
+def default_responder(model: "ScriptedChatModel", messages: list[BaseMessage]) -> AIMessage:
+    """Phase always delegates, Forge always calls get_time, everyone else answers."""
+    last = messages[-1] if messages else None
+    if isinstance(last, ToolMessage) and str(last.content).startswith("Skipped"):
+        return AIMessage(content="final answer")
+    if "delegate_phase_to_forge" in model.tools:
+        return AIMessage(content="", tool_calls=[{"id": f"d{len(messages)}", "name": "delegate_phase_to_forge", "args": {}}])
+    if "get_time" in model.tools:
+        return AIMessage(content="", tool_calls=[{"id": f"t{len(messages)}", "name": "get_time", "args": {}}])
+    return AIMessage(content="synthesized")
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Deterministic chat model; replies come from `responder`."""
+
+    model_id: str = "fake/model"
+    tools: tuple[str, ...] = ()
+    responder: Responder = default_responder
+    calls: Any = None  # shared call log (kept by identity)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "ScriptedChatModel":  # type: ignore[override]
+        return self.model_copy(update={"tools": tuple(t.name for t in tools)})
+
+    def _generate(self, messages: list[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.calls is not None:
+            self.calls.append(self.tools)
+        return ChatResult(generations=[ChatGeneration(message=self.responder(self, messages))])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Any = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(0)  # yield so concurrent runs interleave
+        return self._generate(messages, stop, **kwargs)
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Any = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if self.calls is not None:
+            self.calls.append(self.tools)
+        reply = self.responder(self, messages)
+        text = str(reply.content)
+        pieces = [p + " " for p in text.split(" ")[:-1]] + text.split(" ")[-1:] if text else []
+        for piece in pieces:
+            await asyncio.sleep(0)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece, id=reply.id))
+            if run_manager is not None:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+        if reply.tool_calls:
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[
+                        {"id": tc["id"], "name": tc["name"], "args": json.dumps(tc["args"]), "index": i}
+                        for i, tc in enumerate(reply.tool_calls)
+                    ],
+                )
+            )
+
+
+@dataclass
+class FakeLLM:
+    """Handle returned by the `fake_llm` fixture."""
+
+    calls: list[tuple[str, ...]] = field(default_factory=list)
+    responder: Responder = default_responder
+
+
+@pytest.fixture
+def fake_llm(monkeypatch: pytest.MonkeyPatch) -> Iterator[FakeLLM]:
+    """Route every model load through ScriptedChatModel and serve prompts offline.
+
+    `calls` logs the bound tool names per model call; assign `responder` to
+    script replies.
+    """
+    fake = FakeLLM()
+
+    def respond(model: ScriptedChatModel, messages: list[BaseMessage]) -> AIMessage:
+        return fake.responder(model, messages)
+
+    def load(name: str, **kwargs: Any) -> ScriptedChatModel:
+        return ScriptedChatModel(model_id=name, calls=fake.calls, responder=respond)
+
+    monkeypatch.setattr(utils, "load_chat_model", load)
+    monkeypatch.setattr(utils, "MODEL_REGISTRY", utils.ModelRegistry())
+    monkeypatch.setattr(graph_module, "PROMPT_BUNDLES", BundleStore(offline=True))
+    yield fake
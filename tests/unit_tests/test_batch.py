@@ -0,0 +1,92 @@
+# SPDX-License-Identifier: MIT
+import io
+import json
+
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage
+
+from react_agent.batch import Conversation, read_conversations, run_batch, run_file
+from react_agent.ratelimit import RATE_LIMITS
+
+from .conftest import FakeLLM, ScriptedChatModel
+
+
+def _echo(model: ScriptedChatModel, messages: list[BaseMessage]) -> AIMessage:
+    if "delegate_phase_to_forge" in model.tools:
+        return AIMessage(content=f"echo: {messages[-1].content}", usage_metadata={"input_tokens": 10, "output_tokens": 2, "total_tokens": 12})
+    return AIMessage(content="summary")
+
+
+def test_read_conversations_accepts_turns_or_messages() -> None:
+    lines = [
+        '{"id": "a", "turns": ["hi", "bye"], "context": {"max_depth": 5}}',
+        "",
+        '{"messages": [{"role": "system", "content": "x"}, {"role": "user", "content": "hello"}]}',
+    ]
+    convs = list(read_conversations(lines))
+    assert convs[0] == Conversation("a", ("hi", "bye"), {"max_depth": 5})
+    assert (convs[1].id, convs[1].turns) == ("3", ("hello",))
+
+
+def test_malformed_lines_become_error_rows(fake_llm: FakeLLM, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(RATE_LIMITS, "limits", {})
+    fake_llm.responder = _echo
+    source = io.StringIO('{"id": "a", "turns": ["hello"]}\n{"id": "b", "turns": [\n[1, 2]\n{"id": "c", "turns": ["bye"]}\n')
+    sink = io.StringIO()
+    summary = run_file(source, sink, rate_limits="")
+
+    by_id = {r["id"]: r for r in map(json.loads, sink.getvalue().splitlines())}
+    assert by_id["a"]["answers"] == ["echo: hello"] and by_id["c"]["answers"] == ["echo: bye"]
+    assert by_id["2"]["error"].startswith("line 2: JSONDecodeError")
+    assert by_id["3"]["error"] == "line 3: ValueError: expected a JSON object, got list"
+    assert summary["conversations"] == 4 and summary["errors"] == 2
+
+
+@pytest.mark.asyncio
+async def test_run_batch_runs_every_conversation_on_its_own_thread(fake_llm: FakeLLM) -> None:
+    fake_llm.responder = _echo
+    convs = [Conversation(str(i), (f"q{i}", f"r{i}")) for i in range(6)]
+    results = await run_batch(convs, concurrency=3)
+
+    assert sorted(r["id"] for r in results) == [str(i) for i in range(6)]
+    for r in results:
+        assert r["error"] is None
+        assert r["answers"] == [f"echo: q{r['id']}", f"echo: r{r['id']}"]
+        assert r["metrics"]["llm_calls"] == 2
+        assert r["metrics"]["usage"]["input_tokens"] == 20
+
+
+@pytest.mark.asyncio
+async def test_failing_conversation_is_reported_not_raised(fake_llm: FakeLLM) -> None:
+    fake_llm.responder = _echo
+    results = await run_batch([Conversation("bad", ("q",), {"no_such_field": 1}), Conversation("ok", ("q",))])
+    by_id = {r["id"]: r for r in results}
+    assert by_id["bad"]["error"].startswith("TypeError")
+    assert by_id["ok"]["answers"] == ["echo: q"]
+
+
+def test_run_file_writes_jsonl_and_summary(fake_llm: FakeLLM, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(RATE_LIMITS, "limits", {})  # restored after the test
+    fake_llm.responder = _echo
+    source = io.StringIO("\n".join(json.dumps({"id": i, "turns": ["hello"]}) for i in range(4)))
+    sink = io.StringIO()
+    summary = run_file(source, sink, concurrency=2, rate_limits="openai:rpm=6000")
+
+    lines = [json.loads(line) for line in sink.getvalue().splitlines()]
+    assert len(lines) == 4
+    assert summary["conversations"] == 4 and summary["errors"] == 0
+    assert summary["llm_calls"] == 4
+    assert "openai" in summary["rate_limit_wait_s"]
+
+
+def test_run_file_on_a_process_pool_writes_every_conversation(fake_llm: FakeLLM, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(RATE_LIMITS, "limits", {})
+    fake_llm.responder = _echo  # pool workers are forked with the fake in place
+    source = io.StringIO("\n".join(json.dumps({"id": i, "turns": [f"q{i}"]}) for i in range(5)))
+    sink = io.StringIO()
+    summary = run_file(source, sink, concurrency=1, processes=2, rate_limits="")
+
+    lines = [json.loads(line) for line in sink.getvalue().splitlines()]
+    assert sorted(r["id"] for r in lines) == [str(i) for i in range(5)]
+    assert all(r["answers"] == [f"echo: q{r['id']}"] for r in lines)
+    assert summary["conversations"] == 5 and summary["errors"] == 0
@@ -0,0 +1,77 @@
+# SPDX-License-Identifier: MIT
+import asyncio
+import time
+from typing import Any
+
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+
+from react_agent import budget, utils
+from react_agent.budget import Stage
+from react_agent.context import Context
+from react_agent.graph import builder
+from react_agent.prompts import ANSWER_NOW_NOTE
+
+from .conftest import FakeLLM, ScriptedChatModel
+
+
+def test_stages_follow_the_share_of_forge_time_left() -> None:
+    ctx = Context(turn_budget_s=10.0, answer_reserve_s=2.0)  # Forge has 8 s
+    deadline = budget.turn_deadline(ctx, 100.0)
+    assert deadline == 110.0
+    assert budget.stage(ctx, deadline, now=101.0) is Stage.FULL
+    assert budget.stage(ctx, deadline, now=104.5) is Stage.LEAN_SEARCH
+    assert budget.stage(ctx, deadline, now=106.5) is Stage.DIRECT_HANDOFF
+    assert budget.stage(ctx, deadline, now=108.0) is Stage.ANSWER_NOW
+    assert budget.phase_deadline(ctx, deadline, now=109.5) == 111.5  # Phase always gets the reserve
+    assert budget.turn_deadline(Context(turn_budget_s=0.0), 100.0) == 0.0
+    assert budget.stage(ctx, 0.0) is Stage.FULL
+
+
+def test_timeouts_are_capped_by_the_deadline() -> None:
+    assert budget.capped(20.0, 0.0) == 20.0
+    assert budget.capped(20.0, time.time() + 5) <= 5.0
+    assert 0 < budget.capped(0.0, time.time() - 1) <= budget.MIN_TIMEOUT
+
+
+def test_search_asks_for_fewer_results_late_in_the_turn() -> None:
+    ctx = Context(turn_budget_s=10.0, answer_reserve_s=2.0, max_search_results=10)
+    assert budget.search_results(ctx) == 10
+    with budget.tool_deadline(time.time() + 6.0):
+        assert budget.search_results(ctx) == 10
+    with budget.tool_deadline(time.time() + 2.0):
+        assert budget.search_results(ctx) == budget.LEAN_SEARCH_RESULTS
+
+
+@pytest.mark.asyncio
+async def test_slow_forge_degrades_to_an_answer_within_budget(fake_llm: FakeLLM, monkeypatch: pytest.MonkeyPatch) -> None:
+    class SlowForge(ScriptedChatModel):
+        async def _agenerate(self, messages: list[BaseMessage], *args: Any, **kwargs: Any) -> Any:
+            if self.model_id == "openai/gpt-5":
+                await asyncio.sleep(5)
+            return await super()._agenerate(messages, *args, **kwargs)
+
+    prompts: list[list[BaseMessage]] = []
+
+    def respond(model: ScriptedChatModel, messages: list[BaseMessage]) -> AIMessage:
+        prompts.append(messages)
+        return fake_llm.responder(model, messages)
+
+    def load(name: str, **kwargs: Any) -> SlowForge:
+        return SlowForge(model_id=name, calls=fake_llm.calls, responder=respond)
+
+    monkeypatch.setattr(utils, "load_chat_model", load)
+    ctx = Context(turn_budget_s=1.0, answer_reserve_s=0.3)
+    started = time.perf_counter()
+    out = await builder.compile().ainvoke({"messages": [("user", "what time is it?")]}, context=ctx)
+    assert time.perf_counter() - started < ctx.turn_budget_s
+
+    final = out["messages"][-1]
+    assert isinstance(final, AIMessage) and final.name == "phase" and not final.tool_calls
+    assert any(m.additional_kwargs.get("budget") == "spent" for m in out["messages"])
+    assert fake_llm.calls[-1] == ()  # Phase answered with its delegation tool unbound
+    assert ANSWER_NOW_NOTE in [m.content for m in prompts[-1]]
+    for prompt in prompts:  # system messages only lead the prompt (Anthropic rejects them later)
+        kinds = [isinstance(m, SystemMessage) for m in prompt]
+        assert kinds == sorted(kinds, reverse=True)
+    assert out["turn_deadline"] > 0
@@ -0,0 +1,133 @@
+# SPDX-License-Identifier: MIT
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+from langchain_core.prompts import ChatPromptTemplate
+
+from react_agent.bundles import BundleStore, SnapshotStore
+
+HEADER = "---\nlicense: CC BY 4.0\n---\n"
+
+
+class FakeSource:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.commits: dict[str, str] = {}
+        self.calls: list[str] = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, handle: str) -> tuple[str, Any]:
+        with self._lock:
+            self.calls.append(handle)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if handle.startswith("broken"):
+                raise RuntimeError("offline")
+            commit = self.commits.get(handle, "c1")
+            prompt = ChatPromptTemplate.from_messages(
+                [("system", HEADER + f"{handle}@{commit}: I am {{ai_name}} speaking {{ai_language}} at {{system_time}}")]
+            )
+            return commit, prompt
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def test_bundle_fetches_concurrently_and_strips_once() -> None:
+    source = FakeSource(delay=0.05)
+    store = BundleStore(source)
+    bundle = store.get("a, b, c, d")
+    assert source.peak > 1
+    assert [m.content for m in bundle.messages][0].startswith("a@c1")
+    msgs = bundle.render(ai_name="Nova", ai_language="German", system_time="T0")
+    assert [m.content for m in msgs] == [
+        f"{h}@c1: I am Nova speaking German at T0" for h in "abcd"
+    ]
+    # warm path: no further fetches, same compiled object
+    assert store.get("a, b, c, d") is bundle
+    assert len(source.calls) == 4
+
+
+@pytest.mark.asyncio
+async def test_bundle_shares_handles_between_lists() -> None:
+    source = FakeSource()
+    store = BundleStore(source)
+    await store.aget("a, b")
+    await store.aget("b, c")
+    assert sorted(source.calls) == ["a", "b", "c"]
+
+
+def test_bundle_refresh_recompiles_on_commit_change() -> None:
+    source = FakeSource()
+    store = BundleStore(source, ttl=0.0)
+    first = store.get("a")
+    source.commits["a"] = "c2"
+    store.get("a")  # stale: schedules a background refresh
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline and store.get("a", ttl=60).version == first.version:
+        time.sleep(0.01)
+    bundle = store.get("a", ttl=60)
+    assert bundle.version != first.version
+    assert bundle.render(ai_name="x")[0].content.startswith("a@c2")
+
+
+def test_bundle_falls_back_when_unavailable() -> None:
+    store = BundleStore(FakeSource())
+    bundle = store.get("broken/one")
+    assert bundle.degraded
+    assert bundle.render(system_time="T1")[0].content == "System time: T1"
+
+
+def test_snapshot_round_trip_offline(tmp_path: Path) -> None:
+    source = FakeSource()
+    writer = BundleStore(source, snapshot=SnapshotStore(tmp_path))
+    writer.write_snapshot(["a", "b"])
+    expected = writer.get("a, b").render(ai_name="Nova", system_time="T0")
+
+    cold = FakeSource()
+    reader = BundleStore(cold, snapshot=SnapshotStore(tmp_path), offline=True)
+    assert reader.load_snapshot() == 2
+    bundle = reader.get("a, b")
+    assert bundle.render(ai_name="Nova", system_time="T0") == expected
+    assert cold.calls == []
+    assert not bundle.degraded
+
+
+def test_snapshot_keeps_every_handle_under_concurrent_writes(tmp_path: Path) -> None:
+    handles = [f"h{i}" for i in range(7)]
+    store = BundleStore(FakeSource(delay=0.01), snapshot=SnapshotStore(tmp_path))
+    store.get(", ".join(handles))
+    assert sorted(SnapshotStore(tmp_path).index()) == handles
+
+    # separate stores (as in separate workers) saving into one directory at once
+    writers = [BundleStore(FakeSource(), snapshot=SnapshotStore(tmp_path)) for _ in range(8)]
+    threads = [threading.Thread(target=w.write_snapshot, args=([f"w{i}"],)) for i, w in enumerate(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(SnapshotStore(tmp_path).index()) == sorted([*handles, *(f"w{i}" for i in range(8))])
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_snapshot_warm_start_refreshes_in_background(tmp_path: Path) -> None:
+    BundleStore(FakeSource(), snapshot=SnapshotStore(tmp_path)).write_snapshot(["a"])
+    source = FakeSource(delay=0.2)
+    source.commits["a"] = "c2"
+    store = BundleStore(source, snapshot=SnapshotStore(tmp_path))
+    store.load_snapshot()
+    started = time.monotonic()
+    bundle = store.get("a")
+    assert time.monotonic() - started < 0.1  # served from disk, no blocking fetch
+    assert bundle.render()[0].content.startswith("a@c1")
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline and SnapshotStore(tmp_path).index().get("a") != "c2":
+        time.sleep(0.01)
+    assert SnapshotStore(tmp_path).index() == {"a": "c2"}
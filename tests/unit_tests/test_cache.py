@@ -0,0 +1,110 @@
+# SPDX-License-Identifier: MIT
+import asyncio
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from react_agent.cache import MemoryCache, ResultCache, SQLiteCache
+from react_agent.tools import normalize_query
+
+
+def test_memory_cache_ttl_and_lru() -> None:
+    cache = MemoryCache(maxsize=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    assert cache.get("a") == 1  # a is now most recent
+    cache.set("c", 3, ttl=60)
+    assert cache.get("b") is None and cache.evictions == 1
+    cache.set("d", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("d") is None
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path: Path) -> None:
+    path = str(tmp_path / "search.sqlite3")
+    writer, reader = SQLiteCache(path, maxsize=2), SQLiteCache(path, maxsize=2)
+    writer.set("q", {"value": {"results": [1]}, "cost_ms": 5.0}, ttl=60)
+    assert reader.get("q") == {"value": {"results": [1]}, "cost_ms": 5.0}
+    writer.set("r", 1, ttl=60)
+    writer.set("s", 2, ttl=60)
+    assert len(reader) == 2 and writer.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_single_flight_and_stats() -> None:
+    cache = ResultCache(MemoryCache())
+    calls = 0
+
+    async def slow() -> dict[str, Any]:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return {"results": ["x"]}
+
+    results = await asyncio.gather(*(cache.get_or_call("k", slow, ttl=60) for _ in range(20)))
+    assert calls == 1 and all(r == {"results": ["x"]} for r in results)
+    assert await cache.get_or_call("k", slow, ttl=60) == {"results": ["x"]}
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["coalesced"] == 19 and stats["hits"] == 1
+    assert stats["saved_ms"] >= 15
+
+
+@pytest.mark.asyncio
+async def test_sqlite_io_runs_off_the_event_loop(tmp_path: Path) -> None:
+    threads: set[int] = set()
+
+    class Recording(SQLiteCache):
+        def get(self, key: str) -> Any | None:
+            threads.add(threading.get_ident())
+            return super().get(key)
+
+        def set(self, key: str, value: Any, ttl: float) -> None:
+            threads.add(threading.get_ident())
+            super().set(key, value, ttl)
+
+    cache = ResultCache(Recording(str(tmp_path / "responses.sqlite3")))
+    calls = 0
+
+    async def slow() -> dict[str, Any]:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return {"results": ["x"]}
+
+    results = await asyncio.gather(*(cache.get_or_call("k", slow, ttl=60) for _ in range(10)))
+    assert calls == 1 and all(r == {"results": ["x"]} for r in results)  # still single-flight
+    assert await cache.get_or_call("k", slow, ttl=60) == {"results": ["x"]} and cache.hits == 1
+    assert threads and threading.get_ident() not in threads
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_but_not_stored() -> None:
+    cache = ResultCache(MemoryCache())
+
+    async def failing() -> dict[str, Any]:
+        return {"error": "rate limited"}
+
+    await cache.get_or_call("k", failing, ttl=60, cacheable=lambda r: not r.get("error"))
+    assert cache.backend.get("k") is None
+
+    async def boom() -> Any:
+        await asyncio.sleep(0.01)
+        raise RuntimeError("down")
+
+    outcomes = await asyncio.gather(*(cache.get_or_call("e", boom, ttl=60) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+
+
+def test_query_normalization() -> None:
+    assert normalize_query("  Current time in   BERLIN? ") == normalize_query("current time in berlin")
+
+
+def test_full_payload_round_trips_by_ref() -> None:
+    from react_agent.tools import load_payload, store_payload
+
+    payload = {"query": "q", "results": [{"url": "https://a", "raw_content": "x" * 1000}]}
+    ref = store_payload(payload)
+    assert ref.startswith("payload:") and load_payload(ref) == payload
@@ -0,0 +1,100 @@
+# SPDX-License-Identifier: MIT
+import json
+from typing import Any
+
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from react_agent.compaction import compact_tool_results, last_tool_batch, merge_branches
+from react_agent.context import Context
+from react_agent.graph import builder
+
+from .conftest import FakeLLM, ScriptedChatModel
+
+
+def test_last_batch_follows_call_order() -> None:
+    call = AIMessage(content="", tool_calls=[{"id": "a", "name": "search", "args": {}}, {"id": "b", "name": "get_time", "args": {}}])
+    msgs = [
+        HumanMessage(content="hi"),
+        call,
+        ToolMessage(content="t", name="get_time", tool_call_id="b"),
+        ToolMessage(content="s", name="search", tool_call_id="a"),
+    ]
+    assert [m.tool_call_id for m in last_tool_batch(msgs)] == ["a", "b"]
+
+
+def test_search_payload_is_condensed() -> None:
+    payload = {
+        "query": "eu ai act",
+        "results": [{"title": "EU AI Act", "url": "https://e.eu/a", "content": "word " * 500, "raw_content": "x" * 9000}],
+    }
+    text = compact_tool_results([ToolMessage(content=json.dumps(payload), name="search", tool_call_id="a")], snippet_chars=100)
+    assert text.startswith("[search] eu ai act")
+    assert "https://e.eu/a" in text and "x" * 50 not in text
+    assert len(text) < 300
+
+
+def _one_lookup(model: ScriptedChatModel, messages: list[BaseMessage]) -> AIMessage:
+    last = messages[-1]
+    if "delegate_phase_to_forge" in model.tools:
+        if isinstance(last, ToolMessage):
+            return AIMessage(content="Done.")
+        return AIMessage(content="", tool_calls=[{"id": "d1", "name": "delegate_phase_to_forge", "args": {}}])
+    if "get_time" in model.tools:
+        return AIMessage(content="", tool_calls=[{"id": "t1", "name": "get_time", "args": {}}])
+    return AIMessage(content="synthesized")
+
+
+async def _run(handoff: str) -> dict[str, Any]:
+    return await builder.compile().ainvoke(
+        {"messages": [("user", "what time is it?")]}, context=Context(forge_handoff=handoff)
+    )
+
+
+@pytest.mark.asyncio
+async def test_direct_handoff_skips_synthesis(fake_llm: FakeLLM) -> None:
+    fake_llm.responder = _one_lookup
+    synth = await _run("synthesize")
+    direct = await _run("direct")
+
+    assert synth["llm_calls"] == 4 and direct["llm_calls"] == 3
+    assert direct["messages"][-1].content == "Done."
+    assert direct["turn_ms"] is not None
+    handoff = next(m for m in direct["messages"] if m.additional_kwargs.get("handoff"))
+    assert handoff.additional_kwargs.get("compacted")
+    assert str(handoff.content).startswith("[get_time] ")
+
+
+def _tavily_payload() -> dict[str, Any]:
+    body = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 80
+    results = [
+        {"title": f"Result {i}", "url": f"https://www.site{i % 6}.com/page/?utm_source=x", "content": body, "score": i / 10, "raw_content": body * 5}
+        for i in range(10)
+    ]
+    return {"query": "q", "answer": None, "images": [], "results": results, "response_time": 1.2}
+
+
+def test_compact_search_dedupes_ranks_and_fits_budget() -> None:
+    from react_agent.compaction import canonical_url, compact_search
+    from react_agent.history import TOKENS
+
+    raw = _tavily_payload()
+    compact = compact_search(raw, budget_tokens=600)
+
+    urls = [canonical_url(r["url"]) for r in compact["results"]]
+    assert len(urls) == len(set(urls)) == 6
+    scores = [r["score"] for r in compact["results"]]
+    assert scores == sorted(scores, reverse=True) and scores[0] == 0.9
+    assert "raw_content" not in compact["results"][0]
+    size = TOKENS.text(json.dumps(compact))
+    assert size <= 650
+    assert size * 20 < TOKENS.text(json.dumps(raw))
+
+
+def test_merged_branches_keep_order_and_share_the_limit() -> None:
+    branches = [{"query": f"q{i}", "text": "x" * 1000} for i in range(3)]
+    text = merge_branches(branches, max_chars=900)
+    assert [line[:5] for line in text.splitlines() if line.startswith("## ")] == ["## q0", "## q1", "## q2"]
+    assert all(len(block) <= 300 for block in text.split("\n\n"))
+    merged = ToolMessage(content=text, name="research_parallel", tool_call_id="r1")
+    assert compact_tool_results([merged], max_chars=10_000) == text
@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: MIT
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import tool
+from langgraph.runtime import Runtime
+
+from react_agent.context import Context
+from react_agent.executor import _Gate, tool_executor
+from react_agent.state import State
+
+running = 0
+peak = 0
+
+
+@tool
+async def lookup(query: str) -> str:
+    """Pretend to search."""
+    global running, peak
+    running += 1
+    peak = max(peak, running)
+    try:
+        await asyncio.sleep(5 if query == "slow" else 0.02)
+    finally:
+        running -= 1
+    return f"found {query}"
+
+
+@tool
+async def broken() -> str:
+    """Always fail."""
+    raise ValueError("nope")
+
+
+def _calls(*queries: str) -> AIMessage:
+    calls = [{"id": f"c{i}", "name": "lookup", "args": {"query": q}} for i, q in enumerate(queries)]
+    calls.append({"id": "bad", "name": "broken", "args": {}})
+    return AIMessage(content="", tool_calls=calls)
+
+
+@pytest.mark.asyncio
+async def test_calls_run_concurrently_with_timeouts_and_pairing() -> None:
+    node = tool_executor([lookup, broken])
+    ctx = Context(tool_timeout=0.3, tool_concurrency_per_tool=2)
+    msg = _calls("a", "slow", "b", "c")
+
+    started = asyncio.get_running_loop().time()
+    out = await node(State(messages=[msg]), runtime=Runtime(context=ctx))
+    elapsed = asyncio.get_running_loop().time() - started
+
+    results = out["messages"]
+    assert all(isinstance(m, ToolMessage) for m in results)
+    assert [m.tool_call_id for m in results] == [tc["id"] for tc in msg.tool_calls]
+    assert [m.content for m in results[:1] + results[2:4]] == ["found a", "found b", "found c"]
+    assert results[1].status == "error" and "Timed out" in str(results[1].content)
+    assert results[4].status == "error" and "nope" in str(results[4].content)
+    assert elapsed < 1.0  # the slow call did not stall the batch
+    assert peak <= 2
+
+
+@pytest.mark.asyncio
+async def test_contexts_with_different_limits_share_one_cap() -> None:
+    global peak
+    peak = 0
+    node = tool_executor([lookup, broken])
+    runs = [
+        node(
+            State(messages=[_calls(*(f"q{i}" for i in range(4)))]),
+            runtime=Runtime(context=Context(tool_concurrency=limit, tool_concurrency_per_tool=16)),
+        )
+        for limit in (2, 3)
+    ]
+    await asyncio.gather(*runs)
+    assert peak <= 3  # not 2 + 3: the process-wide gate is keyed by name only
+
+
+@pytest.mark.asyncio
+async def test_raising_a_limit_lets_waiters_in() -> None:
+    gate = _Gate(1)
+    release = asyncio.Event()
+    entered: list[int] = []
+
+    async def hold(i: int) -> None:
+        async with gate:
+            entered.append(i)
+            await release.wait()
+
+    tasks = [asyncio.create_task(hold(i)) for i in range(3)]
+    await asyncio.sleep(0.01)
+    assert entered == [0]
+    await gate.resize(3)  # no call finishes, yet both waiters get in
+    await asyncio.sleep(0.01)
+    assert sorted(entered) == [0, 1, 2]
+    release.set()
+    await asyncio.gather(*tasks)
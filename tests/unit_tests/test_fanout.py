@@ -0,0 +1,73 @@
+# SPDX-License-Identifier: MIT
+import asyncio
+import time
+from typing import Any
+
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from react_agent import utils
+from react_agent.context import Context
+from react_agent.graph import builder
+
+from .conftest import FakeLLM, ScriptedChatModel
+
+QUERIES = ["time in Berlin", "time in Tokyo", "time in Lima"]
+BRANCH_S = 0.2
+
+
+def fan_out(model: ScriptedChatModel, messages: list[BaseMessage]) -> AIMessage:
+    """Phase delegates once; Forge splits the task; each branch checks the clock; Forge synthesizes."""
+    last = messages[-1]
+    if "delegate_phase_to_forge" in model.tools:
+        if isinstance(last, ToolMessage):
+            return AIMessage(content="final answer")
+        return AIMessage(content="", tool_calls=[{"id": "d1", "name": "delegate_phase_to_forge", "args": {}}])
+    if "research_parallel" in model.tools:
+        return AIMessage(content="", tool_calls=[{"id": "r1", "name": "research_parallel", "args": {"queries": QUERIES}}])
+    if "get_time" in model.tools and isinstance(last, HumanMessage):
+        return AIMessage(content="", tool_calls=[{"id": f"t-{last.content}", "name": "get_time", "args": {}}])
+    return AIMessage(content="synthesized")
+
+
+class SlowBranches(ScriptedChatModel):
+    """Branch steps (real tools bound, no fan-out tool) take `BRANCH_S` seconds."""
+
+    async def _agenerate(self, messages: list[BaseMessage], *args: Any, **kwargs: Any) -> Any:
+        if "get_time" in self.tools and "research_parallel" not in self.tools:
+            await asyncio.sleep(BRANCH_S)
+        return await super()._agenerate(messages, *args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_branches_run_in_parallel_and_merge_into_one_result(fake_llm: FakeLLM, monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_llm.responder = fan_out
+
+    def load(name: str, **kwargs: Any) -> SlowBranches:
+        return SlowBranches(model_id=name, calls=fake_llm.calls, responder=lambda m, msgs: fake_llm.responder(m, msgs))
+
+    monkeypatch.setattr(utils, "load_chat_model", load)
+    started = time.perf_counter()
+    out = await builder.compile().ainvoke({"messages": [("user", "what time is it around the world?")]}, context=Context(forge_fanout=3))
+    assert time.perf_counter() - started < 2 * BRANCH_S  # three branches, one branch's wall time
+
+    merged = [m for m in out["messages"] if isinstance(m, ToolMessage) and m.name == "research_parallel"]
+    assert len(merged) == 1 and merged[0].tool_call_id == "r1"
+    assert [line for line in str(merged[0].content).splitlines() if line.startswith("## ")] == [f"## {q}" for q in QUERIES]
+    assert out["messages"][-1].content == "final answer"
+    assert out["research"] == []
+    # phase, forge, three branches, synthesis, phase
+    assert out["llm_calls"] == 7
+
+
+@pytest.mark.asyncio
+async def test_fanout_is_capped_and_off_by_default(fake_llm: FakeLLM) -> None:
+    fake_llm.responder = fan_out
+    out = await builder.compile().ainvoke({"messages": [("user", "what time is it?")]}, context=Context(forge_fanout=2))
+    merged = next(m for m in out["messages"] if isinstance(m, ToolMessage) and m.name == "research_parallel")
+    assert str(merged.content).count("## ") == 2
+    assert "1 more sub-queries were not researched" in str(merged.content)
+
+    fake_llm.calls.clear()
+    await builder.compile().ainvoke({"messages": [("user", "what time is it?")]}, context=Context())
+    assert not any("research_parallel" in tools for tools in fake_llm.calls)
@@ -0,0 +1,164 @@
+# SPDX-License-Identifier: MIT
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from react_agent.cache import MemoryCache
+from react_agent.gateway import Gateway, SessionIndex
+
+from .conftest import FakeLLM, ScriptedChatModel
+
+
+def _count_turns(model: ScriptedChatModel, messages: list[BaseMessage]) -> AIMessage:
+    turns = sum(isinstance(m, HumanMessage) for m in messages)
+    return AIMessage(content=f"this is turn {turns} of our chat")
+
+
+class Client:
+    """Minimal HTTP/1.1 client over one keep-alive connection."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader, self.writer = reader, writer
+
+    async def request(self, method: str, path: str, body: Any = None, headers: dict[str, str] | None = None) -> tuple[int, dict[str, str], bytes]:
+        data = json.dumps(body).encode() if body is not None else b""
+        head = {"Host": "test", "Content-Length": str(len(data)), **(headers or {})}
+        self.writer.write(f"{method} {path} HTTP/1.1\r\n".encode() + "".join(f"{k}: {v}\r\n" for k, v in head.items()).encode() + b"\r\n" + data)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        resp_headers: dict[str, str] = {}
+        while (line := await self.reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode().partition(":")
+            resp_headers[name.strip().lower()] = value.strip()
+        if resp_headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while (size := int((await self.reader.readline()).strip(), 16)) > 0:
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            await self.reader.readline()
+            return status, resp_headers, b"".join(chunks)
+        return status, resp_headers, await self.reader.readexactly(int(resp_headers["content-length"]))
+
+
+@asynccontextmanager
+async def running(fake_llm: FakeLLM) -> AsyncIterator[tuple[Gateway, Client]]:
+    """Serve a gateway on a free port and connect one client to it."""
+    fake_llm.responder = _count_turns
+    gw = Gateway(sessions=SessionIndex(MemoryCache()), token=None)
+    server = await gw.start("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        yield gw, Client(reader, writer)
+    finally:
+        writer.close()
+        server.close()
+        await server.wait_closed()
+
+
+def _events(body: bytes) -> list[tuple[str, Any]]:
+    events = []
+    for block in body.decode().strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.mark.asyncio
+async def test_session_keeps_its_thread_over_one_connection(fake_llm: FakeLLM) -> None:
+    async with running(fake_llm) as (_, client):
+        status, _, body = await client.request("POST", "/chat", {"session_id": "s1", "message": "hi"})
+        first = json.loads(body)
+        assert status == 200 and first["answer"] == "this is turn 1 of our chat"
+        status, _, body = await client.request("POST", "/chat", {"session_id": "s1", "message": "and again"})
+        second = json.loads(body)
+        assert second["thread_id"] == first["thread_id"]
+        assert second["answer"] == "this is turn 2 of our chat"
+        _, _, body = await client.request("POST", "/chat", {"session_id": "other", "message": "hi"})
+        assert json.loads(body)["thread_id"] != first["thread_id"]
+
+
+@pytest.mark.asyncio
+async def test_sse_streams_phase_tokens_then_done(fake_llm: FakeLLM) -> None:
+    async with running(fake_llm) as (_, client):
+        status, headers, body = await client.request("POST", "/chat", {"session_id": "s2", "message": "hi"}, {"Accept": "text/event-stream"})
+        assert status == 200 and headers["content-type"].startswith("text/event-stream")
+        events = _events(body)
+        tokens = [data["text"] for name, data in events if name == "token"]
+        assert len(tokens) > 1
+        assert events[-1][0] == "done"
+        assert "".join(tokens) == events[-1][1]["answer"] == "this is turn 1 of our chat"
+
+
+@pytest.mark.asyncio
+async def test_busy_gateway_answers_503(fake_llm: FakeLLM) -> None:
+    async with running(fake_llm) as (gw, client):
+        gw.queue_timeout = 0.01
+        for _ in range(gw.max_inflight):
+            await gw._slots.acquire()
+        status, headers, _ = await client.request("POST", "/chat", {"session_id": "s3", "message": "hi"})
+        assert status == 503 and "retry-after" in headers
+        status, _, body = await client.request("GET", "/healthz")
+        assert status == 200 and json.loads(body)["status"] == "ok"
+
+
+@pytest.mark.asyncio
+async def test_token_forget_and_bad_requests(fake_llm: FakeLLM) -> None:
+    async with running(fake_llm) as (gw, client):
+        gw.token = "secret"
+        assert (await client.request("POST", "/chat", {"message": "hi"}))[0] == 401
+        auth = {"Authorization": "Bearer secret"}
+        assert (await client.request("POST", "/chat", {"session_id": "s4"}, auth))[0] == 400
+        assert (await client.request("GET", "/nope", None, auth))[0] == 404
+        await client.request("POST", "/chat", {"session_id": "s4", "message": "hi"}, auth)
+        assert (await client.request("DELETE", "/sessions/s4", None, auth))[0] == 200
+        _, _, body = await client.request("POST", "/chat", {"session_id": "s4", "message": "hi"}, auth)
+        assert json.loads(body)["answer"] == "this is turn 1 of our chat"  # fresh thread
+
+
+@pytest.mark.asyncio
+async def test_run_errors_become_500_and_bad_lengths_400(fake_llm: FakeLLM) -> None:
+    async with running(fake_llm) as (_, client):
+        def boom(model: ScriptedChatModel, messages: list[BaseMessage]) -> AIMessage:
+            raise ValueError("model exploded")
+
+        fake_llm.responder = boom
+        status, _, body = await client.request("POST", "/chat", {"session_id": "s", "message": "hi"})
+        assert status == 500 and "model exploded" in json.loads(body)["error"]
+        # the connection survives the failed run
+        status, _, body = await client.request("POST", "/chat?stream=1", {"session_id": "s", "message": "hi"})
+        assert status == 200 and _events(body)[-1][0] == "error"
+
+        client.writer.write(b"POST /chat HTTP/1.1\r\nContent-Length: lots\r\n\r\n")
+        await client.writer.drain()
+        assert (await client.reader.readline()).split()[1] == b"400"
+
+
+@pytest.mark.asyncio
+async def test_json_run_is_cancelled_when_the_client_hangs_up(fake_llm: FakeLLM) -> None:
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    class SlowApp:
+        async def ainvoke(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+            started.set()
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return {"messages": []}
+
+    async with running(fake_llm) as (gw, client):
+        gw.app = SlowApp()
+        data = json.dumps({"session_id": "gone", "message": "hi"}).encode()
+        client.writer.write(b"POST /chat HTTP/1.1\r\nHost: test\r\nContent-Length: %d\r\n\r\n%s" % (len(data), data))
+        await client.writer.drain()
+        await asyncio.wait_for(started.wait(), 1)
+        client.writer.close()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0.05)
+        assert gw._inflight == 0  # the slot is free again
@@ -0,0 +1,38 @@
+# SPDX-License-Identifier: MIT
+import asyncio
+import random
+from typing import Any
+
+import pytest
+
+from react_agent.context import Context
+from react_agent.graph import graph
+
+from .conftest import FakeLLM
+
+CONFIGS = [(1, 3), (2, 1), (4, 2), (6, 1), (9, 3), (25, 0), (25, 2)]
+
+
+async def _run(max_depth: int, max_loops: int) -> tuple[int, int, int]:
+    res: dict[str, Any] = await graph.ainvoke(
+        {"messages": [("user", "hi")]},
+        context=Context(max_depth=max_depth, max_phase_forge=max_loops),
+        config={"recursion_limit": 100},
+    )
+    return res["depth"], res["c1_loops"], len(res["messages"])
+
+
+@pytest.mark.asyncio
+async def test_limits_are_per_run_under_concurrency(fake_llm: FakeLLM) -> None:
+    # reference outcome of each config when run alone
+    expected = {cfg: await _run(*cfg) for cfg in CONFIGS}
+    assert len(set(expected.values())) > 1
+
+    rng = random.Random(7)
+    mix = [rng.choice(CONFIGS) for _ in range(300)]
+    results = await asyncio.gather(*(_run(*cfg) for cfg in mix))
+
+    for cfg, got in zip(mix, results):
+        assert got == expected[cfg], cfg
+        depth, loops, _ = got
+        assert loops <= cfg[1]
@@ -0,0 +1,66 @@
+# SPDX-License-Identifier: MIT
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from react_agent.history import ELIDED_MARKER, TokenCounter, window_messages
+
+
+def _words(text: str) -> int:
+    return len(text.split())
+
+
+def _thread(turns: int) -> list[BaseMessage]:
+    msgs: list[BaseMessage] = []
+    for i in range(turns):
+        msgs.append(HumanMessage(content=f"question {i} " + "x " * 20, id=f"h{i}"))
+        msgs.append(AIMessage(content="", id=f"c{i}", tool_calls=[{"id": f"tc{i}", "name": "search", "args": {}}]))
+        msgs.append(ToolMessage(content="result " * 200, tool_call_id=f"tc{i}", id=f"t{i}"))
+        msgs.append(AIMessage(content=f"answer {i}", id=f"a{i}"))
+    return msgs
+
+
+def test_window_fits_budget_and_keeps_tool_pairs() -> None:
+    counter = TokenCounter(encoder=_words)
+    msgs = _thread(10)
+    out = window_messages(msgs, 300, counter=counter)
+    assert counter.total(out) <= 300
+    assert out[0].id == "h9" and out[-1].id == "a9"
+    call_ids = {tc["id"] for m in out if isinstance(m, AIMessage) for tc in m.tool_calls}
+    result_ids = {m.tool_call_id for m in out if isinstance(m, ToolMessage)}
+    assert call_ids == result_ids
+
+
+def test_window_elides_old_tool_payloads_before_dropping_turns() -> None:
+    counter = TokenCounter(encoder=_words)
+    msgs = _thread(3)
+    out = window_messages(msgs, 700, counter=counter)
+    assert out[0].id == "h0"
+    old = [m for m in out if isinstance(m, ToolMessage) and m.id != "t2"]
+    assert old and all(str(m.content).endswith(ELIDED_MARKER) for m in old)
+    assert not str(next(m for m in out if m.id == "t2").content).endswith(ELIDED_MARKER)
+
+
+def test_window_disabled_or_under_budget_is_identity() -> None:
+    msgs = _thread(2)
+    assert window_messages(msgs, 0) == msgs
+    assert window_messages(msgs, 10**6, counter=TokenCounter(encoder=_words)) == msgs
+
+
+def test_token_counts_cached_per_message_id() -> None:
+    counter = TokenCounter(encoder=_words)
+    msgs = _thread(5)
+    window_messages(msgs, 200, counter=counter)
+    misses = counter.misses
+    window_messages([*msgs, HumanMessage(content="next", id="h-new")], 200, counter=counter)
+    assert counter.misses == misses + 1
+
+
+def test_window_trims_an_oversized_latest_turn() -> None:
+    counter = TokenCounter(encoder=_words)
+    msgs: list[BaseMessage] = [HumanMessage(content="go", id="h")]
+    for i in range(6):
+        msgs.append(AIMessage(content="", id=f"c{i}", tool_calls=[{"id": f"tc{i}", "name": "search", "args": {}}]))
+        msgs.append(ToolMessage(content="r " * 50, tool_call_id=f"tc{i}", id=f"t{i}"))
+    out = window_messages(msgs, 150, counter=counter)
+    assert out[0].id == "h"
+    assert [m.id for m in out[-2:]] == ["c5", "t5"]
+    assert counter.total(out) <= 150
@@ -0,0 +1,102 @@
+# SPDX-License-Identifier: MIT
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage  # noqa: E402
+from langgraph.checkpoint.memory import InMemorySaver  # noqa: E402
+
+from react_agent import memory  # noqa: E402
+from react_agent.context import Context  # noqa: E402
+from react_agent.graph import builder  # noqa: E402
+from react_agent.memory import HashingEmbedder, MemoryStore, VectorIndex  # noqa: E402
+
+from .conftest import FakeLLM, ScriptedChatModel  # noqa: E402
+
+
+def test_hashing_embedder_is_normalized_and_topical() -> None:
+    emb = HashingEmbedder(256)
+    vecs = emb.embed(["my cat is called Pixel", "what is my cat called?", "jazz records from 1959", ""])
+    assert vecs.shape == (4, 256)
+    assert np.allclose(np.linalg.norm(vecs[:3], axis=1), 1.0)
+    assert not vecs[3].any()
+    assert vecs[0] @ vecs[1] > vecs[2] @ vecs[1]
+    assert np.array_equal(emb.embed(["same text"]), emb.embed(["same text"]))
+
+
+def test_index_appends_searches_and_survives_a_torn_write(tmp_path: Path) -> None:
+    emb = HashingEmbedder(64)
+    texts = [f"note number {i} about topic {i % 3}" for i in range(10)]
+    index = VectorIndex(tmp_path / "ns", 64)
+    index.add(emb.embed(texts[:6]), [{"id": f"t{i}", "text": t} for i, t in enumerate(texts[:6])])
+    index.add(emb.embed(texts[6:]), [{"id": f"t{i}", "text": t} for i, t in enumerate(texts[6:], 6)])
+    query = emb.embed([texts[7]])[0]
+    hits = index.search(query, 3)
+    assert hits[0].id == "t7" and hits[0].score == pytest.approx(1.0, abs=1e-2)
+    assert "t7" not in [h.id for h in index.search(query, 3, exclude=frozenset({"t7"}))]
+    assert index.search(query, 3, min_score=1.5) == []
+
+    with (tmp_path / "ns" / "vectors.f32").open("ab") as f:
+        f.write(b"\x00" * 10)  # half-written row of an append that never got its record
+    reopened = VectorIndex(tmp_path / "ns", 64)
+    assert len(reopened) == 10
+    assert reopened.search(query, 1)[0].id == "t7"
+
+
+def _append_notes(path: Path, writer: int) -> None:
+    emb = HashingEmbedder(64)
+    index = VectorIndex(path, 64)
+    for i in range(40):
+        text = f"writer {writer} note {i}"
+        index.add(emb.embed([text]), [{"id": f"w{writer}-{i}", "text": text}])
+
+
+def test_processes_share_an_index_directory(tmp_path: Path) -> None:
+    reader = VectorIndex(tmp_path / "ns", 64)
+    procs = [multiprocessing.get_context("fork").Process(target=_append_notes, args=(tmp_path / "ns", w)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+    assert all(p.exitcode == 0 for p in procs)
+
+    query = HashingEmbedder(64).embed(["writer 3 note 17"])[0]
+    assert reader.search(query, 1)[0].id == "w3-17"  # rows written by other processes are picked up
+    assert len(reader) == 160
+    reopened = VectorIndex(tmp_path / "ns", 64)
+    assert len(reopened) == 160
+    assert sorted(int(h.id.split("-")[1]) for h in reopened.search(query, 200) if h.id.startswith("w3-")) == list(range(40))
+
+
+def test_store_keeps_namespaces_apart(tmp_path: Path) -> None:
+    store = MemoryStore(tmp_path, HashingEmbedder(128), max_open=1)
+    store.remember("alice", "a1", "my cat is called Pixel", "Nice name!")
+    store.remember("bob", "b1", "my dog is called Rex", "Good dog.")
+    assert [m.id for m in store.recall("alice", "what is my cat called", 5)] == ["a1"]
+    assert [m.id for m in store.recall("bob", "what is my cat called", 5)] == ["b1"]
+
+
+@pytest.mark.asyncio
+async def test_old_turns_are_recalled_into_the_prompt(fake_llm: FakeLLM, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(memory, "MEMORY", MemoryStore(tmp_path, HashingEmbedder(256)))
+    prompts: list[list[BaseMessage]] = []
+
+    def answer(model: ScriptedChatModel, messages: list[BaseMessage]) -> AIMessage:
+        prompts.append(messages)
+        return AIMessage(content=f"Noted: {messages[-1].content}")
+
+    fake_llm.responder = answer
+    app = builder.compile(checkpointer=InMemorySaver())
+    config = {"configurable": {"thread_id": "t-memory"}}
+    ctx = Context(memory_k=1, phase_history_tokens=1, summary_trigger_tokens=0)
+    for text in ["My cat is called Pixel and she is grey.", "I collect jazz records.", "Tomorrow I fly to Lisbon."]:
+        await app.ainvoke({"messages": [("user", text)]}, config, context=ctx)
+
+    prompts.clear()
+    await app.ainvoke({"messages": [("user", "What is my cat called?")]}, config, context=ctx)
+    recalled = [m for m in prompts[-1] if isinstance(m, SystemMessage) and "Relevant earlier turns" in str(m.content)]
+    assert len(recalled) == 1 and "Pixel" in str(recalled[0].content)
+    assert isinstance(prompts[-1][-1], HumanMessage)  # the window itself holds only the current turn
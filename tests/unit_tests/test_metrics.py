@@ -0,0 +1,107 @@
+# SPDX-License-Identifier: MIT
+import os
+import socket
+import subprocess
+import sys
+from typing import Any, Iterator
+
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+from react_agent.context import Context
+from react_agent.graph import builder
+from react_agent.metrics import METRICS, Labels, Metrics
+
+from .conftest import FakeLLM, ScriptedChatModel
+
+
+class ListSink:
+    def __init__(self) -> None:
+        self.seen: list[tuple[str, str, float, Labels]] = []
+
+    def emit(self, kind: str, name: str, value: float, labels: Labels) -> None:
+        self.seen.append((kind, name, value, labels))
+
+
+@pytest.fixture
+def sink() -> Iterator[ListSink]:
+    sink = ListSink()
+    saved = METRICS.sinks, METRICS.enabled
+    METRICS.sinks, METRICS.enabled = [sink], True
+    METRICS.reset()
+    yield sink
+    METRICS.sinks, METRICS.enabled = saved
+    METRICS.reset()
+
+
+def _with_usage(model: ScriptedChatModel, messages: list[BaseMessage]) -> AIMessage:
+    usage: Any = {"input_tokens": 1000, "output_tokens": 100, "total_tokens": 1100, "input_token_details": {"cache_read": 400}}
+    if "delegate_phase_to_forge" in model.tools:
+        if isinstance(messages[-1], ToolMessage):
+            return AIMessage(content="done", usage_metadata=usage)
+        return AIMessage(content="", tool_calls=[{"id": "d1", "name": "delegate_phase_to_forge", "args": {}}], usage_metadata=usage)
+    if "get_time" in model.tools:
+        return AIMessage(content="", tool_calls=[{"id": "t1", "name": "get_time", "args": {}}], usage_metadata=usage)
+    return AIMessage(content="synth", usage_metadata=usage)
+
+
+@pytest.mark.asyncio
+async def test_nodes_tools_and_usage_are_recorded(fake_llm: FakeLLM, sink: ListSink) -> None:
+    fake_llm.responder = _with_usage
+    await builder.compile().ainvoke({"messages": [("user", "what time is it?")]}, context=Context())
+
+    snap = METRICS.snapshot()
+    hist = snap["histograms"]
+    for node in ("phase", "forge", "tools", "summarize"):
+        assert hist[f'node_ms{{node="{node}",status="ok"}}']["count"] >= 1
+    assert hist['prompt_bundle_ms{bundle="phase",status="ok"}']["count"] == 2
+    assert hist['tool_ms{status="success",tool="get_time"}']["count"] == 1
+
+    counters = snap["counters"]
+    assert counters['llm_calls_total{model="openai/gpt-5",node="forge"}'] == 2
+    assert counters['llm_tokens_total{kind="cached",model="openai/gpt-4o-2024-05-13",node="phase"}'] == 800
+    assert counters['llm_cost_usd_total{model="openai/gpt-5",node="forge"}'] == pytest.approx(2 * (600 * 1.25 + 400 * 0.125 + 100 * 10) / 1e6)
+
+    text = METRICS.render_prometheus()
+    assert "# TYPE node_ms histogram" in text and 'node_ms_bucket{node="phase",status="ok",le="+Inf"}' in text
+    assert any(name == "tool_ms" for _, name, _, _ in sink.seen)
+
+
+def test_disabled_metrics_record_nothing() -> None:
+    off = Metrics()
+    with off.span("node", node="phase"):
+        pass
+    off.record_usage("openai/gpt-5", "forge", {"input_tokens": 10})
+    assert off.snapshot() == {"counters": {}, "histograms": {}}
+
+
+def test_exporter_binds_on_start_not_on_import() -> None:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    script = (
+        "import socket, urllib.request\n"
+        "from react_agent import metrics\n"
+        f"probe = socket.socket(); probe.bind(('127.0.0.1', {port})); probe.close()  # still free after import\n"
+        "server = metrics.start_exporter()\n"
+        "assert metrics.start_exporter() is server\n"
+        f"print(urllib.request.urlopen('http://127.0.0.1:{port}/metrics').status)\n"
+    )
+    env = {**os.environ, "METRICS": "prometheus", "METRICS_PORT": str(port)}
+    out = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "200"
+
+
+def test_exporter_starts_on_the_first_observation() -> None:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    script = (
+        "import urllib.request\n"
+        "from react_agent.metrics import METRICS\n"  # as the LangGraph server would: no entry point
+        "METRICS.inc('llm_calls_total', model='openai/gpt-5', node='forge')\n"
+        f"print(urllib.request.urlopen('http://127.0.0.1:{port}/metrics').read().decode())\n"
+    )
+    env = {**os.environ, "METRICS": "prometheus", "METRICS_PORT": str(port)}
+    out = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True).stdout
+    assert 'llm_calls_total{model="openai/gpt-5",node="forge"} 1' in out
@@ -0,0 +1,58 @@
+# SPDX-License-Identifier: MIT
+from typing import Any
+
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+
+from react_agent.context import Context
+from react_agent.graph import graph
+from react_agent.prompts import STABLE_TIME_REF
+
+from .conftest import FakeLLM, ScriptedChatModel
+
+
+def _usage_responder(prompts: list[list[BaseMessage]]) -> Any:
+    def respond(model: ScriptedChatModel, messages: list[BaseMessage]) -> AIMessage:
+        prompts.append(messages)
+        return AIMessage(
+            content="hello",
+            usage_metadata={
+                "input_tokens": 1000,
+                "output_tokens": 10,
+                "total_tokens": 1010,
+                "input_token_details": {"cache_read": 768},
+            },
+        )
+
+    return respond
+
+
+@pytest.mark.asyncio
+async def test_stable_prefix_is_byte_identical_across_threads(fake_llm: FakeLLM) -> None:
+    prompts: list[list[BaseMessage]] = []
+    fake_llm.responder = _usage_responder(prompts)
+    ctx = Context(prompt_layout="stable_prefix", ai_name="Nova")
+
+    first: dict[str, Any] = await graph.ainvoke({"messages": [("user", "hi")]}, context=ctx)
+    await graph.ainvoke({"messages": [("user", "something else")]}, context=ctx)
+
+    a, b = prompts
+    prefix_a = [m for m in a if isinstance(m, SystemMessage)][:-1]
+    prefix_b = [m for m in b if isinstance(m, SystemMessage)][:-1]
+    assert prefix_a and [m.content for m in prefix_a] == [m.content for m in prefix_b]
+    assert STABLE_TIME_REF in str(prefix_a[0].content)
+    # the time closes the leading system block; no system message follows the conversation
+    clock = len(prefix_a)
+    assert str(a[clock].content).startswith("System time: ") and len(str(a[clock].content)) == len("System time: 2026-01-01T00:00+00:00")
+    assert all(not isinstance(m, SystemMessage) for m in a[clock + 1 :])
+
+    assert first["usage"] == {"calls": 1, "input_tokens": 1000, "cached_tokens": 768, "output_tokens": 10}
+
+
+@pytest.mark.asyncio
+async def test_inline_layout_renders_time_into_bundle(fake_llm: FakeLLM) -> None:
+    prompts: list[list[BaseMessage]] = []
+    fake_llm.responder = _usage_responder(prompts)
+    await graph.ainvoke({"messages": [("user", "hi")]}, context=Context())
+    assert str(prompts[0][0].content).startswith("System time: 20")
+    assert not isinstance(prompts[0][-1], SystemMessage)
@@ -0,0 +1,90 @@
+# SPDX-License-Identifier: MIT
+import asyncio
+import time
+
+import pytest
+
+from react_agent.ratelimit import (
+    ProviderLimit,
+    RateLimiter,
+    TokenBucket,
+    exempt_waits,
+    parse_limits,
+)
+
+
+def test_parse_limits() -> None:
+    limits = parse_limits("openai:rpm=500,tpm=800000; tavily:rpm=100;broken:rpm=x;empty:")
+    assert set(limits) == {"openai", "tavily"}
+    assert (limits["openai"].rpm, limits["openai"].tpm) == (500, 800000)
+    assert limits["tavily"].tokens is None
+
+
+def test_bucket_queues_callers_behind_the_debt() -> None:
+    bucket = TokenBucket(2, per=1.0)
+    assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(1) == pytest.approx(0.5, abs=0.05)
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+
+
+def test_settle_refunds_unused_tokens() -> None:
+    limit = ProviderLimit(tpm=1000)
+    assert limit.reserve(800) == 0.0
+    assert limit.tokens is not None
+    limit.tokens.refund(800 - 100)
+    assert limit.reserve(800) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_slot_waits_for_the_request_bucket() -> None:
+    limiter = RateLimiter({"openai": ProviderLimit(rpm=600)})  # one request per 0.1 s after the burst
+    limiter.limits["openai"].requests = TokenBucket(1, per=0.1)
+    started = time.perf_counter()
+    for _ in range(3):
+        async with limiter.slot("openai", 10):
+            pass
+    async with limiter.slot("anthropic", 10):  # unconfigured providers are not limited
+        pass
+    assert time.perf_counter() - started == pytest.approx(0.2, abs=0.08)
+    assert limiter.stats()["openai"] == pytest.approx(0.2, abs=0.08)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_wait_releases_its_reservation() -> None:
+    limiter = RateLimiter({"openai": ProviderLimit(rpm=60, tpm=1000)})
+    limit = limiter.limits["openai"]
+    limit.requests = TokenBucket(1, per=10.0)
+    async with limiter.slot("openai", 100):
+        pass
+
+    async def queued() -> None:
+        async with limiter.slot("openai", 100):
+            pass
+
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.05):
+            await queued()
+    assert limit.requests.reserve(1) == pytest.approx(10.0, abs=0.1)  # one request in the bucket's debt, not two
+    assert limit.tokens is not None and limit.tokens.reserve(900) == 0.0  # only the first 100 tokens are spent
+
+
+@pytest.mark.asyncio
+async def test_waits_push_back_an_exempt_timeout() -> None:
+    limiter = RateLimiter({"tavily": ProviderLimit(rpm=600)})
+    limiter.limits["tavily"].requests = TokenBucket(1, per=0.2)
+    async with limiter.slot("tavily"):
+        pass
+    async with asyncio.timeout(0.1) as cm:
+        with exempt_waits(cm):
+            async with limiter.slot("tavily"):  # 0.2 s in the queue, then 0.05 s of work
+                await asyncio.sleep(0.05)
+
+    loop = asyncio.get_running_loop()
+    async with limiter.slot("tavily"):
+        pass
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.1) as cm:
+            with exempt_waits(cm, until=loop.time() + 0.15):  # the deadline still holds
+                async with limiter.slot("tavily"):
+                    pass
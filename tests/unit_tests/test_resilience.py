@@ -0,0 +1,197 @@
+# SPDX-License-Identifier: MIT
+import asyncio
+import contextlib
+import time
+from typing import AsyncIterator, Iterator
+
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage
+
+from react_agent import resilience
+from react_agent.budget import DeadlineExceeded
+from react_agent.context import Context
+from react_agent.graph import builder
+from react_agent.ratelimit import ProviderLimit, RateLimiter, TokenBucket
+from react_agent.resilience import CallPolicy, resilient_call, retryable
+from react_agent.streaming import StreamProgress
+
+from .conftest import FakeLLM, ScriptedChatModel, default_responder
+
+
+class RateLimitError(Exception):
+    """Named like the provider SDK errors."""
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+@pytest.fixture(autouse=True)
+def fresh_state() -> Iterator[None]:
+    resilience.BREAKERS.clear()
+    resilience.LATENCIES.clear()
+    yield
+    resilience.BREAKERS.clear()
+    resilience.LATENCIES.clear()
+
+
+class Flaky:
+    """Call factory that fails (or stalls) the first `bad` attempts per model."""
+
+    def __init__(self, bad: dict[str, int], error: Exception | None = None, stall: float = 0.0) -> None:
+        self.bad, self.error, self.stall = bad, error, stall
+        self.calls: list[str] = []
+
+    def __call__(self, model_id: str) -> resilience.Call:
+        async def call() -> BaseMessage:
+            self.calls.append(model_id)
+            if self.bad.get(model_id, 0) > 0:
+                self.bad[model_id] -= 1
+                if self.error is not None:
+                    raise self.error
+                await asyncio.sleep(self.stall)
+            return AIMessage(content=f"from {model_id}")
+
+        return call
+
+
+def test_retryable() -> None:
+    assert retryable(TimeoutError())
+    assert retryable(RateLimitError())
+    assert not retryable(BadRequest())
+    assert not retryable(ValueError("bad args"))
+
+
+@pytest.mark.asyncio
+async def test_timeout_is_retried() -> None:
+    flaky = Flaky({"a/primary": 1}, stall=1.0)
+    msg = await resilient_call("a/primary", flaky, policy=CallPolicy(timeout=0.05, retries=1, backoff=0), node="forge")
+    assert msg.content == "from a/primary"
+    assert flaky.calls == ["a/primary", "a/primary"]
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_error_is_raised_at_once() -> None:
+    flaky = Flaky({"a/primary": 5}, error=BadRequest())
+    with pytest.raises(BadRequest):
+        await resilient_call("a/primary", flaky, policy=CallPolicy(retries=3, breaker_failures=1), node="forge", fallback="a/fallback")
+    assert flaky.calls == ["a/primary"]
+
+
+@pytest.mark.asyncio
+async def test_breaker_diverts_to_fallback_until_a_probe_succeeds() -> None:
+    flaky = Flaky({"a/primary": 2}, error=RateLimitError())
+    policy = CallPolicy(retries=0, backoff=0, breaker_failures=2, breaker_cooldown=0.05)
+
+    async def run() -> BaseMessage:
+        return await resilient_call("a/primary", flaky, policy=policy, node="forge", fallback="a/fallback")
+
+    first = await run()
+    assert first.response_metadata["fallback"] == "a/fallback"
+    await run()  # second failure opens the breaker
+    assert resilience.BREAKERS["a/primary"].open
+    flaky.calls.clear()
+    assert (await run()).content == "from a/fallback"
+    assert flaky.calls == ["a/fallback"]  # primary not tried while open
+
+    await asyncio.sleep(0.06)
+    probe = await run()
+    assert probe.content == "from a/primary"
+    assert not resilience.BREAKERS["a/primary"].open
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_over_a_slow_first_attempt() -> None:
+    for _ in range(resilience.HEDGE_MIN_SAMPLES):
+        resilience.LATENCIES.setdefault("a/primary", resilience.LatencyWindow()).add(10.0)
+    flaky = Flaky({"a/primary": 1}, stall=2.0)
+    started = time.perf_counter()
+    msg = await resilient_call("a/primary", flaky, policy=CallPolicy(hedge_percentile=95), node="forge")
+    assert msg.content == "from a/primary"
+    assert flaky.calls == ["a/primary", "a/primary"]
+    assert time.perf_counter() - started < 0.5
+
+
+@pytest.mark.asyncio
+async def test_forge_falls_back_to_the_default_model(fake_llm: FakeLLM) -> None:
+    def responder(model: ScriptedChatModel, messages: list[BaseMessage]) -> AIMessage:
+        if model.model_id == "openai/gpt-5":
+            raise RateLimitError("slow down")
+        return default_responder(model, messages)
+
+    fake_llm.responder = responder
+    ctx = Context(model_retries=0, breaker_failures=1)
+    out = await builder.compile().ainvoke({"messages": [("user", "what time is it?")]}, context=ctx)
+    forge_msgs = [m for m in out["messages"] if m.name == "forge" and not m.additional_kwargs.get("handoff")]
+    assert forge_msgs and all(m.response_metadata.get("fallback") == ctx.model for m in forge_msgs)
+    assert resilience.BREAKERS["openai/gpt-5"].open
+
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_attempts_and_retries() -> None:
+    flaky = Flaky({"a/primary": 10}, stall=5.0)
+    policy = CallPolicy(timeout=10, retries=5, backoff=0, breaker_failures=1, deadline=time.time() + 0.1)
+    started = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        await resilient_call("a/primary", flaky, policy=policy, node="forge", fallback="a/fallback")
+    assert time.perf_counter() - started < 0.3
+    assert flaky.calls == ["a/primary"]
+
+
+@pytest.mark.asyncio
+async def test_streamed_call_is_retried_only_before_its_first_token() -> None:
+    flaky = Flaky({"a/primary": 1}, error=RateLimitError())
+    progress = StreamProgress()
+    msg = await resilient_call("a/primary", flaky, policy=CallPolicy(retries=2, backoff=0), node="phase", progress=progress)
+    assert msg.content == "from a/primary"
+    assert flaky.calls == ["a/primary", "a/primary"]
+
+    flaky = Flaky({"a/primary": 1}, error=RateLimitError())
+    progress.emitted = True  # the first attempt already streamed text
+    with pytest.raises(RateLimitError):
+        await resilient_call(
+            "a/primary", flaky, policy=CallPolicy(retries=2, backoff=0, breaker_failures=1), node="phase", fallback="a/fallback", progress=progress
+        )
+    assert flaky.calls == ["a/primary"]
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_wait_is_outside_the_attempt_timeout() -> None:
+    limiter = RateLimiter({"a": ProviderLimit(rpm=60)})
+    limiter.limits["a"].requests = TokenBucket(1, per=0.2)
+    settled: list[BaseMessage] = []
+
+    @contextlib.asynccontextmanager
+    async def admit(model_id: str) -> AsyncIterator[resilience.Settle | None]:
+        async with limiter.slot(model_id.split("/")[0]):
+            yield settled.append
+
+    async with limiter.slot("a"):
+        pass
+    flaky = Flaky({})
+    policy = CallPolicy(timeout=0.05, retries=2, backoff=0, breaker_failures=1)
+    msg = await resilient_call("a/primary", flaky, policy=policy, node="forge", fallback="a/fallback", admit=admit)
+    assert msg.content == "from a/primary"
+    assert flaky.calls == ["a/primary"]  # the 0.2 s queue was neither a timeout nor a retry
+    assert settled == [msg]
+    assert not resilience.BREAKERS["a/primary"].failures
+    assert max(resilience.LATENCIES["a/primary"]._samples) < 50  # the wait is not a latency sample
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_wait_is_bounded_by_the_deadline() -> None:
+    limiter = RateLimiter({"a": ProviderLimit(rpm=6)})
+    limiter.limits["a"].requests = TokenBucket(1, per=10.0)
+
+    @contextlib.asynccontextmanager
+    async def admit(model_id: str) -> AsyncIterator[resilience.Settle | None]:
+        async with limiter.slot("a"):
+            yield None
+
+    async with limiter.slot("a"):
+        pass
+    flaky = Flaky({})
+    with pytest.raises(DeadlineExceeded):
+        await resilient_call("a/primary", flaky, policy=CallPolicy(deadline=time.time() + 0.05), node="forge", admit=admit)
+    assert flaky.calls == []
+    assert limiter.limits["a"].requests.reserve(0) == pytest.approx(0.0, abs=0.1)  # the reservation was released
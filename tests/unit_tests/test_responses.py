@@ -0,0 +1,62 @@
+# SPDX-License-Identifier: MIT
+from typing import Any, Iterator
+
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+from react_agent import responses
+from react_agent.cache import MemoryCache, ResultCache
+from react_agent.context import Context
+from react_agent.graph import builder
+from react_agent.responses import prompt_fingerprint
+
+from .conftest import FakeLLM, ScriptedChatModel
+
+
+@pytest.fixture
+def memory_cache(monkeypatch: pytest.MonkeyPatch) -> Iterator[ResultCache]:
+    cache = ResultCache(MemoryCache())
+    monkeypatch.setattr(responses, "_CACHE", cache)
+    yield cache
+
+
+def _echo(model: ScriptedChatModel, messages: list[BaseMessage]) -> AIMessage:
+    last = next(m for m in reversed(messages) if isinstance(m, HumanMessage))
+    return AIMessage(content=f"you said {last.content}")
+
+
+async def _conversation(thread: str, turns: list[str], ctx: Context) -> dict[str, Any]:
+    app = builder.compile(checkpointer=InMemorySaver())
+    config: Any = {"configurable": {"thread_id": thread}}
+    state: dict[str, Any] = {}
+    for text in turns:
+        state = await app.ainvoke({"messages": [("user", text)]}, config, context=ctx)
+    return state
+
+
+@pytest.mark.asyncio
+async def test_unchanged_prefix_is_served_from_cache(fake_llm: FakeLLM, memory_cache: ResultCache) -> None:
+    fake_llm.responder = _echo
+    ctx = Context(response_cache=True)
+    first = await _conversation("a", ["hi", "tell me a story"], ctx)
+    calls = len(fake_llm.calls)
+
+    again = await _conversation("b", ["hi", "tell me a story"], ctx)
+    assert len(fake_llm.calls) == calls  # system_time in the rendered bundle is not part of the key
+    assert again["messages"][-1].content == first["messages"][-1].content
+    assert again["messages"][-1].response_metadata["cache"] == "hit"
+    assert again["messages"][-1].id != first["messages"][-1].id
+
+    await _conversation("c", ["hi", "tell me a joke"], ctx)
+    assert len(fake_llm.calls) > calls  # changed second turn goes to the provider
+    assert memory_cache.stats()["hits"] > 0
+
+
+def test_fingerprint_ignores_ids_and_system_time() -> None:
+    a = [HumanMessage(content="hi", id="1")]
+    b = [HumanMessage(content="hi", id="2")]
+    assert prompt_fingerprint("v1", {"ai_name": "AI", "system_time": "t1"}, "inline", a) == prompt_fingerprint(
+        "v1", {"ai_name": "AI", "system_time": "t2"}, "inline", b
+    )
+    assert prompt_fingerprint("v1", {}, "inline", a) != prompt_fingerprint("v2", {}, "inline", a)
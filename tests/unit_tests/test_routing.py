@@ -0,0 +1,81 @@
+# SPDX-License-Identifier: MIT
+from typing import Any
+
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+from react_agent.context import Context
+from react_agent.graph import builder
+from react_agent.routing import classify_turn
+
+from .conftest import FakeLLM, ScriptedChatModel
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "what time is it?",
+        "what time is it in Tokyo?",
+        "search for the LangGraph Send API",
+        "Can you look up the population of Peru?",
+        "please google the opening hours of the Louvre",
+        "latest news on the EU AI act",
+        "What's the latest Bitcoin price?",
+        "today's weather in Berlin",
+        "https://example.com",
+    ],
+)
+def test_tool_turns_are_confident_forge(text: str) -> None:
+    decision = classify_turn(text)
+    assert decision.target == "forge" and decision.confidence >= 0.8
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "hello",
+        "I feel tired today",
+        "write me a poem",
+        "how many moons, roughly?",
+        "I had a great time in Paris with my family",
+        "Can you help me design a web page layout?",
+        "Please google-proof this essay",
+        "what's your score on this essay?",
+        "I keep searching for the results of my own thinking",
+        "My son watched the news today and got scared",
+        "I had a terrible day today, the weather was awful",
+        "tell me what you think about recent headlines",
+        "The latest stock market crash scared me a bit",
+    ],
+)
+def test_other_turns_stay_in_phase(text: str) -> None:
+    decision = classify_turn(text)
+    assert decision.target == "phase" or decision.confidence < 0.8
+
+
+def _one_lookup(model: ScriptedChatModel, messages: list[BaseMessage]) -> AIMessage:
+    last = messages[-1]
+    if "delegate_phase_to_forge" in model.tools:
+        if isinstance(last, ToolMessage):
+            return AIMessage(content="It is noon.")
+        return AIMessage(content="", tool_calls=[{"id": "d1", "name": "delegate_phase_to_forge", "args": {}}])
+    if "get_time" in model.tools:
+        return AIMessage(content="", tool_calls=[{"id": "t1", "name": "get_time", "args": {}}])
+    return AIMessage(content="noon")
+
+
+async def _run(prerouter: str) -> dict[str, Any]:
+    app = builder.compile()
+    return await app.ainvoke({"messages": [("user", "what time is it?")]}, context=Context(prerouter=prerouter))
+
+
+@pytest.mark.asyncio
+async def test_prerouter_saves_the_delegating_phase_call(fake_llm: FakeLLM) -> None:
+    fake_llm.responder = _one_lookup
+    baseline = await _run("off")
+    fast = await _run("rules")
+
+    assert baseline["messages"][-1].content == fast["messages"][-1].content == "It is noon."
+    assert baseline["llm_calls"] == 4  # phase → forge → synthesis → phase
+    assert fast["llm_calls"] == 3  # forge → synthesis → phase
+    assert fast["depth"] < baseline["depth"]
@@ -0,0 +1,73 @@
+# SPDX-License-Identifier: MIT
+from typing import Any, AsyncIterator
+
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGenerationChunk
+from langgraph.checkpoint.memory import InMemorySaver
+
+from react_agent import utils
+from react_agent.context import Context
+from react_agent.graph import builder
+from react_agent.streaming import astream_text
+
+from .conftest import FakeLLM, ScriptedChatModel
+
+
+def _delegating(model: ScriptedChatModel, messages: list[BaseMessage]) -> AIMessage:
+    last = messages[-1]
+    if "delegate_phase_to_forge" in model.tools:
+        if isinstance(last, ToolMessage):
+            return AIMessage(content="Here is what Forge found for you")
+        return AIMessage(content="", tool_calls=[{"id": "d1", "name": "delegate_phase_to_forge", "args": {}}])
+    if "get_time" in model.tools:
+        if isinstance(last, ToolMessage):
+            return AIMessage(content="SECRET forge reasoning")
+        return AIMessage(content="SECRET forge plan", tool_calls=[{"id": "t1", "name": "get_time", "args": {}}])
+    return AIMessage(content="SECRET synthesis")
+
+
+@pytest.mark.asyncio
+async def test_phase_streams_tokens_without_forge_traffic(fake_llm: FakeLLM) -> None:
+    fake_llm.responder = _delegating
+    app = builder.compile(checkpointer=InMemorySaver())
+    config: Any = {"configurable": {"thread_id": "s1"}}
+
+    pieces = [
+        p
+        async for p in astream_text(
+            app, {"messages": [("user", "what time is it?")]}, config, context=Context(phase_streaming=True)
+        )
+    ]
+    assert len(pieces) > 1
+    assert "".join(pieces) == "Here is what Forge found for you"
+
+    state = (await app.aget_state(config)).values
+    assert state["ttft_ms"] is not None and state["ttft_ms"] >= 0
+    final = state["messages"][-1]
+    assert final.content == "Here is what Forge found for you"
+    assert "ttft_ms" in final.response_metadata
+
+
+class BrokenStream(ScriptedChatModel):
+    """Streams the first word of each reply, then drops the connection."""
+
+    async def _astream(self, messages: list[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+            yield chunk
+            raise ConnectionError("stream reset")
+
+
+@pytest.mark.asyncio
+async def test_a_stream_that_broke_after_its_first_token_is_not_retried(fake_llm: FakeLLM, monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_llm.responder = lambda model, messages: AIMessage(content="It is noon")
+    monkeypatch.setattr(utils, "load_chat_model", lambda name, **kw: BrokenStream(model_id=name, responder=fake_llm.responder, calls=fake_llm.calls))
+    app = builder.compile()
+    ctx = Context(phase_streaming=True, model_retries=3, retry_backoff=0, breaker_failures=1, phase_model="openai/gpt-5")
+
+    pieces: list[str] = []
+    with pytest.raises(ConnectionError):
+        async for p in astream_text(app, {"messages": [("user", "what time is it?")]}, context=ctx):
+            pieces.append(p)
+    assert pieces == ["It "]
+    assert len(fake_llm.calls) == 1  # no retry, no fallback to Context.model
@@ -0,0 +1,140 @@
+# SPDX-License-Identifier: MIT
+import asyncio
+import time
+from typing import Any
+
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.runtime import Runtime
+from langgraph.store.memory import InMemoryStore
+
+from react_agent import utils
+from react_agent.context import Context
+from react_agent.graph import builder, fold_summary, summarize
+from react_agent.state import State
+from react_agent.summary import SUMMARY_JOBS
+
+from .conftest import FakeLLM, ScriptedChatModel
+
+
+def _turns(start: int, stop: int) -> list[BaseMessage]:
+    msgs: list[BaseMessage] = []
+    for i in range(start, stop):
+        msgs.append(HumanMessage(content=f"question {i} " + "pad " * 50, id=f"h{i}"))
+        msgs.append(AIMessage(content=f"answer {i}", id=f"a{i}"))
+    return msgs
+
+
+def _ctx() -> Context:
+    return Context(summary_trigger_tokens=100, summary_keep_turns=2, summary_model="fake/cheap")
+
+
+@pytest.mark.asyncio
+async def test_summary_folds_incrementally(fake_llm: FakeLLM) -> None:
+    prompts: list[str] = []
+
+    def respond(model: ScriptedChatModel, messages: list[BaseMessage]) -> AIMessage:
+        prompts.append(str(messages[-1].content))
+        return AIMessage(content=f"summary v{len(prompts)}")
+
+    fake_llm.responder = respond
+    ctx = _ctx()
+
+    state = State(messages=_turns(0, 6))
+    update = await fold_summary(state, ctx)
+    assert update["summary"] == "summary v1"
+    assert update["summary_through"] == "a3"
+    assert "question 3" in prompts[0] and "question 4" not in prompts[0]
+    assert update["summary_meta"]["tokens_saved"] > 0
+
+    state = State(messages=_turns(0, 9), **update)
+    update = await fold_summary(state, ctx)
+    assert update["summary_through"] == "a6"
+    # only the new turns plus the previous summary are sent
+    assert "summary v1" in prompts[1]
+    assert "question 3" not in prompts[1] and "question 4" in prompts[1]
+
+
+@pytest.mark.asyncio
+async def test_summary_below_threshold_is_noop(fake_llm: FakeLLM) -> None:
+    assert await fold_summary(State(messages=_turns(0, 2)), _ctx()) == {}
+    assert await summarize(State(messages=_turns(0, 2)), Runtime(context=_ctx())) == {}
+    assert fake_llm.calls == []
+
+
+@pytest.mark.asyncio
+async def test_summary_replaces_folded_turns_in_prompts(fake_llm: FakeLLM) -> None:
+    seen: list[list[BaseMessage]] = []
+
+    def respond(model: ScriptedChatModel, messages: list[BaseMessage]) -> AIMessage:
+        if model.model_id == "fake/cheap":
+            return AIMessage(content="the story so far")
+        seen.append(messages)
+        return AIMessage(content="ok")
+
+    fake_llm.responder = respond
+    app = builder.compile(checkpointer=InMemorySaver())
+    config: Any = {"configurable": {"thread_id": "t1"}}
+    res: dict[str, Any] = await app.ainvoke({"messages": _turns(0, 6)}, config, context=_ctx())
+    assert not res.get("summary")  # folded in the background
+    await SUMMARY_JOBS.wait()
+
+    # the next turn applies it: its Phase prompt carries the summary instead of the folded turns
+    res = await app.ainvoke({"messages": [HumanMessage(content="and now?", id="h-next")]}, config, context=_ctx())
+    assert res["summary"] == "the story so far"
+    prompt = seen[-1]
+    assert any(isinstance(m, SystemMessage) and "the story so far" in str(m.content) for m in prompt)
+    assert not any(m.id == "h0" for m in prompt)
+
+
+@pytest.mark.asyncio
+async def test_turn_does_not_wait_for_the_summary(fake_llm: FakeLLM, monkeypatch: pytest.MonkeyPatch) -> None:
+    class Slow(ScriptedChatModel):
+        async def _agenerate(self, messages: list[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any) -> Any:
+            if self.model_id == "fake/cheap":
+                await asyncio.sleep(1.0)
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+    def load(name: str, **kw: Any) -> ScriptedChatModel:
+        return Slow(model_id=name, calls=fake_llm.calls, responder=lambda m, msgs: AIMessage(content="ok"))
+
+    monkeypatch.setattr(utils, "load_chat_model", load)
+    monkeypatch.setattr(utils, "MODEL_REGISTRY", utils.ModelRegistry())
+    app = builder.compile(checkpointer=InMemorySaver())
+    started = time.perf_counter()
+    await app.ainvoke({"messages": _turns(0, 6)}, {"configurable": {"thread_id": "slow"}}, context=_ctx())
+    assert time.perf_counter() - started < 0.5
+    assert SUMMARY_JOBS.running("thread:slow")
+    await SUMMARY_JOBS.wait()
+
+
+@pytest.mark.asyncio
+async def test_fold_reaches_a_turn_served_by_another_worker(fake_llm: FakeLLM, monkeypatch: pytest.MonkeyPatch) -> None:
+    folds = 0
+
+    class Slow(ScriptedChatModel):
+        async def _agenerate(self, messages: list[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any) -> Any:
+            nonlocal folds
+            if self.model_id == "fake/cheap":
+                folds += 1
+                await asyncio.sleep(0.2)
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+    def load(name: str, **kw: Any) -> ScriptedChatModel:
+        return Slow(model_id=name, calls=fake_llm.calls, responder=lambda m, msgs: AIMessage(content="the story so far"))
+
+    monkeypatch.setattr(utils, "load_chat_model", load)
+    monkeypatch.setattr(utils, "MODEL_REGISTRY", utils.ModelRegistry())
+    app = builder.compile(checkpointer=InMemorySaver(), store=InMemoryStore())
+    config: Any = {"configurable": {"thread_id": "workers"}}
+    res: dict[str, Any] = await app.ainvoke({"messages": _turns(0, 6)}, config, context=_ctx())
+    assert res["summary_pending"]["base"] is None
+    # the next turns land on another worker: no job for the thread there, only the checkpointed marker
+    job = SUMMARY_JOBS._jobs.pop("thread:workers")[1]
+    res = await app.ainvoke({"messages": [HumanMessage(content="still there?", id="h-a")]}, config, context=_ctx())
+    assert not res.get("summary") and res["summary_pending"] and folds == 1  # still folding elsewhere: not started again
+    await job
+    res = await app.ainvoke({"messages": [HumanMessage(content="and now?", id="h-b")]}, config, context=_ctx())
+    assert res["summary"] == "the story so far" and res["summary_through"] == "a3"
+    await SUMMARY_JOBS.wait()
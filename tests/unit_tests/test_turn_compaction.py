@@ -0,0 +1,49 @@
+# SPDX-License-Identifier: MIT
+from typing import Any
+
+import pytest
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+    messages_from_dict,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+from react_agent.cache import PAYLOAD_STORE
+from react_agent.context import Context
+from react_agent.graph import builder
+
+from .conftest import FakeLLM, ScriptedChatModel
+
+
+def _one_lookup(model: ScriptedChatModel, messages: list[BaseMessage]) -> AIMessage:
+    last = messages[-1]
+    if "delegate_phase_to_forge" in model.tools:
+        if isinstance(last, ToolMessage):
+            return AIMessage(content="It is noon.")
+        return AIMessage(content="", tool_calls=[{"id": f"d{len(messages)}", "name": "delegate_phase_to_forge", "args": {}}])
+    if "get_time" in model.tools:
+        return AIMessage(content="", tool_calls=[{"id": f"t{len(messages)}", "name": "get_time", "args": {}}])
+    return AIMessage(content="Forge says noon")
+
+
+@pytest.mark.asyncio
+async def test_finished_turns_keep_only_user_and_answer(fake_llm: FakeLLM) -> None:
+    fake_llm.responder = _one_lookup
+    app = builder.compile(checkpointer=InMemorySaver())
+    config: Any = {"configurable": {"thread_id": "t"}}
+    ctx = Context(turn_compaction="archive")
+
+    for _ in range(2):
+        state = await app.ainvoke({"messages": [("user", "what time is it?")]}, config, context=ctx)
+
+    messages = state["messages"]
+    assert [type(m) for m in messages] == [HumanMessage, AIMessage] * 2
+    digest = messages[-1].additional_kwargs["turn"]
+    assert [t["name"] for t in digest["tools"]] == ["get_time"]
+    assert digest["tools"][0]["status"] == "success"
+    assert digest["forge_notes"] == "Forge says noon"
+    archived = messages_from_dict(PAYLOAD_STORE.get(digest["ref"]))
+    assert len(archived) == digest["removed"] and any(isinstance(m, ToolMessage) for m in archived)
@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: MIT
+import threading
+from typing import Any
+
+import pytest
+
+from react_agent import utils
+from react_agent.tools import DELEGATION_TOOLS_PHASE, TOOLS
+
+
+class _FakeModel:
+    def __init__(self, name: str, tools: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.tools = tools
+
+    def bind_tools(self, tools: list[Any]) -> "_FakeModel":
+        return _FakeModel(self.name, tuple(t.name for t in tools))
+
+
+@pytest.fixture
+def loads(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    calls: list[str] = []
+
+    def fake_load(name: str, **kwargs: Any) -> _FakeModel:
+        calls.append(name)
+        return _FakeModel(name)
+
+    monkeypatch.setattr(utils, "load_chat_model", fake_load)
+    monkeypatch.setattr(utils, "MODEL_REGISTRY", utils.ModelRegistry(maxsize=3))
+    return calls
+
+
+def test_registry_reuses_clients(loads: list[str]) -> None:
+    a = utils.get_chat_model("openai/gpt-4o", tools=TOOLS)
+    b = utils.get_chat_model("openai/gpt-4o", tools=list(reversed(TOOLS)))
+    c = utils.get_chat_model("openai/gpt-4o", tools=DELEGATION_TOOLS_PHASE)
+    assert a is b
+    assert a is not c
+    # one underlying client shared by every bound tool set
+    assert loads == ["openai/gpt-4o"]
+    stats = utils.MODEL_REGISTRY.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2  # once per call, not again for the shared base model
+
+
+def test_registry_separates_streaming(loads: list[str]) -> None:
+    assert utils.get_chat_model("openai/gpt-4o") is not utils.get_chat_model("openai/gpt-4o", streaming=True)
+    assert len(loads) == 2
+
+
+def test_registry_evicts_lru(loads: list[str]) -> None:
+    for name in ("a/1", "a/2", "a/3", "a/4"):
+        utils.get_chat_model(name)
+    assert utils.MODEL_REGISTRY.stats()["evictions"] == 1
+    utils.get_chat_model("a/1")
+    assert loads.count("a/1") == 2
+
+
+def test_registry_thread_safe(loads: list[str]) -> None:
+    seen: list[Any] = []
+
+    def worker() -> None:
+        for _ in range(50):
+            seen.append(utils.get_chat_model("openai/gpt-5", tools=TOOLS))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(m) for m in seen}) == 1
+    assert loads == ["openai/gpt-5"]
+
+
+def test_registry_builds_outside_its_lock(monkeypatch: pytest.MonkeyPatch) -> None:
+    slow_started, release = threading.Event(), threading.Event()
+    loads: list[str] = []
+
+    def fake_load(name: str, **kwargs: Any) -> _FakeModel:
+        loads.append(name)
+        if name == "slow/model":
+            slow_started.set()
+            release.wait(5)
+        return _FakeModel(name)
+
+    monkeypatch.setattr(utils, "load_chat_model", fake_load)
+    monkeypatch.setattr(utils, "MODEL_REGISTRY", utils.ModelRegistry())
+    seen: list[Any] = []
+    slow = [threading.Thread(target=lambda: seen.append(utils.get_chat_model("slow/model"))) for _ in range(3)]
+    for t in slow:
+        t.start()
+    assert slow_started.wait(5)
+    assert utils.get_chat_model("fast/model").name == "fast/model"  # not held up by the slow build
+    release.set()
+    for t in slow:
+        t.join()
+    assert loads.count("slow/model") == 1 and len({id(m) for m in seen}) == 1
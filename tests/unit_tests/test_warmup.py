@@ -0,0 +1,80 @@
+# SPDX-License-Identifier: MIT
+import json
+import os
+import subprocess
+import sys
+from typing import Any
+
+import pytest
+
+from react_agent import utils, warmup
+from react_agent.context import Context
+from react_agent.warmup import warm_up
+
+from .conftest import FakeLLM, graph_module
+
+# Client libraries that must not load until a model, search or prompt fetch needs them.
+DEFERRED = ("langchain_openai", "openai", "langchain_tavily", "langchain.chat_models", "langchain_anthropic")
+
+
+def test_import_defers_clients_and_graph_compile() -> None:
+    script = (
+        "import json, sys, importlib\n"
+        "import react_agent, react_agent.cli, react_agent.tools, react_agent.bundles\n"
+        "g = importlib.import_module('react_agent.graph')\n"
+        f"print(json.dumps({{'loaded': [m for m in {DEFERRED!r} if m in sys.modules],"
+        " 'compiled': g.compiled_graph.cache_info().currsize}))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    assert json.loads(out.strip().splitlines()[-1]) == {"loaded": [], "compiled": 0}
+
+
+@pytest.mark.asyncio
+async def test_warm_up_builds_graph_prompts_and_models(fake_llm: FakeLLM) -> None:
+    ctx = Context()
+    report = await warm_up(ctx)
+    assert set(report) == {"graph", "prompts", "models", "search", "memory", "connections"}
+    assert all(isinstance(v, float) for v in report.values()), report
+    assert graph_module.compiled_graph.cache_info().currsize == 1
+
+    before = utils.MODEL_REGISTRY.stats()
+    await graph_module.compiled_graph().ainvoke({"messages": [("user", "what time is it?")]}, context=ctx)
+    after = utils.MODEL_REGISTRY.stats()
+    assert after["misses"] == before["misses"]  # every model the turn needed was already built
+
+
+def test_package_graph_can_be_monkeypatched(monkeypatch: pytest.MonkeyPatch) -> None:
+    stand_in = object()
+    monkeypatch.setattr(graph_module, "graph", stand_in)
+    assert graph_module.graph is stand_in
+    monkeypatch.undo()
+    assert graph_module.graph is graph_module.compiled_graph()
+
+
+def test_package_resolves_graph_on_first_access() -> None:
+    script = (
+        "import react_agent\n"
+        "print(type(react_agent.graph).__name__)\n"
+    )
+    env = {**os.environ, "WARMUP_ON_LOAD": "0"}
+    out = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True).stdout
+    assert out.strip().splitlines()[-1] == "CompiledStateGraph"
+
+
+def test_loading_the_entry_point_warms_up_in_the_background(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[bool] = []
+
+    async def fake_warm_up(ctx: Context | None = None, *, connect: bool = True) -> dict[str, Any]:
+        calls.append(connect)
+        return {}
+
+    monkeypatch.setenv("WARMUP_ON_LOAD", "1")
+    monkeypatch.setattr(warmup, "warm_up", fake_warm_up)
+    monkeypatch.setattr(warmup, "_BACKGROUND", None)
+    monkeypatch.delattr(graph_module, "graph", raising=False)  # bound by an earlier monkeypatch.undo()
+    assert graph_module.graph is graph_module.compiled_graph()  # the langgraph.json entry point
+    thread = warmup._BACKGROUND
+    assert thread is not None
+    thread.join(5)
+    assert graph_module.graph is not None and warmup._BACKGROUND is thread  # once per process
+    assert calls == [False]  # no connections outside the serving loop